@@ -0,0 +1,33 @@
+"""add index for selecting the latest build data per generator
+
+Revision ID: 0b6e9d4f7a21
+Revises: f3a8d2c6b5e1
+Create Date: 2018-05-31 11:27:45.903118
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '0b6e9d4f7a21'
+down_revision = 'f3a8d2c6b5e1'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+from drydock_provisioner.statemgmt.db import tables
+
+
+def upgrade():
+    # Supports DISTINCT ON (node_name, generator) ordered by newest first
+    op.create_index('ix_build_data_node_generator_collected',
+                    tables.BuildData.__tablename__, [
+                        'node_name', 'generator',
+                        sa.text('collected_date DESC')
+                    ])
+
+
+def downgrade():
+    op.drop_index(
+        'ix_build_data_node_generator_collected',
+        table_name=tables.BuildData.__tablename__)
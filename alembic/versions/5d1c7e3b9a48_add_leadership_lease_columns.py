@@ -0,0 +1,33 @@
+"""add leadership lease columns for fencing task updates
+
+Revision ID: 5d1c7e3b9a48
+Revises: 0b6e9d4f7a21
+Create Date: 2018-06-04 13:48:20.551907
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5d1c7e3b9a48'
+down_revision = '0b6e9d4f7a21'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+from drydock_provisioner.statemgmt.db import tables
+
+
+def upgrade():
+    # The base revision creates tables from the current schema, so a
+    # new database will already have these columns
+    inspector = sa.inspect(op.get_bind())
+    for t in [tables.ActiveInstance, tables.Tasks]:
+        columns = [c['name'] for c in inspector.get_columns(t.__tablename__)]
+        if 'lease' not in columns:
+            op.add_column(t.__tablename__, sa.Column('lease', sa.BigInteger))
+
+
+def downgrade():
+    op.drop_column(tables.Tasks.__tablename__, 'lease')
+    op.drop_column(tables.ActiveInstance.__tablename__, 'lease')
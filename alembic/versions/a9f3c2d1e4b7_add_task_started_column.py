@@ -0,0 +1,34 @@
+"""add started column to tasks table
+
+Revision ID: a9f3c2d1e4b7
+Revises: 4a5bef3702b
+Create Date: 2018-05-14 10:21:37.118266
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'a9f3c2d1e4b7'
+down_revision = '4a5bef3702b'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+from drydock_provisioner.statemgmt.db import tables
+
+
+def upgrade():
+    # The base revision creates tables from the current schema, so a
+    # new database will already have this column
+    inspector = sa.inspect(op.get_bind())
+    columns = [
+        c['name'] for c in inspector.get_columns(tables.Tasks.__tablename__)
+    ]
+    if 'started' not in columns:
+        op.add_column(tables.Tasks.__tablename__,
+                      sa.Column('started', sa.DateTime))
+
+
+def downgrade():
+    op.drop_column(tables.Tasks.__tablename__, 'started')
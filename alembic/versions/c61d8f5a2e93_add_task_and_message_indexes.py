@@ -0,0 +1,44 @@
+"""add indexes for task and result message queries
+
+Revision ID: c61d8f5a2e93
+Revises: a9f3c2d1e4b7
+Create Date: 2018-05-21 14:02:51.530744
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'c61d8f5a2e93'
+down_revision = 'a9f3c2d1e4b7'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+from drydock_provisioner.objects import fields as hd_fields
+from drydock_provisioner.statemgmt.db import tables
+
+
+def upgrade():
+    # Queued tasks are scanned in creation order, only a handful are
+    # queued at any time so index just those rows
+    op.create_index(
+        'ix_tasks_queued_created',
+        tables.Tasks.__tablename__, ['created'],
+        postgresql_where=sa.text("status = '%s'" %
+                                 hd_fields.TaskStatus.Queued))
+    op.create_index('ix_tasks_parent_task_id', tables.Tasks.__tablename__,
+                    ['parent_task_id'])
+    op.create_index('ix_result_message_task_id_sequence',
+                    tables.ResultMessage.__tablename__,
+                    ['task_id', 'sequence'])
+
+
+def downgrade():
+    op.drop_index(
+        'ix_result_message_task_id_sequence',
+        table_name=tables.ResultMessage.__tablename__)
+    op.drop_index(
+        'ix_tasks_parent_task_id', table_name=tables.Tasks.__tablename__)
+    op.drop_index(
+        'ix_tasks_queued_created', table_name=tables.Tasks.__tablename__)
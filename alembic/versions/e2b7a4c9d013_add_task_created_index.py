@@ -0,0 +1,27 @@
+"""add index for paging through tasks by creation time
+
+Revision ID: e2b7a4c9d013
+Revises: c61d8f5a2e93
+Create Date: 2018-05-24 09:41:12.604315
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7a4c9d013'
+down_revision = 'c61d8f5a2e93'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+
+from drydock_provisioner.statemgmt.db import tables
+
+
+def upgrade():
+    op.create_index('ix_tasks_created_task_id', tables.Tasks.__tablename__,
+                    ['created', 'task_id'])
+
+
+def downgrade():
+    op.drop_index(
+        'ix_tasks_created_task_id', table_name=tables.Tasks.__tablename__)
@@ -0,0 +1,56 @@
+"""store build data payloads compressed and deduplicated
+
+Revision ID: f3a8d2c6b5e1
+Revises: e2b7a4c9d013
+Create Date: 2018-05-29 15:12:08.219540
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d2c6b5e1'
+down_revision = 'e2b7a4c9d013'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql as pg
+
+from drydock_provisioner.statemgmt.db import tables
+
+
+def upgrade():
+    op.create_table(tables.BuildDataContent.__tablename__,
+                    *tables.BuildDataContent.__schema__)
+
+    # The build_data revision creates the table from the current schema, so
+    # a new database will already have this column
+    inspector = sa.inspect(op.get_bind())
+    columns = [
+        c['name']
+        for c in inspector.get_columns(tables.BuildData.__tablename__)
+    ]
+    if 'content_hash' not in columns:
+        op.add_column(tables.BuildData.__tablename__,
+                      sa.Column('content_hash', pg.BYTEA(32)))
+
+    op.create_index('ix_build_data_content_hash',
+                    tables.BuildData.__tablename__, ['content_hash'])
+    op.create_foreign_key(
+        'fk_build_data_content_hash', tables.BuildData.__tablename__,
+        tables.BuildDataContent.__tablename__, ['content_hash'],
+        ['content_hash'])
+
+
+def downgrade():
+    # Payloads are only held compressed in build_data_content, so build
+    # data written since the upgrade is lost
+    op.drop_constraint(
+        'fk_build_data_content_hash',
+        tables.BuildData.__tablename__,
+        type_='foreignkey')
+    op.drop_index(
+        'ix_build_data_content_hash',
+        table_name=tables.BuildData.__tablename__)
+    op.drop_column(tables.BuildData.__tablename__, 'content_hash')
+    op.drop_table(tables.BuildDataContent.__tablename__)
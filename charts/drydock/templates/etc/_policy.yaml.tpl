@@ -48,3 +48,7 @@
 # GET /api/v1.0/health/extended
 #"physical_provisioner:health_data": "role:admin"
 
+# Delete task history and node data beyond the retention limits
+# POST  /api/v1.0/retention
+#"physical_provisioner:run_retention": "role:admin"
+
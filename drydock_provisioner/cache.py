@@ -0,0 +1,297 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process caches shared by Drydock components."""
+
+import collections
+import concurrent.futures
+import logging
+import threading
+import time
+
+_MISSING = object()
+
+
+class LruCache(object):
+    """Thread-safe LRU cache with TTL expiry and single-flight loading.
+
+    Concurrent requests for a key that is not cached share a single call
+    to the loader rather than each computing the value.
+
+    :param max_entries: maximum number of entries held, 0 disables storage
+    :param ttl: seconds an entry is considered fresh, 0 means no expiry
+    :param name: name used when logging cache activity
+    :param max_bytes: optional limit on the total size of the entries
+    :param sizeof: callable returning the size of a value, required with
+                   ``max_bytes``
+    """
+
+    def __init__(self,
+                 max_entries=16,
+                 ttl=0,
+                 name='cache',
+                 max_bytes=0,
+                 sizeof=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self.logger = logging.getLogger('drydock.cache')
+
+        self._entries = collections.OrderedDict()
+        self._inflight = dict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key, loader, cacheable=None):
+        """Return the value cached for ``key``, loading it if needed.
+
+        If the key is not cached and no other thread is loading it, call
+        ``loader`` to compute the value. Other threads requesting the same
+        key while the load is running wait for and share its result.
+        Exceptions raised by ``loader`` are propagated to all waiters and
+        nothing is cached.
+
+        :param key: hashable key for the value
+        :param loader: callable taking no arguments returning the value
+        :param cacheable: optional callable accepting the loaded value and
+                          returning whether it should be stored
+        """
+        leader = False
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits = self.hits + 1
+                return value
+
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self.coalesced = self.coalesced + 1
+            else:
+                self.misses = self.misses + 1
+                pending = concurrent.futures.Future()
+                self._inflight[key] = pending
+                leader = True
+
+        if not leader:
+            return pending.result()
+
+        try:
+            value = loader()
+        except Exception as ex:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(ex)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cacheable is None or cacheable(value):
+                self._store(key, value)
+
+        pending.set_result(value)
+        return value
+
+    def put(self, key, value):
+        """Store ``value`` for ``key`` replacing any cached value.
+
+        :param key: hashable key for the value
+        :param value: the value to cache
+        """
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key=None):
+        """Drop ``key`` from the cache, or all keys if ``key`` is None.
+
+        :param key: the key to remove
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._remove(key)
+
+    def invalidate_matching(self, predicate):
+        """Drop all keys for which ``predicate(key)`` is true.
+
+        :param predicate: callable accepting a key and returning a boolean
+        """
+        with self._lock:
+            for k in [k for k in self._entries if predicate(k)]:
+                self._remove(k)
+
+    def stats(self):
+        """Return a dictionary of cache counters."""
+        with self._lock:
+            return dict(
+                name=self.name,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hits=self.hits,
+                misses=self.misses,
+                coalesced=self.coalesced,
+                evictions=self.evictions)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        """Find a fresh entry for ``key``. Caller must hold the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        expires, value, _ = entry
+        if expires is not None and expires < time.monotonic():
+            self._remove(key)
+            self.evictions = self.evictions + 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key, value):
+        """Store ``value`` evicting old entries. Caller must hold the lock."""
+        if self.max_entries <= 0:
+            return
+
+        size = self.sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            # Caching this value would evict everything else
+            self._remove(key)
+            return
+
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        self._remove(key)
+        self._entries[key] = (expires, value, size)
+        self._bytes = self._bytes + size
+
+        while (len(self._entries) > self.max_entries
+               or (self.max_bytes and self._bytes > self.max_bytes)):
+            old_key = next(iter(self._entries))
+            self._remove(old_key)
+            self.evictions = self.evictions + 1
+            self.logger.debug("Evicted %s from %s." % (str(old_key),
+                                                       self.name))
+
+    def _remove(self, key):
+        """Remove ``key`` if present. Caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes = self._bytes - entry[2]
+
+
+AssetCacheEntry = collections.namedtuple('AssetCacheEntry',
+                                         ['content', 'etag', 'fetched'])
+
+
+class AssetCache(object):
+    """Byte cache of remote documents revalidated by ETag.
+
+    Documents are kept up to ``max_bytes`` in total, least recently used
+    first out. Once an entry is older than ``ttl`` it is revalidated with
+    a conditional request, so unchanged documents are not transferred
+    again. Concurrent fetches and revalidations of a URL are coalesced.
+
+    :param fetcher: callable accepting a URL and an optional ETag returning
+                    a tuple of the content and its ETag, content is None if
+                    the document is unchanged
+    :param max_bytes: maximum total size of the cached documents
+    :param ttl: seconds a document is used without revalidation
+    :param name: name used when logging cache activity
+    :param max_entries: maximum number of documents cached
+    """
+
+    def __init__(self,
+                 fetcher,
+                 max_bytes,
+                 ttl,
+                 name='asset_cache',
+                 max_entries=1024):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.name = name
+
+        self.logger = logging.getLogger('drydock.cache')
+
+        # A size of 0 disables caching but still coalesces fetches
+        self._entries = LruCache(
+            max_entries=max_entries if max_bytes else 0,
+            name=name,
+            max_bytes=max_bytes,
+            sizeof=lambda e: len(e.content))
+        # Used only to coalesce concurrent revalidations
+        self._revalidations = LruCache(max_entries=0, name=name)
+
+        self._lock = threading.Lock()
+        self.revalidated = 0
+        self.unchanged = 0
+
+    def get(self, url):
+        """Return the content of the document at ``url``.
+
+        :param url: URL of the document
+        """
+        entry = self._entries.get(url, lambda: self._fetch(url))
+        if self.ttl and time.monotonic() - entry.fetched > self.ttl:
+            entry = self._revalidations.get(
+                url, lambda: self._revalidate(url, entry))
+        return entry.content
+
+    def invalidate(self, url=None):
+        """Drop ``url`` from the cache, or all URLs if ``url`` is None.
+
+        :param url: the URL to remove
+        """
+        self._entries.invalidate(url)
+
+    def stats(self):
+        """Return a dictionary of cache counters."""
+        stats = self._entries.stats()
+        requests = stats['hits'] + stats['misses'] + stats['coalesced']
+        with self._lock:
+            stats['revalidated'] = self.revalidated
+            stats['unchanged'] = self.unchanged
+        stats['hitRate'] = round(
+            (requests - stats['misses']) / requests, 4) if requests else 0.0
+        return stats
+
+    def _fetch(self, url, etag=None):
+        content, etag = self.fetcher(url, etag)
+        return AssetCacheEntry(content, etag, time.monotonic())
+
+    def _revalidate(self, url, entry):
+        with self._lock:
+            self.revalidated = self.revalidated + 1
+        if entry.etag is None:
+            new_entry = self._fetch(url)
+        else:
+            new_entry = self._fetch(url, etag=entry.etag)
+            if new_entry.content is None:
+                with self._lock:
+                    self.unchanged = self.unchanged + 1
+                new_entry = entry._replace(fetched=new_entry.fetched)
+            else:
+                self.logger.debug("%s changed, replacing in %s." % (url,
+                                                                    self.name))
+        self._entries.put(url, new_entry)
+        return new_entry
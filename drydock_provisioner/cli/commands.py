@@ -22,6 +22,7 @@ from drydock_provisioner.drydock_client.session import KeystoneClient
 from drydock_provisioner.drydock_client.client import DrydockClient
 from .task import commands as task
 from .node import commands as node
+from .retention import commands as retention
 
 
 @click.group()
@@ -118,3 +119,4 @@ def drydock(ctx, debug, url, os_project_domain_name, os_user_domain_name,
 
 drydock.add_command(task.task)
 drydock.add_command(node.node)
+drydock.add_command(retention.retention)
@@ -0,0 +1,39 @@
+# Copyright 2018 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" cli.retention.commands
+    Contains commands related to pruning task history and node data
+"""
+import click
+import json
+
+from drydock_provisioner.cli.retention.actions import RetentionRun
+
+
+@click.group()
+def retention():
+    """ Drydock retention commands
+    """
+
+
+@retention.command(name='run')
+@click.option(
+    '--dry-run',
+    is_flag=True,
+    default=False,
+    help='Only report the number of records that would be deleted.')
+@click.pass_context
+def retention_run(ctx, dry_run=False):
+    """Delete task history and node data beyond the retention limits."""
+    click.echo(
+        json.dumps(RetentionRun(ctx.obj['CLIENT'], dry_run=dry_run).invoke()))
@@ -21,17 +21,25 @@ from drydock_provisioner.cli.const import TaskStatus
 class TaskList(CliAction):  # pylint: disable=too-few-public-methods
     """Action to list tasks."""
 
-    def __init__(self, api_client):
+    def __init__(self, api_client, page_size=100, **filters):
         """Object initializer.
 
         :param DrydockClient api_client: The api client used for invocation.
+        :param integer page_size: Number of tasks to fetch per API request
+        :param filters: Task filters passed to DrydockClient.iter_tasks
         """
         super().__init__(api_client)
+        self.page_size = page_size
+        self.filters = filters
         self.logger.debug('TaskList action initialized')
 
     def invoke(self):
-        """Invoke execution of this action."""
-        return self.api_client.get_tasks()
+        """Invoke execution of this action.
+
+        Returns a generator fetching tasks page by page.
+        """
+        return self.api_client.iter_tasks(
+            page_size=self.page_size, **self.filters)
 
 
 class TaskCreate(CliAction):  # pylint: disable=too-few-public-methods
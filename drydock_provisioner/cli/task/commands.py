@@ -84,10 +84,54 @@ def task_create(ctx,
 
 
 @task.command(name='list')
+@click.option(
+    '--status', '-s', help='Only list tasks with this status', multiple=True)
+@click.option(
+    '--action', '-a', help='Only list tasks for this action', multiple=True)
+@click.option(
+    '--created-after', help='Only list tasks created after this ISO8601 time')
+@click.option(
+    '--created-before',
+    help='Only list tasks created before this ISO8601 time')
+@click.option(
+    '--top-level/--all',
+    help='Only list tasks that are not subtasks',
+    default=False)
+@click.option(
+    '--messages/--no-messages',
+    help='Include task result messages',
+    default=True)
+@click.option(
+    '--page-size',
+    help='Number of tasks requested from Drydock at a time',
+    default=100)
 @click.pass_context
-def task_list(ctx):
+def task_list(ctx,
+              status=None,
+              action=None,
+              created_after=None,
+              created_before=None,
+              top_level=False,
+              messages=True,
+              page_size=100):
     """List tasks."""
-    click.echo(json.dumps(TaskList(ctx.obj['CLIENT']).invoke()))
+    tasks = TaskList(
+        ctx.obj['CLIENT'],
+        page_size=page_size,
+        status=list(status) or None,
+        action=list(action) or None,
+        created_after=created_after,
+        created_before=created_before,
+        top_level=top_level or None,
+        messages=None if messages else False).invoke()
+
+    # Stream the list as tasks are fetched rather than holding all of them
+    click.echo('[', nl=False)
+    for i, t in enumerate(tasks):
+        if i > 0:
+            click.echo(', ', nl=False)
+        click.echo(json.dumps(t), nl=False)
+    click.echo(']')
 
 
 @task.command(name='show')
@@ -62,6 +62,23 @@ class DrydockConfig(object):
             help=
             'How often will an instance attempt to claim leadership, in seconds'
         ),
+        cfg.IntOpt(
+            'leadership_heartbeat_interval',
+            default=10,
+            help=
+            'How often the active instance renews its leadership lease, in seconds'
+        ),
+        cfg.IntOpt(
+            'max_concurrent_tasks',
+            default=4,
+            help=
+            'Maximum number of top-level tasks the orchestrator runs at once'),
+        cfg.IntOpt(
+            'task_list_page_size',
+            default=100,
+            help=
+            'Number of tasks listed per page by the tasks API when no limit is requested'
+        ),
     ]
 
     # Logging options
@@ -91,14 +108,198 @@ class DrydockConfig(object):
         cfg.StrOpt(
             'database_connect_string',
             help='The URI database connect string.'),
+        cfg.BoolOpt(
+            'listen_notifications',
+            default=True,
+            help=
+            'Wake on PostgreSQL NOTIFY events rather than relying only on polling'
+        ),
+        cfg.IntOpt(
+            'pool_size',
+            default=10,
+            help='Number of database connections kept open in the pool'),
+        cfg.IntOpt(
+            'pool_max_overflow',
+            default=20,
+            help=
+            'Number of connections that may be opened beyond pool_size under load'
+        ),
+        cfg.IntOpt(
+            'pool_timeout',
+            default=30,
+            help='Seconds to wait for a free connection before failing'),
+        cfg.IntOpt(
+            'pool_recycle',
+            default=3600,
+            help=
+            'Seconds after which a pooled connection is replaced, -1 disables'
+        ),
+        cfg.BoolOpt(
+            'pool_pre_ping',
+            default=True,
+            help='Test pooled connections for liveness when checked out'),
+        cfg.IntOpt(
+            'statement_timeout',
+            default=0,
+            help=
+            'Seconds a single SQL statement may run before being cancelled, 0 disables'
+        ),
+        cfg.IntOpt(
+            'result_message_flush_size',
+            default=100,
+            help=
+            'Number of buffered task result messages that triggers a write'),
+        cfg.IntOpt(
+            'result_message_flush_interval',
+            default=5,
+            help=
+            'Maximum seconds a task result message is buffered before being written'
+        ),
+        cfg.StrOpt(
+            'build_data_compression',
+            default='zlib',
+            choices=['zlib', 'none'],
+            help='Compression applied to stored node build data'),
     ]
 
     # Options for the boot action framework
     bootactions_options = [
         cfg.StrOpt(
             'report_url',
-            default='http://localhost:9000/api/v1.0/bootactions/')
+            default='http://localhost:9000/api/v1.0/bootactions/'),
+        cfg.IntOpt(
+            'tarball_compression_level',
+            default=6,
+            min=0,
+            max=9,
+            help=
+            'gzip compression level of boot action tarballs, 0 stores the assets uncompressed'
+        ),
+        cfg.IntOpt(
+            'tarball_buffer_size',
+            default=16 * 1024 * 1024,
+            help=
+            'Boot action tarballs with more asset bytes than this are streamed rather than buffered'
+        ),
+        cfg.IntOpt(
+            'tarball_chunk_size',
+            default=64 * 1024,
+            help='Bytes of asset data compressed per streamed chunk'),
     ]
+
+    # Options for in-process caches
+    cache_options = [
+        cfg.IntOpt(
+            'design_cache_size',
+            default=8,
+            help='Number of compiled effective site designs to keep cached'),
+        cfg.IntOpt(
+            'design_cache_ttl',
+            default=300,
+            help=
+            'How long a compiled effective site design remains cached, in seconds'
+        ),
+        cfg.IntOpt(
+            'template_cache_size',
+            default=256,
+            help='Number of compiled boot action asset templates to keep cached'
+        ),
+        cfg.IntOpt(
+            'asset_cache_size',
+            default=64 * 1024 * 1024,
+            help=
+            'Maximum bytes of remote boot action assets to keep cached, 0 disables caching'
+        ),
+        cfg.IntOpt(
+            'asset_cache_ttl',
+            default=60,
+            help=
+            'Seconds a cached boot action asset is used before it is revalidated'
+        ),
+        cfg.IntOpt(
+            'bootaction_cache_size',
+            default=256 * 1024 * 1024,
+            help=
+            'Maximum bytes of rendered boot action tarballs to keep cached, 0 disables caching'
+        ),
+        cfg.IntOpt(
+            'bootaction_cache_ttl',
+            default=4 * 3600,
+            help='How long a rendered boot action tarball remains cached, in seconds'
+        ),
+    ]
+
+    # Options for worker thread pools
+    executor_options = [
+        cfg.IntOpt(
+            'default_workers',
+            default=16,
+            help='Number of worker threads in pools without a specific limit'),
+        cfg.DictOpt(
+            'worker_limits',
+            default={},
+            help=
+            'Number of worker threads for specific pools. Keys are pool names '
+            '(orchestrator, node_actions, subtasks or a driver key) or a '
+            'driver key and action such as maasdriver.deploy_node'),
+        cfg.IntOpt(
+            'max_queue',
+            default=0,
+            help=
+            'Number of work items that may wait for a worker in each pool '
+            'before submitters block, 0 for unbounded'),
+    ]
+
+    # Options for pruning old task history and node data
+    retention_options = [
+        cfg.BoolOpt(
+            'enabled',
+            default=False,
+            help='Periodically delete old records from the active orchestrator'
+        ),
+        cfg.IntOpt(
+            'interval',
+            default=3600,
+            help='How often the retention job runs, in seconds'),
+        cfg.IntOpt(
+            'batch_size',
+            default=1000,
+            help='Number of rows deleted per transaction'),
+        cfg.StrOpt(
+            'archive_dir',
+            help=
+            'Directory for gzipped JSON lines archives of deleted rows, unset to skip archiving'
+        ),
+        cfg.IntOpt(
+            'task_max_age',
+            default=90,
+            help=
+            'Days to keep completed or terminated tasks and their result messages, 0 for no limit'
+        ),
+        cfg.IntOpt(
+            'task_max_count',
+            default=0,
+            help=
+            'Number of completed or terminated tasks to keep, 0 for no limit'),
+        cfg.IntOpt(
+            'build_data_max_age',
+            default=0,
+            help='Days to keep node build data, 0 for no limit'),
+        cfg.IntOpt(
+            'build_data_max_count',
+            default=0,
+            help='Number of node build data records to keep, 0 for no limit'),
+        cfg.IntOpt(
+            'bootaction_status_max_age',
+            default=90,
+            help='Days to keep boot action status records, 0 for no limit'),
+        cfg.IntOpt(
+            'bootaction_status_max_count',
+            default=0,
+            help=
+            'Number of boot action status records to keep, 0 for no limit'),
+    ]
+
     # Enabled plugins
     plugin_options = [
         cfg.StrOpt(
@@ -184,6 +385,11 @@ class DrydockConfig(object):
             DrydockConfig.database_options, group='database')
         self.conf.register_opts(
             DrydockConfig.timeout_options, group='timeouts')
+        self.conf.register_opts(DrydockConfig.cache_options, group='cache')
+        self.conf.register_opts(
+            DrydockConfig.executor_options, group='executor')
+        self.conf.register_opts(
+            DrydockConfig.retention_options, group='retention')
         if enable_keystone:
             self.conf.register_opts(
                 loading.get_auth_plugin_conf_options('password'),
@@ -200,6 +406,9 @@ def list_opts():
         'plugins': DrydockConfig.plugin_options,
         'timeouts': DrydockConfig.timeout_options,
         'database': DrydockConfig.database_options,
+        'cache': DrydockConfig.cache_options,
+        'executor': DrydockConfig.executor_options,
+        'retention': DrydockConfig.retention_options,
     }
 
     package_path = os.path.dirname(os.path.abspath(__file__))
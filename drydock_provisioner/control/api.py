@@ -29,6 +29,7 @@ from .bootaction import BootactionUnitsResource
 from .bootaction import BootactionFilesResource
 from .bootaction import BootactionResource
 from .validation import ValidationResource
+from .retention import RetentionResource
 
 from .base import DrydockRequest, BaseResource
 from .middleware import AuthMiddleware, ContextMiddleware, LoggingMiddleware
@@ -105,6 +106,11 @@ def start_api(state_manager=None, ingester=None, orchestrator=None):
         ('/validatedesign',
          ValidationResource(
              state_manager=state_manager, orchestrator=orchestrator)),
+
+        # API to prune task history and node data
+        ('/retention',
+         RetentionResource(
+             state_manager=state_manager, orchestrator=orchestrator)),
     ]
 
     for path, res in v1_0_routes:
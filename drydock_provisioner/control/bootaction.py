@@ -13,8 +13,6 @@
 # limitations under the License.
 """Handle resources for boot action API endpoints. """
 
-import tarfile
-import io
 import logging
 
 import jsonschema
@@ -25,6 +23,9 @@ import falcon
 from drydock_provisioner.objects.fields import ActionResult
 import drydock_provisioner.objects as objects
 
+from drydock_provisioner.orchestrator.bootaction_bundles import build_tarball
+from drydock_provisioner.orchestrator.bootaction_bundles import stream_tarball
+
 from .base import StatefulResource
 
 logger = logging.getLogger('drydock')
@@ -139,7 +140,9 @@ class BootactionAssetsResource(StatefulResource):
         Get the boot action context for ``hostname`` from the database
         and render all ``unit`` type assets for the host. Validate host
         is providing the correct idenity key in the ``X-Bootaction-Key``
-        header.
+        header. Rendered tarballs are cached and carry an ETag so an
+        unchanged tarball is not sent again. Tarballs too large to buffer
+        are streamed.
 
         :param req: falcon request object
         :param resp: falcon response object
@@ -159,43 +162,28 @@ class BootactionAssetsResource(StatefulResource):
 
         BootactionUtils.check_auth(ba_ctx, req)
 
-        asset_type_filter = None if asset_type == 'all' else asset_type
-
         try:
-            task = self.state_manager.get_task(ba_ctx['task_id'])
-            self.logger.debug("Loading design for task %s from design ref %s" %
-                              (ba_ctx['task_id'], task.design_ref))
-            design_status, site_design = self.orchestrator.get_effective_site(
-                task.design_ref)
-
-            assets = list()
-            ba_status_list = self.state_manager.get_boot_actions_for_node(
-                hostname)
-
-            for ba in site_design.bootactions:
-                if hostname in ba.target_nodes:
-                    ba_status = ba_status_list.get(ba.name, None)
-                    action_id = ba_status.get('action_id')
-                    assets.extend(
-                        ba.render_assets(
-                            hostname,
-                            site_design,
-                            action_id,
-                            task.design_ref,
-                            type_filter=asset_type_filter))
-
-            tarball = BootactionUtils.tarbuilder(asset_list=assets)
-            resp.set_header('Content-Type', 'application/gzip')
-            resp.set_header('Content-Disposition',
-                            "attachment; filename=\"%s-%s.tar.gz\"" %
-                            (hostname, asset_type))
-            resp.data = tarball
-            resp.status = falcon.HTTP_200
-            return
+            bundle = self.orchestrator.bootaction_bundles.get(
+                ba_ctx, asset_type)
         except Exception as ex:
             self.logger.debug("Exception in boot action API.", exc_info=ex)
             raise falcon.HTTPInternalServerError(str(ex))
 
+        resp.set_header('ETag', bundle.etag)
+        if BootactionUtils.etag_matches(bundle.etag, req):
+            resp.status = falcon.HTTP_304
+            return
+
+        resp.set_header('Content-Type', 'application/gzip')
+        resp.set_header('Content-Disposition',
+                        "attachment; filename=\"%s-%s.tar.gz\"" %
+                        (hostname, asset_type))
+        if bundle.data is not None:
+            resp.data = bundle.data
+        else:
+            resp.stream = stream_tarball(asset_list=bundle.assets)
+        resp.status = falcon.HTTP_200
+
 
 class BootactionUnitsResource(BootactionAssetsResource):
     def __init__(self, **kwargs):
@@ -244,29 +232,31 @@ class BootactionUtils(object):
             raise falcon.HTTPForbidden(
                 title='Unauthorized', description='Invalid X-Bootaction-Key')
 
+    @staticmethod
+    def etag_matches(etag, req):
+        """Check whether the request's If-None-Match header matches ``etag``.
+
+        :param etag: the quoted ETag of the current representation
+        :param req: The falcon request object of the API call
+        """
+        if_none_match = req.get_header('If-None-Match')
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == '*' or tag == etag:
+                return True
+        return False
+
     @staticmethod
     def tarbuilder(asset_list=None):
         """Create a tar file from rendered assets.
 
         Add each asset in ``asset_list`` to a tar file with the defined
-        path and permission. The assets need to have the rendered_bytes field
-        populated. Return a tarfile.TarFile.
+        path and permission. Return the bytes of the gzipped tar file.
 
-        :param hostname: the hostname the tar is destined for
-        :param balltype: the type of assets being included
-        :param asset_list: list of objects.BootActionAsset instances
+        :param asset_list: list of objects.bootaction.RenderedAsset instances
         """
-        tarbytes = io.BytesIO()
-        tarball = tarfile.open(
-            mode='w:gz', fileobj=tarbytes, format=tarfile.GNU_FORMAT)
-        asset_list = asset_list or []
-        for a in asset_list:
-            fileobj = io.BytesIO(a.rendered_bytes)
-            tarasset = tarfile.TarInfo(name=a.path)
-            tarasset.size = len(a.rendered_bytes)
-            tarasset.mode = a.permissions if a.permissions else 0o600
-            tarasset.uid = 0
-            tarasset.gid = 0
-            tarball.addfile(tarasset, fileobj=fileobj)
-        tarball.close()
-        return tarbytes.getvalue()
+        return build_tarball(asset_list=asset_list)
@@ -21,6 +21,8 @@ from drydock_provisioner.objects.healthcheck import HealthCheckMessage
 from drydock_provisioner.objects.fields import ActionResult
 import drydock_provisioner.objects.fields as hd_fields
 import drydock_provisioner.policy as policy
+import drydock_provisioner.executor as executor
+import drydock_provisioner.objects.bootaction as bootaction
 
 
 class HealthResource(StatefulResource):
@@ -116,6 +118,18 @@ class HealthCheckCombined(object):
             health_check.add_detail_msg(msg=hcm)
 
         if self.extended:
+            health_check.add_metrics('workerPools', executor.pool_stats())
+            health_check.add_metrics('databasePool',
+                                     self.state_manager.pool_stats())
+            health_check.add_metrics('leadership',
+                                     self.orchestrator.leadership_stats())
+            health_check.add_metrics('templateCache',
+                                     bootaction.template_cache_stats())
+            health_check.add_metrics('assetCache',
+                                     bootaction.asset_cache_stats())
+            health_check.add_metrics(
+                'bootactionCache',
+                self.orchestrator.bootaction_bundles.stats())
             resp.body = json.dumps(health_check.to_dict())
 
         if health_check.is_healthy() and self.extended:
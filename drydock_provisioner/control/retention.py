@@ -0,0 +1,83 @@
+# Copyright 2018 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Handler resources for the retention API."""
+
+import falcon
+import json
+import traceback
+
+from drydock_provisioner import policy
+from drydock_provisioner.control.base import StatefulResource
+
+import drydock_provisioner.error as errors
+
+
+class RetentionResource(StatefulResource):
+    """Trigger a run of the retention job."""
+
+    def __init__(self, orchestrator=None, **kwargs):
+        """Object initializer.
+
+        :param orchestrator: instance of orchestrator.Orchestrator
+        """
+        super().__init__(**kwargs)
+        self.orchestrator = orchestrator
+
+    @policy.ApiEnforcer('physical_provisioner:run_retention')
+    def on_post(self, req, resp):
+        """Start applying the retention limits, or report counts with dry_run.
+
+        Rows are deleted in the background and the request returns 202. It
+        returns 409 if a run started by this instance is still active.
+        """
+        try:
+            json_data = self.req_json(req) or {}
+            dry_run = json_data.get('dry_run', False)
+
+            if not isinstance(dry_run, bool):
+                self.return_error(
+                    resp,
+                    falcon.HTTP_400,
+                    message='The "dry_run" key must be a boolean.',
+                    retry=False)
+                return
+
+            if dry_run:
+                report = self.orchestrator.run_retention(dry_run=True)
+                resp.body = json.dumps(dict(dry_run=True, deleted=report))
+                resp.content_type = 'application/json'
+                resp.status = falcon.HTTP_200
+                return
+
+            if not self.orchestrator.start_retention():
+                self.return_error(
+                    resp,
+                    falcon.HTTP_409,
+                    message="A retention run is already in progress.",
+                    retry=True)
+                return
+
+            resp.body = json.dumps(dict(dry_run=False, started=True))
+            resp.content_type = 'application/json'
+            resp.status = falcon.HTTP_202
+        except errors.InvalidFormat as ex:
+            self.error(req.context, str(ex))
+            self.return_error(
+                resp, falcon.HTTP_400, message=str(ex), retry=False)
+        except Exception as ex:
+            self.error(req.context,
+                       "Unknown error: %s\n%s" % (str(ex),
+                                                  traceback.format_exc()))
+            self.return_error(
+                resp, falcon.HTTP_500, message="Unknown error", retry=False)
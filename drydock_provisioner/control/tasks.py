@@ -14,10 +14,12 @@
 """Handler resources for task management API."""
 
 import falcon
+import iso8601
 import json
 import traceback
 import uuid
 
+from drydock_provisioner import config
 from drydock_provisioner import policy
 from drydock_provisioner import error as errors
 from drydock_provisioner.objects import fields as hd_fields
@@ -38,12 +40,40 @@ class TasksResource(StatefulResource):
 
     @policy.ApiEnforcer('physical_provisioner:read_task')
     def on_get(self, req, resp):
-        """Handler for GET method."""
+        """Handler for GET method.
+
+        Supports the query parameters ``limit`` and ``marker`` for keyset
+        pagination, ``status``, ``action``, ``created_after``,
+        ``created_before``, ``parent_task_id`` and ``top_level`` to filter,
+        ``messages=false`` to omit result messages and ``fields`` to select
+        the returned task fields. Without ``limit`` a page holds
+        [DEFAULT] task_list_page_size tasks. When a page is full the
+        ``X-Next-Marker`` response header holds the marker for the next page.
+        """
         try:
-            task_model_list = self.state_manager.get_tasks()
+            query = self.parse_list_params(req)
+
+            fields = query.pop('fields')
+            if (query['marker'] is not None
+                    and self.state_manager.get_task(
+                        query['marker'], include_messages=False) is None):
+                raise errors.InvalidFormat(
+                    "Unknown marker %s" % str(query['marker']))
+
+            task_model_list = self.state_manager.get_tasks(**query)
             task_list = [x.to_dict() for x in task_model_list]
+            if fields:
+                task_list = [{k: t.get(k)
+                              for k in fields} for t in task_list]
+
+            if query['limit'] and len(task_model_list) == query['limit']:
+                resp.set_header('X-Next-Marker',
+                                str(task_model_list[-1].get_id()))
             resp.body = json.dumps(task_list)
             resp.status = falcon.HTTP_200
+        except errors.InvalidFormat as ex:
+            self.return_error(
+                resp, falcon.HTTP_400, message=str(ex), retry=False)
         except Exception as ex:
             self.error(req.context,
                        "Unknown error: %s\n%s" % (str(ex),
@@ -51,6 +81,64 @@ class TasksResource(StatefulResource):
             self.return_error(
                 resp, falcon.HTTP_500, message="Unknown error", retry=False)
 
+    @staticmethod
+    def parse_list_params(req):
+        """Parse the GET query parameters into DrydockState.get_tasks arguments.
+
+        Raises InvalidFormat for invalid parameter values.
+        """
+
+        def as_list(name):
+            # Split explicitly, newer Falcon does not split on commas
+            value = req.get_param_as_list(name)
+            if not value:
+                return None
+            return [v for p in value for v in p.split(',') if v] or None
+
+        def as_date(name):
+            value = req.get_param(name)
+            if value is None:
+                return None
+            try:
+                d = iso8601.parse_date(value)
+            except iso8601.ParseError:
+                raise errors.InvalidFormat("Invalid timestamp for %s" % name)
+            return d.astimezone(iso8601.UTC).replace(tzinfo=None)
+
+        def as_uuid(name):
+            value = req.get_param(name)
+            if value is None:
+                return None
+            try:
+                return uuid.UUID(value)
+            except ValueError:
+                raise errors.InvalidFormat("Invalid task ID for %s" % name)
+
+        limit = req.get_param('limit')
+        if limit is None:
+            limit = config.config_mgr.conf.task_list_page_size
+        else:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                raise errors.InvalidFormat("limit must be a positive integer")
+
+        include_messages = req.get_param_as_bool('messages')
+
+        return dict(
+            status=as_list('status'),
+            action=as_list('action'),
+            created_after=as_date('created_after'),
+            created_before=as_date('created_before'),
+            parent_task_id=as_uuid('parent_task_id'),
+            top_level=bool(req.get_param_as_bool('top_level')),
+            marker=as_uuid('marker'),
+            limit=limit,
+            include_messages=include_messages is not False,
+            fields=as_list('fields'))
+
     @policy.ApiEnforcer('physical_provisioner:create_task')
     def on_post(self, req, resp):
         """Handler for POST method."""
@@ -344,18 +432,39 @@ class TaskResource(StatefulResource):
             if task is None:
                 return None
 
-            task_dict = task.to_dict()
+            return self.task_to_dict(task, builddata)
+        except Exception as ex:
+            self.error(req.context, "Unknown error: %s" % (str(ex)))
+            self.return_error(
+                resp, falcon.HTTP_500, message="Unknown error", retry=False)
 
-            if builddata:
-                task_bd = self.state_manager.get_build_data(
-                    task_id=task.get_id())
-                task_dict['build_data'] = [bd.to_dict() for bd in task_bd]
+    def get_tasks(self, req, resp, task_ids, builddata):
+        """Load several tasks at once, returning a dict keyed by task ID.
 
-            return task_dict
+        Tasks that do not exist map to None.
+        """
+        try:
+            tasks = self.state_manager.get_tasks(
+                task_ids=[uuid.UUID(i) for i in task_ids])
+            task_dicts = {
+                str(t.get_id()): self.task_to_dict(t, builddata)
+                for t in tasks
+            }
+            return {i: task_dicts.get(i) for i in task_ids}
         except Exception as ex:
             self.error(req.context, "Unknown error: %s" % (str(ex)))
             self.return_error(
                 resp, falcon.HTTP_500, message="Unknown error", retry=False)
+            return {}
+
+    def task_to_dict(self, task, builddata):
+        task_dict = task.to_dict()
+
+        if builddata:
+            task_bd = self.state_manager.get_build_data(task_id=task.get_id())
+            task_dict['build_data'] = [bd.to_dict() for bd in task_bd]
+
+        return task_dict
 
     def handle_layers(self, req, resp, task_id, builddata, subtask_errors, layers, first_task):
         resp_data = {}
@@ -370,9 +479,10 @@ class TaskResource(StatefulResource):
             # Copies the current list (a layer) then clears the queue for the next layer.
             processing_ids = list(queued_ids)
             queued_ids = []
+            layer_tasks = self.get_tasks(req, resp, processing_ids, builddata)
             # The for loop handles each task in a layer.
             for id in processing_ids:
-                task = self.get_task(req, resp, id, builddata)
+                task = layer_tasks.get(id)
                 # Only adds the task if within the layers range.
                 if current_layer < layers or layers == -1:
                     resp_data[id] = task
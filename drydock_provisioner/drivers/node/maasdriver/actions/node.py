@@ -13,7 +13,6 @@
 # limitations under the License.
 """Task driver for completing node provisioning with Canonical MaaS 2.2+."""
 
-import time
 import logging
 import re
 import math
@@ -31,7 +30,6 @@ from drydock_provisioner.orchestrator.actions.orchestrator import BaseAction
 import drydock_provisioner.drivers.node.maasdriver.models.fabric as maas_fabric
 import drydock_provisioner.drivers.node.maasdriver.models.vlan as maas_vlan
 import drydock_provisioner.drivers.node.maasdriver.models.subnet as maas_subnet
-import drydock_provisioner.drivers.node.maasdriver.models.machine as maas_machine
 import drydock_provisioner.drivers.node.maasdriver.models.tag as maas_tag
 import drydock_provisioner.drivers.node.maasdriver.models.sshkey as maas_keys
 import drydock_provisioner.drivers.node.maasdriver.models.boot_resource as maas_boot_res
@@ -39,16 +37,52 @@ import drydock_provisioner.drivers.node.maasdriver.models.rack_controller as maa
 import drydock_provisioner.drivers.node.maasdriver.models.partition as maas_partition
 import drydock_provisioner.drivers.node.maasdriver.models.volumegroup as maas_vg
 
+from drydock_provisioner.drivers.node.maasdriver.inventory import MaasInventory
+from drydock_provisioner.drivers.node.maasdriver.watcher import MachineStatusWatcher
+
 
 class BaseMaasAction(BaseAction):
-    def __init__(self, *args, maas_client=None):
+    def __init__(self,
+                 *args,
+                 maas_client=None,
+                 inventory=None,
+                 status_watcher=None):
         super().__init__(*args)
 
         self.maas_client = maas_client
 
+        # Snapshot of MaaS resources, possibly shared with sibling subtasks
+        if inventory is None:
+            inventory = MaasInventory(maas_client)
+        self.inventory = inventory
+
+        self.status_watcher = status_watcher
+
         self.logger = logging.getLogger(
             config.config_mgr.conf.logging.nodedriver_logger_name)
 
+    def wait_for_status(self, machine, predicate, timeout):
+        """Wait for the status of ``machine`` to satisfy ``predicate``.
+
+        Update ``machine.status_name`` with the last status seen and
+        return it.
+
+        :param machine: instance of models.machine.Machine
+        :param predicate: callable accepting a status name
+        :param timeout: maximum seconds to wait
+        """
+        if self.status_watcher is None:
+            self.status_watcher = MachineStatusWatcher(
+                self.maas_client,
+                config.config_mgr.conf.maasdriver.poll_interval)
+
+        status_name = self.status_watcher.wait_for(machine.resource_id,
+                                                   predicate, timeout)
+        if status_name is not None:
+            machine.status_name = status_name
+
+        return machine.status_name
+
 
 class ValidateNodeServices(BaseMaasAction):
     """Action to validate MaaS is available and ready for use."""
@@ -104,8 +138,8 @@ class ValidateNodeServices(BaseMaasAction):
                                 ctx_type='NA')
                             self.task.failure()
 
-                    rack_ctlrs = maas_rack.RackControllers(self.maas_client)
-                    rack_ctlrs.refresh()
+                    # Service health must be current, not a snapshot
+                    rack_ctlrs = self.inventory.rack_controllers(refresh=True)
 
                     if rack_ctlrs.len() == 0:
                         self.logger.info(
@@ -240,11 +274,10 @@ class CreateNetworkTemplate(BaseMaasAction):
         design_networks = list()
         design_links = site_design.network_links or []
 
-        fabrics = maas_fabric.Fabrics(self.maas_client)
-        fabrics.refresh()
-
-        subnets = maas_subnet.Subnets(self.maas_client)
-        subnets.refresh()
+        # Reads share the inventory snapshot, each write to MaaS invalidates
+        # the collection it changed so later reads see the new state
+        fabrics = self.inventory.fabrics()
+        subnets = self.inventory.subnets()
 
         for l in design_links:
             if l.metalabels is not None:
@@ -292,6 +325,7 @@ class CreateNetworkTemplate(BaseMaasAction):
                 link_fabric = fabrics.select(link_fabric_id)
                 link_fabric.name = l.name
                 link_fabric.update()
+                self.inventory.invalidate(maas_fabric.Fabrics)
             else:
                 link_fabric = fabrics.singleton({'name': l.name})
 
@@ -299,13 +333,12 @@ class CreateNetworkTemplate(BaseMaasAction):
                     link_fabric = maas_fabric.Fabric(
                         self.maas_client, name=l.name)
                     link_fabric = fabrics.add(link_fabric)
+                    self.inventory.invalidate(maas_fabric.Fabrics)
 
             # Ensure that the MTU of the untagged VLAN on the fabric
             # matches that on the NetworkLink config
 
-            vlan_list = maas_vlan.Vlans(
-                self.maas_client, fabric_id=link_fabric.resource_id)
-            vlan_list.refresh()
+            vlan_list = self.inventory.vlans(link_fabric.resource_id)
             msg = "Updating native VLAN MTU = %d on network link %s" % (l.mtu,
                                                                         l.name)
             self.logger.debug(msg)
@@ -315,6 +348,8 @@ class CreateNetworkTemplate(BaseMaasAction):
             if vlan:
                 vlan.mtu = l.mtu
                 vlan.update()
+                self.inventory.invalidate(
+                    maas_vlan.Vlans, fabric_id=link_fabric.resource_id)
             else:
                 self.logger.warning("Unable to find native VLAN on fabric %s."
                                     % link_fabric.resource_id)
@@ -338,14 +373,12 @@ class CreateNetworkTemplate(BaseMaasAction):
                         self.task.add_status_msg(
                             msg=msg, error=False, ctx='NA', ctx_type='NA')
 
-                        fabric_list = maas_fabric.Fabrics(self.maas_client)
-                        fabric_list.refresh()
+                        fabric_list = self.inventory.fabrics()
                         fabric = fabric_list.singleton({'name': l.name})
 
                         if fabric is not None:
-                            vlan_list = maas_vlan.Vlans(
-                                self.maas_client, fabric_id=fabric.resource_id)
-                            vlan_list.refresh()
+                            vlan_list = self.inventory.vlans(
+                                fabric.resource_id)
 
                             vlan = vlan_list.singleton({
                                 'vid':
@@ -359,6 +392,9 @@ class CreateNetworkTemplate(BaseMaasAction):
                                     vlan.mtu = n.mtu
 
                                 vlan.update()
+                                self.inventory.invalidate(
+                                    maas_vlan.Vlans,
+                                    fabric_id=fabric.resource_id)
                                 msg = "VLAN %s found for network %s, updated attributes" % (
                                     vlan.resource_id, n.name)
                                 self.logger.debug(msg)
@@ -376,6 +412,9 @@ class CreateNetworkTemplate(BaseMaasAction):
                                     mtu=getattr(n, 'mtu', None),
                                     fabric_id=fabric.resource_id)
                                 vlan = vlan_list.add(vlan)
+                                self.inventory.invalidate(
+                                    maas_vlan.Vlans,
+                                    fabric_id=fabric.resource_id)
 
                                 msg = "VLAN %s created for network %s" % (
                                     vlan.resource_id, n.name)
@@ -398,6 +437,7 @@ class CreateNetworkTemplate(BaseMaasAction):
 
                             subnet_list = maas_subnet.Subnets(self.maas_client)
                             subnet = subnet_list.add(subnet)
+                            self.inventory.invalidate(maas_subnet.Subnets)
 
                             msg = "Created subnet %s for CIDR %s on VLAN %s" % (
                                 subnet.resource_id, subnet.cidr, subnet.vlan)
@@ -429,9 +469,7 @@ class CreateNetworkTemplate(BaseMaasAction):
                             ctx_type='network')
                         self.logger.info(msg)
 
-                        vlan_list = maas_vlan.Vlans(
-                            self.maas_client, fabric_id=subnet.fabric)
-                        vlan_list.refresh()
+                        vlan_list = self.inventory.vlans(subnet.fabric)
 
                         vlan = vlan_list.select(subnet.vlan)
 
@@ -443,6 +481,8 @@ class CreateNetworkTemplate(BaseMaasAction):
                                 vlan.mtu = n.mtu
 
                             vlan.update()
+                            self.inventory.invalidate(
+                                maas_vlan.Vlans, fabric_id=subnet.fabric)
                             msg = "VLAN %s found for network %s, updated attributes" % (
                                 vlan.resource_id, n.name)
                             self.logger.debug(msg)
@@ -465,6 +505,7 @@ class CreateNetworkTemplate(BaseMaasAction):
                     # Check if the routes have a default route
                     subnet.gateway_ip = n.get_default_gateway()
                     subnet.update()
+                    self.inventory.invalidate(maas_subnet.Subnets)
 
                     dhcp_on = False
 
@@ -483,9 +524,7 @@ class CreateNetworkTemplate(BaseMaasAction):
                                 ctx=n.name,
                                 ctx_type='network')
 
-                    vlan_list = maas_vlan.Vlans(
-                        self.maas_client, fabric_id=subnet.fabric)
-                    vlan_list.refresh()
+                    vlan_list = self.inventory.vlans(subnet.fabric)
                     vlan = vlan_list.select(subnet.vlan)
 
                     if dhcp_on and not vlan.dhcp_on:
@@ -499,9 +538,7 @@ class CreateNetworkTemplate(BaseMaasAction):
                             ctx=n.name,
                             ctx_type='network')
 
-                        rack_ctlrs = maas_rack.RackControllers(
-                            self.maas_client)
-                        rack_ctlrs.refresh()
+                        rack_ctlrs = self.inventory.rack_controllers()
 
                         dhcp_config_set = False
 
@@ -521,6 +558,9 @@ class CreateNetworkTemplate(BaseMaasAction):
                                         ctx=n.name,
                                         ctx_type='network')
                                     vlan.update()
+                                    self.inventory.invalidate(
+                                        maas_vlan.Vlans,
+                                        fabric_id=subnet.fabric)
                                     dhcp_config_set = True
                                     break
                             else:
@@ -542,6 +582,9 @@ class CreateNetworkTemplate(BaseMaasAction):
                                             ctx=n.name,
                                             ctx_type='network')
                                         vlan.update()
+                                        self.inventory.invalidate(
+                                            maas_vlan.Vlans,
+                                            fabric_id=subnet.fabric)
                                         dhcp_config_set = True
                                         break
                             if dhcp_config_set:
@@ -565,8 +608,7 @@ class CreateNetworkTemplate(BaseMaasAction):
                     raise errors.DriverError("Inconsistent data from MaaS")
 
         # Now that all networks should be created, we can setup routes between them
-        subnet_list = maas_subnet.Subnets(self.maas_client)
-        subnet_list.refresh()
+        subnet_list = self.inventory.subnets()
 
         for n in design_networks:
             src_subnet = subnet_list.singleton({'cidr': n.cidr})
@@ -702,8 +744,7 @@ class IdentifyNode(BaseMaasAction):
 
     def start(self):
         try:
-            machine_list = maas_machine.Machines(self.maas_client)
-            machine_list.refresh()
+            machine_list = self.inventory.machines()
         except Exception as ex:
             self.logger.debug("Error accessing the MaaS API.", exc_info=ex)
             self.task.set_status(hd_fields.TaskStatus.Complete)
@@ -772,8 +813,7 @@ class ConfigureHardware(BaseMaasAction):
 
     def start(self):
         try:
-            machine_list = maas_machine.Machines(self.maas_client)
-            machine_list.refresh()
+            machine_list = self.inventory.machines()
         except Exception as ex:
             self.logger.debug("Error accessing the MaaS API.", exc_info=ex)
             self.task.set_status(hd_fields.TaskStatus.Complete)
@@ -821,30 +861,15 @@ class ConfigureHardware(BaseMaasAction):
                             (n.name))
                         machine.commission()
 
-                        # Poll machine status
-                        attempts = 0
-                        max_attempts = config.config_mgr.conf.timeouts.configure_hardware * (
-                            60 // config.config_mgr.conf.maasdriver.
-                            poll_interval)
-
-                        while (attempts < max_attempts and
-                               (machine.status_name != 'Ready' and
-                                not machine.status_name.startswith('Failed'))):
-                            attempts = attempts + 1
-                            time.sleep(
-                                config.config_mgr.conf.maasdriver.poll_interval
-                            )
-                            try:
-                                machine.refresh()
-                                self.logger.debug(
-                                    "Polling node %s status attempt %d of %d: %s"
-                                    % (n.name, attempts, max_attempts,
-                                       machine.status_name))
-                            except Exception:
-                                self.logger.warning(
-                                    "Error updating node %s status during commissioning, will re-attempt."
-                                    % (n.name),
-                                    exc_info=True)
+                        # Wait for commissioning to finish
+                        self.wait_for_status(
+                            machine,
+                            lambda s: s == 'Ready' or s.startswith('Failed'),
+                            config.config_mgr.conf.timeouts.configure_hardware
+                            * 60)
+                        self.logger.debug(
+                            "Node %s status after commissioning: %s" %
+                            (n.name, machine.status_name))
                         if machine.status_name == 'Ready':
                             msg = "Node %s commissioned." % (n.name)
                             self.logger.info(msg)
@@ -899,26 +924,31 @@ class ConfigureHardware(BaseMaasAction):
         try:
             data = machine.get_details()
             if data:
+                collected_date = datetime.utcnow()
+                build_data = []
                 for t, d in data.items():
                     if t in ('lshw', 'lldp'):
                         df = 'text/xml'
                     else:
                         df = 'text/plain'
-                    bd = objects.BuildData(
-                        node_name=machine.hostname,
-                        task_id=self.task.get_id(),
-                        generator=t,
-                        collected_date=datetime.utcnow(),
-                        data_format=df,
-                        data_element=d.decode())
-                    self.logger.debug(
-                        "Saving build data from generator %s" % t)
-                    self.state_manager.post_build_data(bd)
-                    self.task.add_status_msg(
-                        msg="Saving build data element.",
-                        error=False,
-                        ctx=machine.hostname,
-                        ctx_type='node')
+                    build_data.append(
+                        objects.BuildData(
+                            node_name=machine.hostname,
+                            task_id=self.task.get_id(),
+                            generator=t,
+                            collected_date=collected_date,
+                            data_format=df,
+                            data_element=d.decode()))
+                self.logger.debug("Saving build data from generators %s" %
+                                  ', '.join(data.keys()))
+                self.state_manager.post_build_data_list(build_data)
+                self.task.add_status_msg(
+                    msg="Saving %d build data elements." % len(build_data),
+                    error=False,
+                    ctx=machine.hostname,
+                    ctx_type='node')
+                # Compiled designs resolve logical names from build data
+                self.orchestrator.design_cache.invalidate()
         except Exception as ex:
             self.logger.error(
                 "Error collecting node build data for %s" % machine.hostname,
@@ -930,14 +960,9 @@ class ApplyNodeNetworking(BaseMaasAction):
 
     def start(self):
         try:
-            machine_list = maas_machine.Machines(self.maas_client)
-            machine_list.refresh()
+            machine_list = self.inventory.machines()
 
-            fabrics = maas_fabric.Fabrics(self.maas_client)
-            fabrics.refresh()
-
-            subnets = maas_subnet.Subnets(self.maas_client)
-            subnets.refresh()
+            fabrics = self.inventory.fabrics()
         except Exception as ex:
             self.logger.debug("Error accessing the MaaS API.", exc_info=ex)
             self.task.set_status(hd_fields.TaskStatus.Complete)
@@ -1289,11 +1314,9 @@ class ApplyNodePlatform(BaseMaasAction):
 
     def start(self):
         try:
-            machine_list = maas_machine.Machines(self.maas_client)
-            machine_list.refresh()
+            machine_list = self.inventory.machines()
 
-            tag_list = maas_tag.Tags(self.maas_client)
-            tag_list.refresh()
+            tag_list = self.inventory.tags()
         except Exception as ex:
             self.logger.debug("Error accessing the MaaS API.", exc_info=ex)
             self.task.set_status(hd_fields.TaskStatus.Complete)
@@ -1416,7 +1439,7 @@ class ApplyNodePlatform(BaseMaasAction):
                                      (n.name))
 
                     for t in n.tags:
-                        tag_list.refresh()
+                        tag_list = self.inventory.tags()
                         tag = tag_list.select(t)
 
                         if tag is None:
@@ -1424,8 +1447,9 @@ class ApplyNodePlatform(BaseMaasAction):
                                 self.logger.debug("Creating static tag %s" % t)
                                 tag = maas_tag.Tag(self.maas_client, name=t)
                                 tag = tag_list.add(tag)
+                                self.inventory.invalidate(maas_tag.Tags)
                             except errors.DriverError:
-                                tag_list.refresh()
+                                tag_list = self.inventory.tags(refresh=True)
                                 tag = tag_list.select(t)
                                 if tag is not None:
                                     self.logger.debug(
@@ -1481,8 +1505,7 @@ class ApplyNodeStorage(BaseMaasAction):
 
     def start(self):
         try:
-            machine_list = maas_machine.Machines(self.maas_client)
-            machine_list.refresh()
+            machine_list = self.inventory.machines()
         except Exception as ex:
             self.logger.debug("Error accessing the MaaS API.", exc_info=ex)
             self.task.set_status(hd_fields.TaskStatus.Complete)
@@ -1827,8 +1850,7 @@ class DeployNode(BaseMaasAction):
 
     def start(self):
         try:
-            machine_list = maas_machine.Machines(self.maas_client)
-            machine_list.refresh()
+            machine_list = self.inventory.machines()
         except Exception as ex:
             self.logger.debug("Error accessing the MaaS API.", exc_info=ex)
             self.task.set_status(hd_fields.TaskStatus.Complete)
@@ -1918,13 +1940,13 @@ class DeployNode(BaseMaasAction):
                              (n.name))
             try:
                 ba_key = self.orchestrator.create_bootaction_context(
-                    n.name, self.task)
+                    n.name, self.task, site_design=site_design)
 
-                tag_list = maas_tag.Tags(self.maas_client)
-                tag_list.refresh()
+                tag_list = self.inventory.tags()
                 node_id_tags = tag_list.startswith("%s__baid__" % (n.name))
                 for t in node_id_tags:
                     t.delete()
+                    self.inventory.invalidate(maas_tag.Tags)
 
                 if ba_key is not None:
                     msg = "Creating boot action id key tag for node %s" % (
@@ -1934,6 +1956,7 @@ class DeployNode(BaseMaasAction):
                         self.maas_client,
                         name="%s__baid__%s" % (n.name, ba_key.hex()))
                     node_baid_tag = tag_list.add(node_baid_tag)
+                    self.inventory.invalidate(maas_tag.Tags)
                     node_baid_tag.apply_to_node(machine.resource_id)
                     self.task.add_status_msg(
                         msg=msg, error=False, ctx=n.name, ctx_type='node')
@@ -1955,24 +1978,13 @@ class DeployNode(BaseMaasAction):
                 self.task.failure(focus=n.get_id())
                 continue
 
-            attempts = 0
-            max_attempts = config.config_mgr.conf.timeouts.deploy_node * (
-                60 // config.config_mgr.conf.maasdriver.poll_interval)
-
-            while (attempts < max_attempts
-                   and (not machine.status_name.startswith('Deployed')
-                        and not machine.status_name.startswith('Failed'))):
-                attempts = attempts + 1
-                time.sleep(config.config_mgr.conf.maasdriver.poll_interval)
-                try:
-                    machine.refresh()
-                    self.logger.debug(
-                        "Polling node %s status attempt %d of %d: %s" %
-                        (n.name, attempts, max_attempts, machine.status_name))
-                except Exception:
-                    self.logger.warning(
-                        "Error updating node %s status during commissioning, will re-attempt."
-                        % (n.name))
+            # Wait for deployment to finish
+            self.wait_for_status(
+                machine,
+                lambda s: s.startswith('Deployed') or s.startswith('Failed'),
+                config.config_mgr.conf.timeouts.deploy_node * 60)
+            self.logger.debug("Node %s status after deployment: %s" %
+                              (n.name, machine.status_name))
             if machine.status_name.startswith('Deployed'):
                 msg = "Node %s deployed" % (n.name)
                 self.logger.info(msg)
@@ -13,6 +13,7 @@
 """Task driver for completing node provisioning with Canonical MaaS 2.2+."""
 
 import logging
+import threading
 import uuid
 import concurrent.futures
 
@@ -21,10 +22,13 @@ from oslo_config import cfg
 import drydock_provisioner.error as errors
 import drydock_provisioner.objects.fields as hd_fields
 import drydock_provisioner.config as config
+import drydock_provisioner.executor as executor
 
 from drydock_provisioner.drivers.node.driver import NodeDriver
 from drydock_provisioner.drivers.node.maasdriver.api_client import MaasRequestFactory
 from drydock_provisioner.drivers.node.maasdriver.models.boot_resource import BootResources
+from drydock_provisioner.drivers.node.maasdriver.inventory import MaasInventory
+from drydock_provisioner.drivers.node.maasdriver.watcher import MachineStatusWatcher
 
 from .actions.node import ValidateNodeServices
 from .actions.node import CreateStorageTemplate
@@ -52,6 +56,11 @@ class MaasNodeDriver(NodeDriver):
             'poll_interval',
             default=10,
             help='Polling interval for querying MaaS status in seconds'),
+        cfg.IntOpt(
+            'inventory_max_age',
+            default=60,
+            help='Seconds a MaaS inventory snapshot is shared by the '
+            'subtasks of a task before being fetched again'),
     ]
 
     driver_name = 'maasdriver'
@@ -98,6 +107,21 @@ class MaasNodeDriver(NodeDriver):
         self.logger = logging.getLogger(
             cfg.CONF.logging.nodedriver_logger_name)
 
+        self.status_watcher = None
+        self.status_watcher_lock = threading.Lock()
+
+    def get_status_watcher(self):
+        """Return the machine status watcher shared by all tasks."""
+        with self.status_watcher_lock:
+            if self.status_watcher is None:
+                maas_client = MaasRequestFactory(
+                    config.config_mgr.conf.maasdriver.maas_api_url,
+                    config.config_mgr.conf.maasdriver.maas_api_key)
+                self.status_watcher = MachineStatusWatcher(
+                    maas_client,
+                    config.config_mgr.conf.maasdriver.poll_interval)
+            return self.status_watcher
+
     def execute_task(self, task_id):
         # actions that should be threaded for execution
         threaded_actions = [
@@ -147,33 +171,45 @@ class MaasNodeDriver(NodeDriver):
             else:
                 target_nodes = self.orchestrator.get_target_nodes(task)
 
-            with concurrent.futures.ThreadPoolExecutor(max_workers=16) as e:
-                subtask_futures = dict()
-                for n in target_nodes:
-                    maas_client = MaasRequestFactory(
-                        config.config_mgr.conf.maasdriver.maas_api_url,
-                        config.config_mgr.conf.maasdriver.maas_api_key)
-                    nf = self.orchestrator.create_nodefilter_from_nodelist([n])
-                    subtask = self.orchestrator.create_task(
-                        design_ref=task.design_ref,
-                        action=task.action,
-                        node_filter=nf,
-                        retry=task.retry)
-                    task.register_subtask(subtask)
-
-                    action = self.action_class_map.get(task.action, None)(
-                        subtask,
-                        self.orchestrator,
-                        self.state_manager,
-                        maas_client=maas_client)
-                    subtask_futures[subtask.get_id().bytes] = e.submit(
-                        action.start)
-
-                timeout = action_timeouts.get(
-                    task.action,
-                    config.config_mgr.conf.timeouts.drydock_timeout)
-                finished, running = concurrent.futures.wait(
-                    subtask_futures.values(), timeout=(timeout * 60))
+            # Snapshot of MaaS inventory shared by all the subtasks
+            inventory = MaasInventory(
+                MaasRequestFactory(
+                    config.config_mgr.conf.maasdriver.maas_api_url,
+                    config.config_mgr.conf.maasdriver.maas_api_key),
+                max_age=config.config_mgr.conf.maasdriver.inventory_max_age)
+
+            pool = executor.get_pool(self.driver_key, task.action)
+            subtask_futures = dict()
+            for n in target_nodes:
+                maas_client = MaasRequestFactory(
+                    config.config_mgr.conf.maasdriver.maas_api_url,
+                    config.config_mgr.conf.maasdriver.maas_api_key)
+                nf = self.orchestrator.create_nodefilter_from_nodelist([n])
+                subtask = self.orchestrator.create_task(
+                    design_ref=task.design_ref,
+                    action=task.action,
+                    node_filter=nf,
+                    retry=task.retry)
+                task.register_subtask(subtask)
+
+                action = self.action_class_map.get(task.action, None)(
+                    subtask,
+                    self.orchestrator,
+                    self.state_manager,
+                    maas_client=maas_client,
+                    inventory=inventory,
+                    status_watcher=self.get_status_watcher())
+                subtask_futures[subtask.get_id().bytes] = pool.submit(
+                    action.start)
+
+            timeout = action_timeouts.get(
+                task.action,
+                config.config_mgr.conf.timeouts.drydock_timeout)
+            finished, running = concurrent.futures.wait(
+                subtask_futures.values(), timeout=(timeout * 60))
+
+            self.logger.debug("MaaS inventory snapshot usage for task %s: %s" %
+                              (str(task.get_id()), str(inventory.stats())))
 
             for t, f in subtask_futures.items():
                 if not f.done():
@@ -201,7 +237,8 @@ class MaasNodeDriver(NodeDriver):
                     task,
                     self.orchestrator,
                     self.state_manager,
-                    maas_client=maas_client)
+                    maas_client=maas_client,
+                    status_watcher=self.get_status_watcher())
                 action.start()
             except Exception as e:
                 msg = (
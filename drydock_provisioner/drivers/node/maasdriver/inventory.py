@@ -0,0 +1,106 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Snapshot of MaaS inventory shared by the subtasks of a driver task."""
+
+import drydock_provisioner.drivers.node.maasdriver.models.fabric as maas_fabric
+import drydock_provisioner.drivers.node.maasdriver.models.vlan as maas_vlan
+import drydock_provisioner.drivers.node.maasdriver.models.subnet as maas_subnet
+import drydock_provisioner.drivers.node.maasdriver.models.machine as maas_machine
+import drydock_provisioner.drivers.node.maasdriver.models.tag as maas_tag
+import drydock_provisioner.drivers.node.maasdriver.models.rack_controller as maas_rack
+
+from drydock_provisioner.cache import LruCache
+
+
+class MaasInventory(object):
+    """Time bounded snapshot of MaaS resource collections.
+
+    Each collection is fetched from MaaS once and shared by all callers
+    until it is older than ``max_age`` or is invalidated. Concurrent
+    requests for a collection that is not loaded share a single fetch.
+    A refresh builds a new collection instance, so callers holding an
+    older snapshot are not affected.
+
+    :param api_client: Instance of api_client.MaasRequestFactory
+    :param max_age: Seconds a snapshot may be reused, None for no limit
+                    and 0 to fetch on every request
+    """
+
+    def __init__(self, api_client, max_age=None):
+        self.api_client = api_client
+
+        if max_age is not None and max_age <= 0:
+            self.snapshots = LruCache(max_entries=0, name='maas_inventory')
+        else:
+            self.snapshots = LruCache(
+                max_entries=64, ttl=max_age or 0, name='maas_inventory')
+
+    def get(self, collection_class, refresh=False, **kwargs):
+        """Return a refreshed instance of ``collection_class``.
+
+        :param collection_class: A ResourceCollectionBase subclass
+        :param refresh: Whether to discard any existing snapshot first
+        :param kwargs: Arguments to the collection constructor
+        """
+        if refresh:
+            self.invalidate(collection_class, **kwargs)
+
+        def loader():
+            collection = collection_class(self.api_client, **kwargs)
+            collection.refresh()
+            return collection
+
+        return self.snapshots.get(
+            self._key(collection_class, **kwargs), loader)
+
+    def invalidate(self, collection_class=None, **kwargs):
+        """Discard snapshots after a write to MaaS.
+
+        :param collection_class: Collection to discard, or all if None
+        :param kwargs: Arguments the collection was requested with. If
+                       omitted, all snapshots of the class are discarded.
+        """
+        if collection_class is None:
+            self.snapshots.invalidate()
+        elif kwargs:
+            self.snapshots.invalidate(self._key(collection_class, **kwargs))
+        else:
+            self.snapshots.invalidate_matching(
+                lambda k: k[0] == collection_class.__name__)
+
+    def machines(self, refresh=False):
+        return self.get(maas_machine.Machines, refresh=refresh)
+
+    def fabrics(self, refresh=False):
+        return self.get(maas_fabric.Fabrics, refresh=refresh)
+
+    def vlans(self, fabric_id, refresh=False):
+        return self.get(maas_vlan.Vlans, refresh=refresh, fabric_id=fabric_id)
+
+    def subnets(self, refresh=False):
+        return self.get(maas_subnet.Subnets, refresh=refresh)
+
+    def tags(self, refresh=False):
+        return self.get(maas_tag.Tags, refresh=refresh)
+
+    def rack_controllers(self, refresh=False):
+        return self.get(maas_rack.RackControllers, refresh=refresh)
+
+    def stats(self):
+        """Return a dictionary of snapshot cache counters."""
+        return self.snapshots.stats()
+
+    @staticmethod
+    def _key(collection_class, **kwargs):
+        return (collection_class.__name__, tuple(sorted(kwargs.items())))
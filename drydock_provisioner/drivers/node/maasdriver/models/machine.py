@@ -34,7 +34,6 @@ class Machine(model_base.ResourceBase):
         'power_type',
         'power_state',
         'power_parameters',
-        'interfaces',
         'boot_interface',
         'memory',
         'cpu_count',
@@ -43,37 +42,90 @@ class Machine(model_base.ResourceBase):
         'boot_mac',
         'boot_ip',
         'owner_data',
-        'block_devices',
-        'volume_groups',
     ]
     json_fields = ['hostname', 'power_type']
 
-    def __init__(self, api_client, **kwargs):
+    def __init__(self, api_client, prefetch=False, **kwargs):
+        """Create a machine model.
+
+        The interfaces, block_devices and volume_groups collections are
+        loaded from MaaS on first access unless ``prefetch`` is True.
+
+        :param api_client: Instance of api_client.MaasRequestFactory
+        :param prefetch: Whether to load the sub-collections immediately
+        """
         super(Machine, self).__init__(api_client, **kwargs)
 
-        # Replace generic dicts with interface collection model
-        if hasattr(self, 'resource_id'):
-            self.interfaces = maas_interface.Interfaces(
-                api_client, system_id=self.resource_id)
-            self.interfaces.refresh()
+        self._interfaces = None
+        self._block_devices = None
+        self._volume_groups = None
+
+        if prefetch:
+            self.prefetch()
+
+    @property
+    def interfaces(self):
+        """Collection of this machine's network interfaces."""
+        if self._interfaces is None and hasattr(self, 'resource_id'):
+            self._interfaces = maas_interface.Interfaces(
+                self.api_client, system_id=self.resource_id)
+            self._interfaces.refresh()
+        return self._interfaces
+
+    @interfaces.setter
+    def interfaces(self, value):
+        self._interfaces = value
+
+    @property
+    def block_devices(self):
+        """Collection of this machine's block devices."""
+        if self._block_devices is None and hasattr(self, 'resource_id'):
+            self._block_devices = maas_blockdev.BlockDevices(
+                self.api_client, system_id=self.resource_id)
             try:
-                self.block_devices = maas_blockdev.BlockDevices(
-                    api_client, system_id=self.resource_id)
-                self.block_devices.refresh()
+                self._block_devices.refresh()
             except Exception:
                 self.logger.warning("Failed loading node %s block devices." %
                                     (self.resource_id))
+        return self._block_devices
+
+    @block_devices.setter
+    def block_devices(self, value):
+        self._block_devices = value
+
+    @property
+    def volume_groups(self):
+        """Collection of this machine's volume groups."""
+        if self._volume_groups is None and hasattr(self, 'resource_id'):
+            self._volume_groups = maas_vg.VolumeGroups(
+                self.api_client, system_id=self.resource_id)
             try:
-                self.volume_groups = maas_vg.VolumeGroups(
-                    api_client, system_id=self.resource_id)
-                self.volume_groups.refresh()
+                self._volume_groups.refresh()
             except Exception:
                 self.logger.warning("Failed load node %s volume groups." %
                                     (self.resource_id))
-        else:
-            self.interfaces = None
-            self.block_devices = None
-            self.volume_groups = None
+        return self._volume_groups
+
+    @volume_groups.setter
+    def volume_groups(self, value):
+        self._volume_groups = value
+
+    def prefetch(self):
+        """Load the interface, block device and volume group collections."""
+        self.interfaces
+        self.block_devices
+        self.volume_groups
+
+    def refresh(self):
+        """Update machine attributes from MaaS.
+
+        Loaded sub-collections are discarded and reloaded on next access.
+        """
+        super(Machine, self).refresh()
+
+        self._interfaces = None
+        self._block_devices = None
+        self._volume_groups = None
 
     def interface_for_ip(self, ip_address):
         """Find the machine interface that will respond to ip_address.
@@ -369,13 +421,66 @@ class Machines(model_base.ResourceCollectionBase):
     collection_url = 'machines/'
     collection_resource = Machine
 
-    def __init__(self, api_client, **kwargs):
+    # Machine attributes indexed for constant time queries
+    indexed_fields = [
+        'resource_id', 'hostname', 'boot_mac', 'power_params.power_address'
+    ]
+
+    def __init__(self, api_client, prefetch=False, **kwargs):
+        """Create a collection of machines.
+
+        :param api_client: Instance of api_client.MaasRequestFactory
+        :param prefetch: Whether to load each machine's interfaces, block
+                         devices and volume groups when the collection is
+                         refreshed rather than on first access
+        """
         super(Machines, self).__init__(api_client)
+        self.prefetch = prefetch
+        self.power_params_loaded = False
+        self._index = None
+
+    def refresh(self):
+        """Initialize or refresh the collection list from MaaS."""
+        super(Machines, self).refresh()
+
+        self.power_params_loaded = False
+        self._index = None
+
+        if self.prefetch:
+            for m in self.resources.values():
+                m.prefetch()
+
+    def append(self, res):
+        """Append a resource instance to the list locally only."""
+        super(Machines, self).append(res)
+        self._index = None
 
-    # Add the OOB power parameters to each machine instance
     def collect_power_params(self):
-        for k, v in self.resources.items():
-            v.get_power_params()
+        """Add the OOB power parameters to each machine instance.
+
+        All machines are loaded in a single request. If MaaS does not
+        support the bulk operation, fall back to a request per machine.
+        """
+        url = self.interpolate_url()
+
+        try:
+            resp = self.api_client.get(url, op='power_parameters')
+            power_params = resp.json() if resp.status_code == 200 else None
+        except errors.DriverError as ex:
+            self.logger.debug("Bulk power parameter query failed: %s" %
+                              str(ex))
+            power_params = None
+
+        if power_params is not None:
+            for k, v in self.resources.items():
+                v.power_parameters = power_params.get(k, None)
+        else:
+            self.logger.debug("Querying power parameters for each machine.")
+            for k, v in self.resources.items():
+                v.get_power_params()
+
+        self.power_params_loaded = True
+        self._index = None
 
     def acquire_node(self, node_name):
         """Acquire a commissioned node fro deployment.
@@ -433,7 +538,8 @@ class Machines(model_base.ResourceCollectionBase):
                 raise ValueError('Node model missing OOB IP address')
 
             try:
-                self.collect_power_params()
+                if not self.power_params_loaded:
+                    self.collect_power_params()
 
                 maas_node = self.singleton({
                     'power_params.power_address':
@@ -462,29 +568,61 @@ class Machines(model_base.ResourceCollectionBase):
         if maas_node.hostname != node_model.name and update_name:
             maas_node.hostname = node_model.name
             maas_node.update()
+            self._index = None
             self.logger.debug("Updated MaaS resource %s hostname to %s" %
                               (maas_node.resource_id, node_model.name))
 
         return maas_node
 
     def query(self, query):
-        """Custom query method to deal with complex fields."""
-        result = list(self.resources.values())
+        """Custom query method to deal with complex fields.
+
+        Query terms on indexed fields are resolved using the index
+        rather than scanning the collection.
+        """
+        index = self._index
+        if index is None:
+            index = self._build_index()
+
+        indexed = [k for k in query.keys() if k in index]
+
+        if indexed:
+            k = indexed[0]
+            result = list(index[k].get(str(query[k]), []))
+        else:
+            result = list(self.resources.values())
+
         for (k, v) in query.items():
-            if k.startswith('power_params.'):
-                field = k[13:]
-                result = [
-                    i for i in result if str(
-                        getattr(i, 'power_parameters', {}).get(field, None)) ==
-                    str(v)
-                ]
-            else:
-                result = [
-                    i for i in result if str(getattr(i, k, None)) == str(v)
-                ]
+            result = [
+                i for i in result if str(self._field_value(i, k)) == str(v)
+            ]
 
         return result
 
+    def _build_index(self):
+        """Build the lookup index for ``indexed_fields``."""
+        index = {k: {} for k in self.indexed_fields}
+
+        for res in self.resources.values():
+            for k in self.indexed_fields:
+                v = str(self._field_value(res, k))
+                index[k].setdefault(v, []).append(res)
+
+        self._index = index
+        return index
+
+    @staticmethod
+    def _field_value(res, field):
+        """Return the value of ``field`` on the machine ``res``.
+
+        :param res: instance of Machine
+        :param field: attribute name or 'power_params.' prefixed parameter
+        """
+        if field.startswith('power_params.'):
+            power_params = getattr(res, 'power_parameters', None) or {}
+            return power_params.get(field[13:], None)
+        return getattr(res, field, None)
+
     def add(self, res):
         """Create a new resource in this collection in MaaS.
 
@@ -30,7 +30,6 @@ class RackController(maas_machine.Machine):
         'power_type',
         'power_state',
         'power_parameters',
-        'interfaces',
         'boot_interface',
         'memory',
         'cpu_count',
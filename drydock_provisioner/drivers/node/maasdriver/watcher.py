@@ -0,0 +1,132 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Background watcher for MaaS machine status transitions."""
+
+import logging
+import threading
+import time
+
+
+class MachineStatusWatch(object):
+    """A request to be notified of a machine status.
+
+    :param system_id: MaaS system_id of the machine
+    :param predicate: callable accepting a status name and returning True
+                      when the wait is complete
+    """
+
+    def __init__(self, system_id, predicate):
+        self.system_id = system_id
+        self.predicate = predicate
+        self.status_name = None
+        self.complete = threading.Event()
+
+    def update(self, status_name):
+        self.status_name = status_name
+        if self.predicate(status_name):
+            self.complete.set()
+
+
+class MachineStatusWatcher(object):
+    """Poll MaaS for the status of watched machines in bulk.
+
+    A single background thread queries the status of all machines being
+    waited on with one request per poll interval and wakes the waiting
+    callers once their machine reaches the desired status. The thread
+    exits when nothing is being watched.
+
+    :param api_client: Instance of api_client.MaasRequestFactory
+    :param poll_interval: Seconds between status queries
+    """
+
+    def __init__(self, api_client, poll_interval):
+        self.api_client = api_client
+        self.poll_interval = poll_interval
+
+        self.logger = logging.getLogger('drydock.nodedriver.maasdriver')
+
+        self.watches = dict()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def wait_for(self, system_id, predicate, timeout):
+        """Wait until a machine status satisfies ``predicate``.
+
+        Return the last status name seen for the machine, which may not
+        satisfy ``predicate`` if ``timeout`` expired, or None if the
+        status was never successfully queried.
+
+        :param system_id: MaaS system_id of the machine
+        :param predicate: callable accepting a status name
+        :param timeout: maximum seconds to wait
+        """
+        watch = MachineStatusWatch(system_id, predicate)
+
+        with self.lock:
+            self.watches.setdefault(system_id, []).append(watch)
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self._run, name='maas-status-watcher', daemon=True)
+                self.thread.start()
+
+        try:
+            watch.complete.wait(timeout)
+        finally:
+            with self.lock:
+                watches = self.watches.get(system_id, [])
+                if watch in watches:
+                    watches.remove(watch)
+                if not watches:
+                    self.watches.pop(system_id, None)
+
+        return watch.status_name
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+
+            with self.lock:
+                if not self.watches:
+                    self.thread = None
+                    return
+                system_ids = list(self.watches.keys())
+
+            try:
+                statuses = self.query_status(system_ids)
+            except Exception as ex:
+                self.logger.warning(
+                    "Error polling MaaS machine status, will re-attempt: %s" %
+                    str(ex))
+                continue
+
+            with self.lock:
+                for system_id, status_name in statuses.items():
+                    if status_name is None:
+                        continue
+                    for watch in self.watches.get(system_id, []):
+                        watch.update(status_name)
+
+    def query_status(self, system_ids):
+        """Return a dict of system_id to status name.
+
+        :param system_ids: list of MaaS system_ids to query
+        """
+        resp = self.api_client.get('machines/', params={'id': system_ids})
+
+        statuses = dict()
+        for m in resp.json():
+            statuses[m.get('system_id')] = m.get('status_name')
+
+        self.logger.debug("Polled status of %d machines." % len(statuses))
+        return statuses
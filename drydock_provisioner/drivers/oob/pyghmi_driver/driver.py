@@ -24,6 +24,7 @@ from oslo_config import cfg
 
 import drydock_provisioner.error as errors
 import drydock_provisioner.config as config
+import drydock_provisioner.executor as executor
 
 import drydock_provisioner.objects.fields as hd_fields
 
@@ -95,53 +96,52 @@ class PyghmiDriver(oob_driver.OobDriver):
 
         target_nodes = self.orchestrator.get_target_nodes(task)
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as e:
-            subtask_futures = dict()
-            for n in target_nodes:
-                sub_nf = self.orchestrator.create_nodefilter_from_nodelist([n])
-                subtask = self.orchestrator.create_task(
-                    action=task.action,
-                    design_ref=task.design_ref,
-                    node_filter=sub_nf)
-                task.register_subtask(subtask)
-                self.logger.debug(
-                    "Starting Pyghmi subtask %s for action %s on node %s" %
-                    (str(subtask.get_id()), task.action, n.name))
-
-                action_class = self.action_class_map.get(task.action, None)
-                if action_class is None:
+        pool = executor.get_pool(self.driver_key, task.action)
+        subtask_futures = dict()
+        for n in target_nodes:
+            sub_nf = self.orchestrator.create_nodefilter_from_nodelist([n])
+            subtask = self.orchestrator.create_task(
+                action=task.action,
+                design_ref=task.design_ref,
+                node_filter=sub_nf)
+            task.register_subtask(subtask)
+            self.logger.debug(
+                "Starting Pyghmi subtask %s for action %s on node %s" %
+                (str(subtask.get_id()), task.action, n.name))
+
+            action_class = self.action_class_map.get(task.action, None)
+            if action_class is None:
+                self.logger.error(
+                    "Could not find action resource for action %s" %
+                    task.action)
+                self.task.failure()
+                break
+            action = action_class(subtask, self.orchestrator,
+                                  self.state_manager)
+            subtask_futures[subtask.get_id().bytes] = pool.submit(action.start)
+
+        timeout = config.config_mgr.conf.timeouts.drydock_timeout
+        finished, running = concurrent.futures.wait(
+            subtask_futures.values(), timeout=(timeout * 60))
+
+        for t, f in subtask_futures.items():
+            if not f.done():
+                task.add_status_msg(
+                    "Subtask %s timed out before completing.",
+                    error=True,
+                    ctx=str(uuid.UUID(bytes=t)),
+                    ctx_type='task')
+                task.failure()
+            else:
+                if f.exception():
                     self.logger.error(
-                        "Could not find action resource for action %s" %
-                        task.action)
-                    self.task.failure()
-                    break
-                action = action_class(subtask, self.orchestrator,
-                                      self.state_manager)
-                subtask_futures[subtask.get_id().bytes] = e.submit(
-                    action.start)
-
-            timeout = config.config_mgr.conf.timeouts.drydock_timeout
-            finished, running = concurrent.futures.wait(
-                subtask_futures.values(), timeout=(timeout * 60))
-
-            for t, f in subtask_futures.items():
-                if not f.done():
-                    task.add_status_msg(
-                        "Subtask %s timed out before completing.",
-                        error=True,
-                        ctx=str(uuid.UUID(bytes=t)),
-                        ctx_type='task')
-                    task.failure()
-                else:
-                    if f.exception():
-                        self.logger.error(
-                            "Uncaught exception in subtask %s" % str(
-                                uuid.UUID(bytes=t)),
-                            exc_info=f.exception())
-            task.align_result()
-            task.bubble_results()
-            task.set_status(hd_fields.TaskStatus.Complete)
-            task.save()
+                        "Uncaught exception in subtask %s" % str(
+                            uuid.UUID(bytes=t)),
+                        exc_info=f.exception())
+        task.align_result()
+        task.bubble_results()
+        task.set_status(hd_fields.TaskStatus.Complete)
+        task.save()
 
         return
 
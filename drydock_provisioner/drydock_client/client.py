@@ -57,20 +57,52 @@ class DrydockClient(object):
 
         return resp.json()
 
-    def get_tasks(self):
+    def get_tasks(self, **filters):
         """
         Get a list of all the tasks, completed or running.
 
-        :return: List of string uuid task IDs
+        Accepts the same filters as iter_tasks.
+
+        :return: List of task dicts
         """
+        return list(self.iter_tasks(**filters))
 
+    def iter_tasks(self, page_size=100, **filters):
+        """
+        Iterate over tasks, fetching them from Drydock one page at a time.
+
+        :param int page_size: Number of tasks to request per page
+        :param filters: Query filters for the tasks API, e.g. status, action,
+                        created_after, created_before, parent_task_id,
+                        top_level, messages or fields. List values are sent
+                        comma separated.
+        :return: Generator of task dicts
+        """
         endpoint = "v1.0/tasks"
 
-        resp = self.session.get(endpoint)
+        query = dict()
+        for k, v in filters.items():
+            if v is None:
+                continue
+            if isinstance(v, (list, tuple)):
+                v = ','.join(v)
+            elif isinstance(v, bool):
+                v = str(v).lower()
+            query[k] = v
+        query['limit'] = page_size
 
-        self._check_response(resp)
+        while True:
+            resp = self.session.get(endpoint, query=query)
 
-        return resp.json()
+            self._check_response(resp)
+
+            for t in resp.json():
+                yield t
+
+            marker = resp.headers.get('X-Next-Marker')
+            if not marker:
+                break
+            query['marker'] = marker
 
     def get_task(self, task_id, builddata=None, subtaskerrors=None, layers=None):
         """
@@ -147,6 +179,22 @@ class DrydockClient(object):
 
         return resp.json()
 
+    def run_retention(self, dry_run=False):
+        """Delete task history and node data beyond the retention limits.
+
+        :param bool dry_run: Only count the records that would be deleted
+        :return: A dict with the number of records deleted per table
+        """
+        endpoint = 'v1.0/retention'
+        body = {
+            'dry_run': dry_run
+        }
+        resp = self.session.post(endpoint, data=body)
+
+        self._check_response(resp)
+
+        return resp.json()
+
     def _check_response(self, resp):
         if resp.status_code == 401:
             raise errors.ClientUnauthorizedError(
@@ -102,6 +102,10 @@ class TaskNotFoundError(StateError):
     pass
 
 
+class RetentionInProgress(StateError):
+    pass
+
+
 class OrchestratorError(Exception):
     """
     **Message:** *Could find task <task_id>*.
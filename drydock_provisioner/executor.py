@@ -0,0 +1,137 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Named worker thread pools shared across Drydock components.
+
+Each layer of work (orchestrator tasks, per-node actions, driver subtasks)
+submits to its own named pool so nested work never waits on a worker in
+the pool it is running in. Pool sizes are set in the [executor] config
+group, optionally per driver action.
+"""
+
+import concurrent.futures
+import logging
+import threading
+
+import drydock_provisioner.config as config
+
+
+class WorkerPool(object):
+    """A thread pool with an optionally bounded work queue.
+
+    When the queue is bounded, ``submit`` blocks the caller until a slot
+    is available rather than queueing unlimited work.
+
+    :param name: name of the pool
+    :param max_workers: number of worker threads
+    :param max_queue: work items that may wait for a worker, 0 for unbounded
+    """
+
+    def __init__(self, name, max_workers, max_queue=0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers)
+
+        if max_queue > 0:
+            self.slots = threading.BoundedSemaphore(max_workers + max_queue)
+        else:
+            self.slots = None
+
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule ``fn(*args, **kwargs)`` and return a Future."""
+        if self.slots is not None:
+            self.slots.acquire()
+
+        with self.lock:
+            self.queued = self.queued + 1
+
+        def run():
+            with self.lock:
+                self.queued = self.queued - 1
+                self.active = self.active + 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.active = self.active - 1
+                    self.completed = self.completed + 1
+                if self.slots is not None:
+                    self.slots.release()
+
+        try:
+            return self.executor.submit(run)
+        except Exception:
+            with self.lock:
+                self.queued = self.queued - 1
+            if self.slots is not None:
+                self.slots.release()
+            raise
+
+    def stats(self):
+        """Return a dictionary of pool gauges."""
+        with self.lock:
+            return dict(
+                max_workers=self.max_workers,
+                max_queue=self.max_queue,
+                queued=self.queued,
+                active=self.active,
+                completed=self.completed)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+_pools = dict()
+_pools_lock = threading.Lock()
+
+
+def get_pool(name, action=None):
+    """Return the shared worker pool for ``name``.
+
+    If ``action`` is specified and a limit is configured for
+    ``name.action``, a pool dedicated to that action is returned.
+
+    :param name: pool name, e.g. 'subtasks' or a driver key
+    :param action: optional action name, e.g. 'deploy_node'
+    """
+    conf = config.config_mgr.conf.executor
+    limits = conf.worker_limits or {}
+
+    if action is not None and "%s.%s" % (name, action) in limits:
+        name = "%s.%s" % (name, action)
+
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            max_workers = int(limits.get(name, conf.default_workers))
+            pool = WorkerPool(name, max_workers, max_queue=conf.max_queue)
+            _pools[name] = pool
+            logging.getLogger('drydock.executor').debug(
+                "Created worker pool %s with %d workers." %
+                (name, max_workers))
+        return pool
+
+
+def pool_stats():
+    """Return a dictionary of pool name to pool gauges."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {p.name: p.stats() for p in pools}
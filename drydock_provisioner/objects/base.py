@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import copy
 import datetime
 
 from oslo_versionedobjects import base
@@ -46,6 +47,24 @@ class DrydockObject(base.VersionedObject):
         else:
             raise ValueError("Unknown field %s" % (attrname))
 
+    def __deepcopy__(self, memo):
+        """Deep copy fields along with any plain instance attributes.
+
+        The OVO implementation only copies declared fields and requires
+        a no-argument constructor, which loses runtime state such as a
+        node's resolved logical names.
+        """
+        nobj = self.__class__.__new__(self.__class__)
+        memo[id(self)] = nobj
+
+        for k, v in self.__dict__.items():
+            if k in ('_context', 'logger'):
+                setattr(nobj, k, v)
+            else:
+                setattr(nobj, k, copy.deepcopy(v, memo))
+
+        return nobj
+
     def obj_to_simple(self):
         """
         Create a simple primitive representation of this object excluding
@@ -13,7 +13,11 @@
 # limitations under the License.
 """Object models for BootActions."""
 import base64
-from jinja2 import Template
+import collections
+import hashlib
+import threading
+
+import jinja2
 import ulid2
 
 import oslo_versionedobjects.fields as ovo_fields
@@ -24,8 +28,76 @@ import drydock_provisioner.objects.fields as hd_fields
 import drydock_provisioner.config as config
 import drydock_provisioner.error as errors
 
+from drydock_provisioner.cache import AssetCache
+from drydock_provisioner.cache import LruCache
 from drydock_provisioner.statemgmt.design.resolver import ReferenceResolver
 
+# Compiled templates and remote assets are shared by all renders in this
+# process, the caches are created on first use once config is loaded.
+# Assets are config files and scripts rather than HTML, so rendered values
+# are not escaped.
+_template_env = jinja2.Environment(autoescape=False)  # nosec assets are not HTML
+_template_cache = None
+_asset_cache = None
+_cache_lock = threading.Lock()
+
+# The output of rendering a BootActionAsset for one node. Rendering never
+# modifies the asset so a site design can be shared by concurrent renders.
+RenderedAsset = collections.namedtuple(
+    'RenderedAsset', ['type', 'path', 'permissions', 'rendered_bytes'])
+
+
+def get_template(source):
+    """Return the compiled Jinja2 template for ``source``.
+
+    Templates are cached keyed by a hash of their source so a template
+    rendered for many nodes is only compiled once.
+
+    :param source: string template source
+    """
+    global _template_cache
+
+    if _template_cache is None:
+        with _cache_lock:
+            if _template_cache is None:
+                _template_cache = LruCache(
+                    max_entries=config.config_mgr.conf.cache.
+                    template_cache_size,
+                    name='template_cache')
+
+    key = hashlib.sha256(source.encode('utf-8')).digest()
+    return _template_cache.get(key,
+                               lambda: _template_env.from_string(source))
+
+
+def template_cache_stats():
+    """Return the counters of the compiled template cache."""
+    if _template_cache is None:
+        return dict(name='template_cache', entries=0)
+    return _template_cache.stats()
+
+
+def get_asset_cache():
+    """Return the cache of remote boot action assets."""
+    global _asset_cache
+
+    if _asset_cache is None:
+        with _cache_lock:
+            if _asset_cache is None:
+                conf = config.config_mgr.conf.cache
+                _asset_cache = AssetCache(
+                    ReferenceResolver.resolve_reference_conditional,
+                    max_bytes=conf.asset_cache_size,
+                    ttl=conf.asset_cache_ttl)
+    return _asset_cache
+
+
+def asset_cache_stats():
+    """Return the counters of the remote asset cache."""
+    if _asset_cache is None:
+        return dict(name='asset_cache', entries=0)
+    return _asset_cache.stats()
+
 
 @base.DrydockObjectRegistry.register
 class BootAction(base.DrydockPersistentObject, base.DrydockObject):
@@ -65,8 +137,8 @@ class BootAction(base.DrydockPersistentObject, base.DrydockObject):
                       type_filter=None):
         """Render all of the assets in this bootaction.
 
-        Render the assets of this bootaction and return them in a list.
-        The ``nodename`` and ``action_id`` will be
+        Render the assets of this bootaction and return them in a list of
+        RenderedAsset. The ``nodename`` and ``action_id`` will be
         used to build the context for any assets utilizing the ``template``
         pipeline segment.
 
@@ -81,8 +153,8 @@ class BootAction(base.DrydockPersistentObject, base.DrydockObject):
         for a in self.asset_list:
             if type_filter is None or (type_filter is not None
                                        and a.type == type_filter):
-                a.render(nodename, site_design, action_id, design_ref)
-                assets.append(a)
+                assets.append(
+                    a.render(nodename, site_design, action_id, design_ref))
 
         return assets
 
@@ -112,6 +184,15 @@ class BootActionAsset(base.DrydockObject):
         'permissions': ovo_fields.IntegerField(nullable=True),
     }
 
+    # Pipeline segment names mapped to the methods implementing them
+    pipeline_segments = {
+        'base64_encode': 'eval_base64_encode',
+        'base64_decode': 'eval_base64_decode',
+        'utf8_decode': 'eval_utf8_decode',
+        'utf8_encode': 'eval_utf8_encode',
+        'template': 'eval_template',
+    }
+
     def __init__(self, **kwargs):
         if 'permissions' in kwargs:
             mode = kwargs.pop('permissions')
@@ -121,13 +202,13 @@ class BootActionAsset(base.DrydockObject):
             mode = None
 
         super().__init__(permissions=mode, **kwargs)
-        self.rendered_bytes = None
 
     def render(self, nodename, site_design, action_id, design_ref):
-        """Render this asset into a base64 encoded string.
+        """Render this asset for a node and return a RenderedAsset.
 
         The ``nodename`` and ``action_id`` will be used to construct
-        the context for evaluating the ``template`` pipeline segment
+        the context for evaluating the ``template`` pipeline segment.
+        The asset itself is not modified.
 
         :param nodename: the name of the node where the asset will be deployed
         :param site_design: instance of objects.SiteDesign
@@ -149,7 +230,7 @@ class BootActionAsset(base.DrydockObject):
 
         if isinstance(value, str):
             value = value.encode('utf-8')
-        self.rendered_bytes = value
+        return RenderedAsset(self.type, self.path, self.permissions, value)
 
     def _get_template_context(self, nodename, site_design, action_id,
                               design_ref):
@@ -226,11 +307,16 @@ class BootActionAsset(base.DrydockObject):
     def resolve_asset_location(self, asset_url):
         """Retrieve the data asset from the url.
 
-        Returns the asset as a bytestring.
+        Returns the asset as a bytestring. Remote assets are served from
+        the process wide asset cache. An error response or unreadable file
+        raises InvalidAssetLocation for every scheme, whether or not the
+        asset is cached.
 
         :param asset_url: URL to retrieve the data asset from
         """
         try:
+            if ReferenceResolver.is_remote(asset_url):
+                return get_asset_cache().get(asset_url)
             return ReferenceResolver.resolve_reference(asset_url)
         except Exception as ex:
             raise errors.InvalidAssetLocation(
@@ -246,20 +332,13 @@ class BootActionAsset(base.DrydockObject):
         :param pipeline: list of pipeline segments to execute
         :param tpl_ctx: The optional context to be made available to the ``template`` pipeline
         """
-        segment_funcs = {
-            'base64_encode': self.eval_base64_encode,
-            'base64_decode': self.eval_base64_decode,
-            'utf8_decode': self.eval_utf8_decode,
-            'utf8_encode': self.eval_utf8_encode,
-            'template': self.eval_template,
-        }
-
         for s in pipeline:
-            try:
-                data = segment_funcs[s](data, ctx=tpl_ctx)
-            except KeyError:
+            segment_func = self.pipeline_segments.get(s)
+            if segment_func is None:
                 raise errors.UnknownPipelineSegment(
                     "Bootaction pipeline segment %s unknown." % s)
+            try:
+                data = getattr(self, segment_func)(data, ctx=tpl_ctx)
             except Exception as ex:
                 raise errors.PipelineFailure(
                     "Error when running bootaction pipeline segment %s: %s - %s"
@@ -309,7 +388,7 @@ class BootActionAsset(base.DrydockObject):
         :param data: The template
         :param ctx: Optional ctx to inject into the template render
         """
-        template = Template(data)
+        template = get_template(data)
         return template.render(ctx)
 
 
@@ -29,7 +29,8 @@ class BuildData(object):
     :param collected_data: Date/time the data was collected
     :param generator: String description of the source of data (e.g. ``lshw``)
     :param data_format: String MIME-type of ``data_element``
-    :param data_element: Data to be saved, will be cast to ``str``
+    :param data_element: Data to be saved, will be cast to ``str``. None
+                         for summaries loaded without the collected data
     """
 
     def __init__(self,
@@ -40,13 +41,17 @@ class BuildData(object):
                  data_format=None,
                  data_element=None):
         """Initiator for BuildData."""
-        if not all((node_name, task_id, generator, data_format, data_element)):
+        if not all((node_name, task_id, generator, data_format)):
+            raise ValueError("Required field missing.")
+
+        if data_element is not None and not data_element:
             raise ValueError("Required field missing.")
 
         try:
             if isinstance(data_element, bytes):
                 data_element = data_element.decode('utf-8')
-            elif not isinstance(data_element, str):
+            elif data_element is not None and not isinstance(
+                    data_element, str):
                 data_element = str(data_element)
         except Exception as ex:
             raise errors.BuildDataError(
@@ -23,6 +23,7 @@ class HealthCheck(object):
         self.message = ''
         self.status = 'Success'
         self.message_list = []
+        self.metrics = {}
 
     def add_detail_msg(self, msg=None):
         """Add a detailed health check message.
@@ -37,6 +38,14 @@ class HealthCheck(object):
             self.message = 'Drydock failed to respond'
             self.status = 'Failure'
 
+    def add_metrics(self, name, metrics):
+        """Add runtime metrics reported in the extended health check.
+
+        :param name: name of the metrics group
+        :param metrics: dict of metric values
+        """
+        self.metrics[name] = metrics
+
     def to_dict(self):
         return {
             'kind': 'Status',
@@ -48,6 +57,7 @@ class HealthCheck(object):
             'details': {
                 'errorCount': self.error_count,
                 'messageList': [x.to_dict() for x in self.message_list],
+                'metrics': self.metrics,
             },
             'code': self.code
         }
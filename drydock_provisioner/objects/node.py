@@ -49,7 +49,8 @@ class BaremetalNode(drydock_provisioner.objects.hostprofile.HostProfile):
 
     # Compile the applied version of this model sourcing referenced
     # data from the passed site design
-    def compile_applied_model(self, site_design, state_manager):
+    def compile_applied_model(self, site_design, state_manager,
+                              build_data=None):
         self.logger.debug("Applying host profile to node %s" % self.name)
         self.apply_host_profile(site_design)
         self.logger.debug("Applying hardware profile to node %s" % self.name)
@@ -58,7 +59,8 @@ class BaremetalNode(drydock_provisioner.objects.hostprofile.HostProfile):
         self.logger.debug("Resolving kernel parameters on node %s" % self.name)
         self.resolve_kernel_params(site_design)
         self.logger.debug("Resolving device aliases on node %s" % self.name)
-        self.apply_logicalnames(site_design, state_manager)
+        self.apply_logicalnames(
+            site_design, state_manager, build_data=build_data)
         return
 
     def apply_host_profile(self, site_design):
@@ -213,17 +215,22 @@ class BaremetalNode(drydock_provisioner.objects.hostprofile.HostProfile):
             % (alias_name, bus_type, address))
         return alias_name
 
-    def apply_logicalnames(self, site_design, state_manager):
+    def apply_logicalnames(self, site_design, state_manager, build_data=None):
         """Gets the logicalnames for devices from lshw.
 
         :param site_design: SiteDesign object.
         :param state_manager: DrydockState object.
+        :param build_data: optional list of this node's latest BuildData
+                           already loaded, otherwise it is queried
         :return: Returns sets a dictionary of aliases that map to logicalnames in self.logicalnames.
         """
         logicalnames = {}
 
-        results = state_manager.get_build_data(
-            node_name=self.get_name(), latest=True)
+        if build_data is not None:
+            results = build_data
+        else:
+            results = state_manager.get_build_data(
+                node_name=self.get_name(), latest=True)
         xml_data = None
         for result in results:
             if result.generator == "lshw":
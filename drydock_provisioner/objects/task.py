@@ -18,15 +18,78 @@ import json
 import time
 import logging
 import copy
+import threading
 
 from datetime import datetime
 
 from drydock_provisioner import objects
+from drydock_provisioner import config
 
 import drydock_provisioner.error as errors
 import drydock_provisioner.objects.fields as hd_fields
 
 from drydock_provisioner.control.base import DrydockRequestContext
+from drydock_provisioner.statemgmt.notify import TASK_CHANNEL
+from drydock_provisioner.statemgmt.notify import parse_task_event
+
+
+class MessageFlusher(object):
+    """Periodically write the buffered result messages of tasks.
+
+    A single daemon thread serves every task in the process. Tasks
+    register when their buffer becomes non-empty and are flushed within
+    [database] result_message_flush_interval seconds. The thread sleeps
+    while no task has messages pending.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('drydock')
+
+        self._tasks = dict()
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._thread = None
+
+    def register(self, task):
+        """Flush ``task`` at the next interval.
+
+        :param task: objects.Task instance with buffered messages
+        """
+        with self._lock:
+            self._tasks[id(task)] = task
+            self._pending.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='drydock-message-flusher',
+                    daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Flush all registered tasks now."""
+        with self._lock:
+            tasks = list(self._tasks.values())
+            self._tasks = dict()
+            self._pending.clear()
+
+        for t in tasks:
+            try:
+                t.flush_messages()
+            except Exception as ex:
+                self.logger.error(
+                    "Error writing result messages for task %s" % str(
+                        t.get_id()),
+                    exc_info=ex)
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            time.sleep(
+                config.config_mgr.conf.database.result_message_flush_interval)
+            self.flush()
+
+
+message_flusher = MessageFlusher()
 
 
 class Task(object):
@@ -66,11 +129,18 @@ class Task(object):
         self.node_filter = copy.deepcopy(node_filter)
         self.created_by = None
         self.updated = None
+        self.started = None
         self.terminated = None
         self.terminated_by = None
         self.request_context = context
         self.terminate = False
+        # Leadership lease the task is executed under, see Orchestrator
+        self.lease = None
         self.logger = logging.getLogger("drydock")
+        self._last_saved = None
+
+        self._msg_buffer = []
+        self._msg_lock = threading.Lock()
 
         if context is not None:
             self.created_by = context.user
@@ -118,11 +188,20 @@ class Task(object):
 
         If the task is queued, just mark it terminated. Otherwise mark it as
         terminating and let the orchestrator manage completing termination.
+
+        The request is not fenced by the lease the task was started under,
+        a task left by a previous leader can still be terminated.
         """
         self.terminate = True
         self.terminated = datetime.utcnow()
         self.terminated_by = terminated_by
-        self.save()
+
+        lease = self.lease
+        self.lease = None
+        try:
+            self.save()
+        finally:
+            self.lease = lease
 
     def check_terminate(self):
         """Check if execution of this task should terminate."""
@@ -131,6 +210,19 @@ class Task(object):
     def set_status(self, status):
         self.status = status
 
+    def get_queue_wait(self):
+        """Return the seconds this task waited, or has waited, in the queue.
+
+        Returns None if the task was never queued for the orchestrator.
+        """
+        if self.created is None:
+            return None
+        if self.started is not None:
+            return (self.started - self.created).total_seconds()
+        if self.status == hd_fields.TaskStatus.Queued:
+            return (datetime.utcnow() - self.created).total_seconds()
+        return None
+
     def get_status(self):
         return self.status
 
@@ -191,24 +283,56 @@ class Task(object):
                 ctx_type='task')
             self.subtask_id_list.append(subtask.task_id)
             subtask.parent_task_id = self.task_id
+            subtask.lease = self.lease
             subtask.save()
         else:
             raise errors.OrchestratorError("Error adding subtask.")
 
     def save(self):
-        """Save this task's current state to the database."""
-        chk_task = self.statemgr.get_task(self.get_id())
+        """Save this task's current state to the database.
 
-        if chk_task in [
-                hd_fields.TaskStatus.Terminating,
-                hd_fields.TaskStatus.Terminated
-        ]:
-            self.set_status(chk_task.status)
+        Buffered result messages are written first. The task write is
+        skipped if nothing has changed since the last save, a termination
+        requested by another process is still picked up.
+        """
+        self.flush_messages()
+
+        saved_state = self._saved_state()
+        if saved_state == self._last_saved:
+            self._refresh_termination()
+            return
 
         self.updated = datetime.utcnow()
         if not self.statemgr.put_task(self):
             raise errors.OrchestratorError("Error saving task.")
 
+        self._last_saved = self._saved_state()
+
+    def _refresh_termination(self):
+        """Apply a termination recorded in the database by another process."""
+        if self.terminate:
+            return
+
+        r = self.statemgr.get_task_termination(self.task_id)
+        if r is None or not r['terminate']:
+            return
+
+        if r['status'] in [
+                hd_fields.TaskStatus.Terminating,
+                hd_fields.TaskStatus.Terminated
+        ]:
+            self.status = r['status']
+        self.terminate = True
+        self.terminated = r['terminated']
+        self.terminated_by = r['terminated_by']
+        self._last_saved = self._saved_state()
+
+    def _saved_state(self):
+        """Snapshot of the persisted fields used to detect changes."""
+        state = self.to_db(include_id=False)
+        state.pop('updated')
+        return copy.deepcopy(state)
+
     def get_subtasks(self):
         """Get list of this task's subtasks."""
         return self.subtask_id_list
@@ -225,12 +349,18 @@ class Task(object):
         """
         timeleft = timeout
         while timeleft > 0:
-            st_list = self.statemgr.get_active_subtasks(self.task_id)
+            st_list = self.statemgr.get_active_subtasks(
+                self.task_id, include_messages=False)
+            st_ids = [str(st.task_id) for st in st_list]
             if len(st_list) == 0:
                 return True
             else:
-                time.sleep(poll_interval)
-                timeleft = timeleft - poll_interval
+                wait_start = time.monotonic()
+                self.statemgr.wait_for_change(
+                    TASK_CHANNEL,
+                    min(poll_interval, timeleft),
+                    predicate=lambda p: parse_task_event(p)[0] in st_ids)
+                timeleft = timeleft - (time.monotonic() - wait_start)
 
         raise errors.CollectTaskTimeout(
             "Timed out collecting subtasks for task %s." % str(self.task_id))
@@ -266,7 +396,8 @@ class Task(object):
             "Bubbling subtask results up to task %s." % str(self.task_id))
         self.result.successes = []
         self.result.failures = []
-        for st in self.statemgr.get_complete_subtasks(self.task_id):
+        for st in self.statemgr.get_complete_subtasks(
+                self.task_id, include_messages=False):
             if action_filter is None or (action_filter is not None
                                          and st.action == action_filter):
                 for se in st.result.successes:
@@ -297,11 +428,13 @@ class Task(object):
         """
         if reset_status:
             # Defaults the ActionResult to Success if there are no tasks
-            if not self.statemgr.get_all_subtasks(self.task_id):
+            if not self.statemgr.get_all_subtasks(
+                    self.task_id, include_messages=False):
                 self.result.status = hd_fields.ActionResult.Success
             else:
                 self.result.status = hd_fields.ActionResult.Incomplete
-        for st in self.statemgr.get_complete_subtasks(self.task_id):
+        for st in self.statemgr.get_complete_subtasks(
+                self.task_id, include_messages=False):
             if action_filter is None or (action_filter is not None
                                          and st.action == action_filter):
                 self.logger.debug("Collecting result status from subtask %s." %
@@ -320,9 +453,33 @@ class Task(object):
                 self.logger.debug("Skipping subtask due to action filter.")
 
     def add_status_msg(self, **kwargs):
-        """Add a status message to this task's result status."""
+        """Add a status message to this task's result status.
+
+        The message is buffered and written to the database when the task
+        is saved, when the buffer fills or after the flush interval.
+        """
         msg = self.result.add_status_msg(**kwargs)
-        self.statemgr.post_result_message(self.task_id, msg)
+
+        db_conf = config.config_mgr.conf.database
+        with self._msg_lock:
+            self._msg_buffer.append(msg)
+            flush = len(self._msg_buffer) >= db_conf.result_message_flush_size
+            pending = len(self._msg_buffer) == 1
+
+        if flush:
+            self.flush_messages()
+        elif pending:
+            message_flusher.register(self)
+
+    def flush_messages(self):
+        """Write buffered result messages to the database in order."""
+        with self._msg_lock:
+            if not self._msg_buffer or self.statemgr is None:
+                return
+            msg_list = self._msg_buffer
+            self._msg_buffer = []
+            # Write while holding the lock so concurrent flushes keep order
+            self.statemgr.post_result_messages(self.task_id, msg_list)
 
     def merge_status_messages(self, task=None, task_result=None):
         """Merge status messages into this task's result status.
@@ -379,6 +536,8 @@ class Task(object):
             self.created_by,
             'updated':
             self.updated,
+            'started':
+            self.started,
             'design_ref':
             self.design_ref,
             'request_context':
@@ -395,7 +554,9 @@ class Task(object):
             'terminate':
             self.terminate,
             'retry':
-            self.retry
+            self.retry,
+            'lease':
+            self.lease,
         }
 
         if include_id:
@@ -434,6 +595,10 @@ class Task(object):
             self.created_by,
             'updated':
             None if self.updated is None else str(self.updated),
+            'started':
+            None if self.started is None else str(self.started),
+            'queue_wait':
+            self.get_queue_wait(),
             'terminated':
             None if self.terminated is None else str(self.terminated),
             'terminated_by':
@@ -471,8 +636,10 @@ class Task(object):
             'terminated_by',
             'terminate',
             'updated',
+            'started',
             'retry',
             'node_filter',
+            'lease',
         ]
 
         for f in simple_fields:
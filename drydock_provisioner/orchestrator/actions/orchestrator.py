@@ -19,10 +19,15 @@ import logging
 import concurrent.futures
 import uuid
 
+import ulid2
+
 import drydock_provisioner.config as config
 import drydock_provisioner.error as errors
+import drydock_provisioner.executor as executor
 import drydock_provisioner.objects.fields as hd_fields
 
+from drydock_provisioner.statemgmt.notify import BOOTACTION_CHANNEL
+
 
 class BaseAction(object):
     """The base class for actions starts by the orchestrator."""
@@ -52,9 +57,9 @@ class BaseAction(object):
         """
         task_futures = dict()
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as te:
-            for t in subtask_id_list:
-                task_futures[t.bytes] = te.submit(fn, t, *args, **kwargs)
+        te = executor.get_pool('subtasks')
+        for t in subtask_id_list:
+            task_futures[t.bytes] = te.submit(fn, t, *args, **kwargs)
 
         return task_futures
 
@@ -76,18 +81,18 @@ class BaseAction(object):
                     self.task.get_id()))
             split_tasks = dict()
 
-            with concurrent.futures.ThreadPoolExecutor() as te:
-                for n in target_nodes:
-                    split_task = self.orchestrator.create_task(
-                        design_ref=self.task.design_ref,
-                        action=hd_fields.OrchestratorAction.PrepareNodes,
-                        node_filter=self.orchestrator.
-                        create_nodefilter_from_nodelist([n]))
-                    self.task.register_subtask(split_task)
-                    action = self.__class__(split_task, self.orchestrator,
-                                            self.state_manager)
-                    split_tasks[split_task.get_id().bytes] = te.submit(
-                        action.start)
+            te = executor.get_pool('node_actions')
+            for n in target_nodes:
+                split_task = self.orchestrator.create_task(
+                    design_ref=self.task.design_ref,
+                    action=hd_fields.OrchestratorAction.PrepareNodes,
+                    node_filter=self.orchestrator.
+                    create_nodefilter_from_nodelist([n]))
+                self.task.register_subtask(split_task)
+                action = self.__class__(split_task, self.orchestrator,
+                                        self.state_manager)
+                split_tasks[split_task.get_id().bytes] = te.submit(
+                    action.start)
 
             return split_tasks
 
@@ -119,7 +124,8 @@ class BaseAction(object):
                         "Uncaught excetion in subtask %s future:" % str(
                             uuid.UUID(bytes=k)),
                         exc_info=v.exception())
-            st = self.state_manager.get_task(uuid.UUID(bytes=k))
+            st = self.state_manager.get_task(
+                uuid.UUID(bytes=k), include_messages=False)
             st.bubble_results()
             st.align_result()
             st.save()
@@ -958,7 +964,6 @@ class BootactionReport(BaseAction):
 
         poll_start = datetime.datetime.utcnow()
 
-        still_running = True
         timeout = datetime.timedelta(
             minutes=config.config_mgr.conf.timeouts.bootaction_final_status)
         running_time = datetime.datetime.utcnow() - poll_start
@@ -969,29 +974,46 @@ class BootactionReport(BaseAction):
         self.logger.debug(
             "Waiting for bootaction response signals to complete.")
         while running_time < timeout:
-            still_running = False
-            for n in nodelist:
-                bas = self.state_manager.get_boot_actions_for_node(n)
-                running_bas = {
-                    k: v
-                    for (k, v) in bas.items() if v.get('action_status') ==
-                    hd_fields.ActionResult.Incomplete
-                }
-                if len(running_bas) > 0:
-                    still_running = True
+            running_bas = self.state_manager.get_boot_actions_for_nodes(
+                nodelist, action_status=[hd_fields.ActionResult.Incomplete])
+            if running_bas is None:
+                # Query failed, try again after the poll interval
+                running_ids = None
+            else:
+                running_ids = set(
+                    ulid2.encode_ulid_base32(ba['action_id'])
+                    for bas in running_bas.values() for ba in bas.values())
+                if not running_ids:
                     break
-            if still_running:
                 self.logger.debug("Still waiting on %d running bootactions." %
-                                  len(running_bas))
-                time.sleep(config.config_mgr.conf.poll_interval)
-                running_time = datetime.datetime.utcnow() - poll_start
-            else:
-                break
+                                  len(running_ids))
+
+            # Wake as soon as one of the running boot actions reports
+            # status rather than re-querying every poll interval
+            self.state_manager.wait_for_change(
+                BOOTACTION_CHANNEL,
+                min(config.config_mgr.conf.poll_interval,
+                    (timeout - running_time).total_seconds()),
+                predicate=None if running_ids is None else
+                lambda action_id: action_id.upper() in running_ids)
+            running_time = datetime.datetime.utcnow() - poll_start
 
         self.logger.debug("Signals complete or timeout reached.")
 
+        node_bas = self.state_manager.get_boot_actions_for_nodes(nodelist)
+        if node_bas is None:
+            self.task.add_status_msg(
+                msg="Error retrieving boot action status.",
+                error=True,
+                ctx='NA',
+                ctx_type='NA')
+            self.task.failure()
+            self.task.set_status(hd_fields.TaskStatus.Complete)
+            self.task.save()
+            return
+
         for n in nodelist:
-            bas = self.state_manager.get_boot_actions_for_node(n)
+            bas = node_bas.get(n, dict())
             success_bas = {
                 k: v
                 for (k, v) in bas.items()
@@ -0,0 +1,245 @@
+# Copyright 2018 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Rendered boot action asset bundles served to deploying nodes."""
+
+import collections
+import hashlib
+import logging
+import tarfile
+import threading
+import zlib
+
+import drydock_provisioner.config as config
+
+from drydock_provisioner.cache import LruCache
+
+# A bundle holds either the complete tarball in ``data`` or, when it is
+# too large to buffer, the rendered ``assets`` to stream it from
+BootactionBundle = collections.namedtuple('BootactionBundle',
+                                          ['data', 'etag', 'assets'])
+
+
+def stream_tarball(asset_list=None, compresslevel=None, chunk_size=None):
+    """Generate a gzipped tar file of rendered assets in chunks.
+
+    Each asset is added with its defined path and permissions. At most
+    ``chunk_size`` bytes of asset data are compressed at a time, so no
+    copy of the whole tar file is held in memory.
+
+    :param asset_list: list of objects.bootaction.RenderedAsset instances
+    :param compresslevel: gzip compression level, 0 for none, defaults to
+                          [bootactions] tarball_compression_level
+    :param chunk_size: bytes of asset data per chunk, defaults to
+                       [bootactions] tarball_chunk_size
+    """
+    conf = config.config_mgr.conf.bootactions
+    if compresslevel is None:
+        compresslevel = conf.tarball_compression_level
+    if chunk_size is None:
+        chunk_size = conf.tarball_chunk_size
+
+    # wbits of 16 + MAX_WBITS writes a gzip header and trailer
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED,
+                                  16 + zlib.MAX_WBITS)
+    offset = 0
+
+    for a in asset_list or []:
+        tarasset = tarfile.TarInfo(name=a.path)
+        tarasset.size = len(a.rendered_bytes)
+        tarasset.mode = a.permissions if a.permissions else 0o600
+        tarasset.uid = 0
+        tarasset.gid = 0
+        header = tarasset.tobuf(tarfile.GNU_FORMAT, tarfile.ENCODING,
+                                'surrogateescape')
+        offset = offset + len(header)
+        chunk = compressor.compress(header)
+        if chunk:
+            yield chunk
+
+        data = memoryview(a.rendered_bytes)
+        for i in range(0, len(data), chunk_size):
+            chunk = compressor.compress(data[i:i + chunk_size])
+            if chunk:
+                yield chunk
+
+        # Asset data is padded to a whole tar block
+        padding = -tarasset.size % tarfile.BLOCKSIZE
+        offset = offset + tarasset.size + padding
+        chunk = compressor.compress(tarfile.NUL * padding)
+        if chunk:
+            yield chunk
+
+    # End of archive marker, padded to a whole record as tarfile does
+    end = tarfile.BLOCKSIZE * 2
+    end = end + (-(offset + end) % tarfile.RECORDSIZE)
+    yield compressor.compress(tarfile.NUL * end) + compressor.flush()
+
+
+def build_tarball(asset_list=None, compresslevel=None):
+    """Create a gzipped tar file from rendered assets.
+
+    Return the bytes of the tar file, see ``stream_tarball``.
+
+    :param asset_list: list of objects.bootaction.RenderedAsset instances
+    :param compresslevel: gzip compression level, 0 for none
+    """
+    return b''.join(
+        stream_tarball(asset_list=asset_list, compresslevel=compresslevel))
+
+
+def assets_digest(asset_list):
+    """Return a digest identifying the content of a set of rendered assets.
+
+    :param asset_list: list of objects.bootaction.RenderedAsset instances
+    """
+    digest = hashlib.sha256()
+    for a in asset_list:
+        digest.update(
+            ("%s:%s:%d\n" % (a.path, str(a.permissions),
+                             len(a.rendered_bytes))).encode('utf-8'))
+        digest.update(a.rendered_bytes)
+    return digest.hexdigest()
+
+
+class BootactionBundleCache(object):
+    """Cache of the rendered boot action tarballs of deploying nodes.
+
+    Bundles are keyed by node, asset type, task, the identity key of the
+    node's boot action context and the digest of the design documents they
+    are rendered from. The design is resolved on every request, so a design
+    changed in place at the task's design reference is rendered again and
+    the bundles of the previous design are discarded.
+
+    The cache is held in memory by each process serving the API, a bundle
+    is rendered on the first request for it in that process.
+
+    :param orchestrator: instance of orchestrator.Orchestrator
+    """
+
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+        self.state_manager = orchestrator.state_manager
+
+        self.logger = logging.getLogger('drydock.orchestrator')
+
+        # A size of 0 disables caching but still coalesces renders
+        conf = config.config_mgr.conf.cache
+        self.bundles = LruCache(
+            max_entries=4096 if conf.bootaction_cache_size else 0,
+            ttl=conf.bootaction_cache_ttl,
+            name='bootaction_bundles',
+            max_bytes=conf.bootaction_cache_size,
+            sizeof=self._sizeof)
+
+        # Latest design digest seen for each design reference
+        self.design_digests = dict()
+        self.design_digests_lock = threading.Lock()
+
+    def get(self, ba_ctx, asset_type):
+        """Return the BootactionBundle of ``asset_type`` for a node.
+
+        Bundles larger than [bootactions] tarball_buffer_size hold the
+        rendered assets instead of a tarball, the caller streams them with
+        ``stream_tarball``.
+
+        :param ba_ctx: boot action context of the node from the database
+        :param asset_type: asset type to include - ``unit``, ``file``,
+                           ``pkg_list`` or ``all``
+        """
+        task = self.state_manager.get_task(
+            ba_ctx['task_id'], include_messages=False)
+        design_blob = self.state_manager.get_design_documents(
+            task.design_ref)
+        digest = self.orchestrator.design_digest(design_blob)
+        self._check_design(task.design_ref, digest)
+
+        return self.bundles.get(
+            self._key(ba_ctx['node_name'], asset_type, ba_ctx['task_id'],
+                      ba_ctx['identity_key'], digest),
+            lambda: self._render(ba_ctx['node_name'], asset_type, task,
+                                 self._load_design(task, design_blob)))
+
+    def stats(self):
+        """Return a dictionary of cache counters."""
+        return self.bundles.stats()
+
+    def _check_design(self, design_ref, digest):
+        """Discard the bundles of a previous design of ``design_ref``.
+
+        :param design_ref: design reference of a boot action context's task
+        :param digest: digest of the design documents now at ``design_ref``
+        """
+        with self.design_digests_lock:
+            previous = self.design_digests.get(design_ref)
+            self.design_digests[design_ref] = digest
+
+        if previous is not None and previous != digest:
+            self.logger.info(
+                "Design at %s changed, discarding boot action bundles." %
+                design_ref)
+            self.bundles.invalidate_matching(lambda k: k[4] == previous)
+
+    def _key(self, nodename, asset_type, task_id, identity_key, digest):
+        return (nodename, asset_type, str(task_id), bytes(identity_key),
+                digest)
+
+    def _load_design(self, task, design_blob):
+        self.logger.debug("Loading design for task %s from design ref %s" %
+                          (str(task.get_id()), task.design_ref))
+        design_status, site_design = self.orchestrator.get_effective_site(
+            task.design_ref, design_blob=design_blob)
+        return site_design
+
+    def _render(self, nodename, asset_type, task, site_design):
+        """Render and tar the boot action assets of ``asset_type``.
+
+        :param nodename: name of the node
+        :param asset_type: asset type to include, ``all`` for every type
+        :param task: the task that created the node's boot action context
+        :param site_design: effective site design of ``task.design_ref``
+        """
+        type_filter = None if asset_type == 'all' else asset_type
+
+        assets = list()
+        ba_status_list = self.state_manager.get_boot_actions_for_node(nodename)
+
+        for ba in site_design.bootactions:
+            if nodename in ba.target_nodes:
+                ba_status = ba_status_list.get(ba.name, None)
+                action_id = ba_status.get('action_id')
+                assets.extend(
+                    ba.render_assets(
+                        nodename,
+                        site_design,
+                        action_id,
+                        task.design_ref,
+                        type_filter=type_filter))
+
+        # The tarball bytes depend on the compression level as well
+        etag = '"%s-%d"' % (
+            assets_digest(assets),
+            config.config_mgr.conf.bootactions.tarball_compression_level)
+        if self._sizeof_assets(assets) > (
+                config.config_mgr.conf.bootactions.tarball_buffer_size):
+            return BootactionBundle(None, etag, assets)
+        return BootactionBundle(build_tarball(asset_list=assets), etag, None)
+
+    def _sizeof(self, bundle):
+        if bundle.data is not None:
+            return len(bundle.data)
+        return self._sizeof_assets(bundle.assets)
+
+    @staticmethod
+    def _sizeof_assets(assets):
+        return sum(len(a.rendered_bytes) for a in assets)
@@ -15,17 +15,30 @@
 
 import time
 import importlib
+import threading
 import logging
 import uuid
 import ulid2
 import concurrent.futures
 import os
+import copy
+import hashlib
+
+from datetime import datetime
 
 import drydock_provisioner.config as config
 import drydock_provisioner.objects as objects
 import drydock_provisioner.error as errors
+import drydock_provisioner.executor as executor
 import drydock_provisioner.objects.fields as hd_fields
 
+from drydock_provisioner.cache import LruCache
+from drydock_provisioner.statemgmt.notify import TASK_CHANNEL
+from drydock_provisioner.statemgmt.notify import parse_task_event
+from drydock_provisioner.statemgmt.leadership import LeaderHeartbeat
+from drydock_provisioner.statemgmt.retention import RetentionManager
+
+from .bootaction_bundles import BootactionBundleCache
 from .actions.orchestrator import Noop
 from .actions.orchestrator import ValidateDesign
 from .actions.orchestrator import VerifySite
@@ -52,6 +65,20 @@ class Orchestrator(object):
 
         self.stop_flag = False
 
+        # Tasks being executed, task_id => (Future, set of node names)
+        self.running_tasks = dict()
+
+        # Nodes targeted by tasks waiting to start, task_id => node names
+        self.queued_task_nodes = dict()
+
+        # Last retention run as (monotonic start time, Future)
+        self.retention_run = (None, None)
+        self.retention_lock = threading.Lock()
+
+        # Leadership lease token and heartbeat while this is the leader
+        self.lease = None
+        self.heartbeat = None
+
         self.enabled_drivers = {}
 
         self.state_manager = state_manager
@@ -64,6 +91,16 @@ class Orchestrator(object):
 
         self.logger = logging.getLogger('drydock.orchestrator')
 
+        # Compiled effective site designs shared by all tasks and API
+        # requests served by this process
+        self.design_cache = LruCache(
+            max_entries=config.config_mgr.conf.cache.design_cache_size,
+            ttl=config.config_mgr.conf.cache.design_cache_ttl,
+            name='design_cache')
+
+        # Rendered boot action tarballs served to deploying nodes
+        self.bootaction_bundles = BootactionBundleCache(self)
+
         if enabled_drivers is not None:
             oob_drivers = enabled_drivers.oob_driver
 
@@ -117,11 +154,10 @@ class Orchestrator(object):
 
         # Loop trying to claim status as the active orchestrator
 
-        tp = concurrent.futures.ThreadPoolExecutor(max_workers=16)
+        tp = executor.get_pool('orchestrator')
 
         while True:
             if self.stop_flag:
-                tp.shutdown()
                 return
             claim = self.state_manager.claim_leadership(self.orch_id)
 
@@ -133,78 +169,255 @@ class Orchestrator(object):
                 time.sleep(config.config_mgr.conf.leadership_claim_interval)
             else:
                 self.logger.info(
-                    "Orchestrator %s successfully claimed leadership, polling for tasks."
-                    % str(self.orch_id))
+                    "Orchestrator %s successfully claimed leadership with lease %s, polling for tasks."
+                    % (str(self.orch_id), str(claim)))
+
+                # Renew the lease independent of task scheduling
+                self.lease = claim
+                self.heartbeat = LeaderHeartbeat(
+                    self.state_manager,
+                    self.orch_id,
+                    claim,
+                    config.config_mgr.conf.leadership_heartbeat_interval,
+                    config.config_mgr.conf.leader_grace_period).start()
 
                 # As active orchestrator, loop looking for queued tasks.
-                task_future = None
                 while True:
                     # TODO(sh8121att) Need a timeout here
                     if self.stop_flag:
-                        tp.shutdown()
+                        concurrent.futures.wait([
+                            f for f, _ in self.running_tasks.values()
+                        ])
+                        self.heartbeat.stop()
+                        self.heartbeat = None
+                        self.lease = None
                         self.state_manager.abdicate_leadership(self.orch_id)
                         return
-                    if task_future is not None:
-                        if task_future.done():
-                            self.logger.debug(
-                                "Task execution complete, looking for the next task."
-                            )
-                            exc = task_future.exception()
-                            if exc is not None:
-                                self.logger.error(
-                                    "Error in starting orchestrator action.",
-                                    exc_info=exc)
-                            task_future = None
-
-                    if task_future is None:
-                        next_task = self.state_manager.get_next_queued_task(
-                            allowed_actions=list(orch_task_actions.keys()))
-
-                        if next_task is not None:
-                            self.logger.info(
-                                "Found task %s queued, starting execution." %
-                                str(next_task.get_id()))
-                            if next_task.check_terminate():
-                                self.logger.info(
-                                    "Task %s marked for termination, skipping execution."
-                                    % str(next_task.get_id()))
-                                next_task.set_status(
-                                    hd_fields.TaskStatus.Terminated)
-                                next_task.save()
-                                continue
-                            action = orch_task_actions[next_task.action](
-                                next_task, self, self.state_manager)
-                            if action:
-                                task_future = tp.submit(action.start)
-                            else:
-                                self.logger.warning(
-                                    "Task %s has unsupported action %s, ending execution."
-                                    % (str(next_task.get_id()),
-                                       next_task.action))
-                                next_task.add_status_msg(
-                                    msg="Unsupported action %s." %
-                                    next_task.action,
-                                    error=True,
-                                    ctx=str(next_task.get_id()),
-                                    ctx_type='task')
-                                next_task.failure()
-                                next_task.set_status(
-                                    hd_fields.TaskStatus.Complete)
-                                next_task.save()
-                        else:
-                            self.logger.info(
-                                "No task found, waiting to poll again.")
-
-                    # TODO(sh8121att) Make this configurable
-                    time.sleep(config.config_mgr.conf.poll_interval)
-                    claim = self.state_manager.maintain_leadership(
-                        self.orch_id)
-                    if not claim:
+
+                    self._reap_running_tasks()
+                    self._start_queued_tasks(orch_task_actions, tp)
+                    self._schedule_retention()
+
+                    # Wake early when a task is queued or a running task
+                    # finishes, polling remains the fallback
+                    self.state_manager.wait_for_change(
+                        TASK_CHANNEL,
+                        config.config_mgr.conf.poll_interval,
+                        predicate=self._is_schedule_event)
+                    if self.heartbeat.lost.is_set():
                         self.logger.info(
                             "Orchestrator %s lost leadership, attempting to reclaim."
                             % str(self.orch_id))
+                        self.heartbeat.stop()
                         break
 
+    def leadership_stats(self):
+        """Return a dictionary describing this instance's leadership."""
+        stats = dict(orchestratorId=str(self.orch_id), leader=False)
+        heartbeat = self.heartbeat
+        if heartbeat is not None:
+            stats.update(heartbeat.stats())
+            stats['leader'] = not heartbeat.lost.is_set()
+        return stats
+
+    def run_retention(self, dry_run=False):
+        """Delete task history and node data beyond the retention limits.
+
+        Returns a dictionary of table name to rows deleted.
+
+        :param dry_run: only count the rows that would be deleted
+        """
+        return RetentionManager(self.state_manager).run(dry_run=dry_run)
+
+    def start_retention(self):
+        """Start a retention run in the background.
+
+        Returns False if a run started by this instance is still active.
+        The result of the run is logged.
+        """
+        with self.retention_lock:
+            last_start, last_run = self.retention_run
+            if last_run is not None and not last_run.done():
+                return False
+            self.retention_run = (time.monotonic(), executor.get_pool(
+                'retention').submit(self._run_retention_job))
+            return True
+
+    def _run_retention_job(self):
+        try:
+            return self.run_retention()
+        except errors.RetentionInProgress as ex:
+            self.logger.info("Retention job skipped: %s" % str(ex))
+        except Exception as ex:
+            self.logger.error("Error running retention job.", exc_info=ex)
+
+    def _schedule_retention(self):
+        """Start the retention job if enabled and the interval has passed."""
+        conf = config.config_mgr.conf.retention
+        if not conf.enabled:
+            return
+
+        last_start, last_run = self.retention_run
+        if (last_start is not None
+                and time.monotonic() - last_start < conf.interval):
+            return
+
+        self.start_retention()
+
+    def _is_schedule_event(self, payload):
+        """Check if a task notification may allow another task to start.
+
+        :param payload: payload string received on TASK_CHANNEL
+        """
+        task_id, status = parse_task_event(payload)
+        if status == hd_fields.TaskStatus.Queued:
+            return True
+        if status in [
+                hd_fields.TaskStatus.Complete, hd_fields.TaskStatus.Terminated
+        ]:
+            return task_id in [str(k) for k in list(self.running_tasks)]
+        return False
+
+    def _reap_running_tasks(self):
+        """Remove finished tasks from the set of running tasks."""
+        for task_id, (task_future, _) in list(self.running_tasks.items()):
+            if task_future.done():
+                self.logger.debug("Task %s execution complete." %
+                                  str(task_id))
+                exc = task_future.exception()
+                if exc is not None:
+                    self.logger.error(
+                        "Error in starting orchestrator action.",
+                        exc_info=exc)
+                del self.running_tasks[task_id]
+
+    def _start_queued_tasks(self, orch_task_actions, tp):
+        """Start queued tasks up to the configured concurrency limit.
+
+        Queued tasks are considered in creation order. A task is held back
+        while an earlier running or queued task targets any of the same
+        nodes.
+
+        :param orch_task_actions: dictionary of action name to action class
+        :param tp: executor.WorkerPool to run the task actions in
+        """
+        max_tasks = config.config_mgr.conf.max_concurrent_tasks
+
+        if len(self.running_tasks) >= max_tasks:
+            return
+
+        queued_tasks = self.state_manager.get_queued_tasks(
+            allowed_actions=list(orch_task_actions.keys()),
+            include_messages=False)
+
+        # Forget the nodes of tasks no longer queued, e.g. terminated ones
+        queued_ids = set(t.get_id() for t in queued_tasks or [])
+        for task_id in list(self.queued_task_nodes):
+            if task_id not in queued_ids:
+                del self.queued_task_nodes[task_id]
+
+        if not queued_tasks:
+            self.logger.info("No task found, waiting to poll again.")
+            return
+
+        # Nodes targeted by tasks started or held back ahead of the next task
+        claimed = [nodes for _, nodes in self.running_tasks.values()]
+
+        for next_task in queued_tasks:
+            if len(self.running_tasks) >= max_tasks:
+                break
+
+            task_id = next_task.get_id()
+
+            if task_id in self.running_tasks:
+                continue
+
+            self.logger.info(
+                "Found task %s queued, starting execution." % str(task_id))
+
+            # Updates to the task are rejected if this instance is deposed
+            next_task.lease = self.lease
+
+            if next_task.check_terminate():
+                self.logger.info(
+                    "Task %s marked for termination, skipping execution." %
+                    str(task_id))
+                next_task.set_status(hd_fields.TaskStatus.Terminated)
+                next_task.save()
+                continue
+
+            # Target nodes are computed once while the task waits to start
+            if task_id not in self.queued_task_nodes:
+                self.queued_task_nodes[task_id] = self.get_task_nodes(
+                    next_task)
+            nodes = self.queued_task_nodes[task_id]
+
+            if any(self._nodes_conflict(nodes, c) for c in claimed):
+                self.logger.info(
+                    "Task %s targets nodes in use by another task, deferring."
+                    % str(task_id))
+                claimed.append(nodes)
+                continue
+
+            del self.queued_task_nodes[task_id]
+
+            action = orch_task_actions[next_task.action](
+                next_task, self, self.state_manager)
+            if action:
+                next_task.started = datetime.utcnow()
+                next_task.set_status(hd_fields.TaskStatus.Running)
+                next_task.save()
+                self.running_tasks[task_id] = (tp.submit(action.start), nodes)
+                claimed.append(nodes)
+            else:
+                self.logger.warning(
+                    "Task %s has unsupported action %s, ending execution." %
+                    (str(task_id), next_task.action))
+                next_task.add_status_msg(
+                    msg="Unsupported action %s." % next_task.action,
+                    error=True,
+                    ctx=str(task_id),
+                    ctx_type='task')
+                next_task.failure()
+                next_task.set_status(hd_fields.TaskStatus.Complete)
+                next_task.save()
+
+    def get_task_nodes(self, task):
+        """Compute the names of the nodes ``task`` operates on.
+
+        Return an empty set for tasks that do not change nodes and None for
+        tasks that affect the entire site.
+
+        :param task: instance of objects.Task
+        """
+        if task.action in [
+                hd_fields.OrchestratorAction.Noop,
+                hd_fields.OrchestratorAction.ValidateDesign,
+                hd_fields.OrchestratorAction.VerifySite
+        ]:
+            return set()
+        elif task.action == hd_fields.OrchestratorAction.PrepareSite:
+            return None
+
+        try:
+            return set([n.name for n in self.get_target_nodes(task)])
+        except Exception as ex:
+            # The task will fail when it can't load the design, so it
+            # does not need to wait for other tasks
+            self.logger.debug(
+                "Unable to compute target nodes for task %s: %s" %
+                (str(task.get_id()), str(ex)))
+            return set()
+
+    @staticmethod
+    def _nodes_conflict(nodes_a, nodes_b):
+        """Whether two task node sets, as from get_task_nodes, overlap."""
+        if nodes_a is None:
+            return nodes_b is None or len(nodes_b) > 0
+        if nodes_b is None:
+            return len(nodes_a) > 0
+        return len(nodes_a & nodes_b) > 0
+
     def stop_orchestrator(self):
         """Indicate this orchestrator instance should stop attempting to run."""
         self.stop_flag = True
@@ -251,10 +464,30 @@ class Orchestrator(object):
 
         try:
             nodes = site_design.baremetal_nodes
+
+            # Load the lshw data for all nodes in one query, if that fails
+            # each node queries its own
+            node_lshw = None
+            if nodes:
+                try:
+                    node_lshw = dict((n.name, []) for n in nodes)
+                    for bd in self.state_manager.get_latest_build_data(
+                            node_names=list(node_lshw.keys()),
+                            generators=['lshw']):
+                        node_lshw.setdefault(bd.node_name, []).append(bd)
+                except Exception as ex:
+                    self.logger.warning(
+                        "Failed to load build data for all nodes: %s" %
+                        str(ex))
+                    node_lshw = None
+
             for n in nodes or []:
                 try:
                     n.compile_applied_model(
-                        site_design, state_manager=self.state_manager)
+                        site_design,
+                        state_manager=self.state_manager,
+                        build_data=node_lshw.get(n.name)
+                        if node_lshw is not None else None)
                 except Exception as ex:
                     node_failed.append(n)
                     self.logger.error(
@@ -270,37 +503,86 @@ class Orchestrator(object):
 
         return
 
-    def get_described_site(self, design_ref):
+    def get_described_site(self, design_ref, design_blob=None):
         """Ingest design data referenced by design_ref.
 
         Return a tuple of the processing status and the populated instance
         of SiteDesign
 
         :param design_ref: Supported URI referencing a design document
+        :param design_blob: Optional bytes already resolved from ``design_ref``
         """
         status, site_design = self.ingester.ingest_data(
-            design_ref=design_ref, design_state=self.state_manager)
+            design_ref=design_ref,
+            design_state=self.state_manager,
+            design_blob=design_blob)
 
         return status, site_design
 
-    def get_effective_site(self, design_ref):
+    def get_effective_site(self, design_ref, design_blob=None):
         """Ingest design data and compile the effective model of the design.
 
         Return a tuple of the processing status and the populated instance
-        of SiteDesign after computing the inheritance chain
+        of SiteDesign after computing the inheritance chain. Compiled designs
+        are cached keyed on ``design_ref`` and a digest of the resolved
+        design documents.
+
+        The SiteDesign is shared by every caller of the same design and must
+        not be modified, the status is a private copy as callers may add
+        messages to it.
 
         :param design_ref: Supported URI referencing a design document
+        :param design_blob: Optional bytes already resolved from ``design_ref``
+        """
+        if design_blob is None:
+            try:
+                design_blob = self.state_manager.get_design_documents(
+                    design_ref)
+            except Exception as ex:
+                self.logger.error(
+                    "Error getting site definition: %s" % str(ex),
+                    exc_info=ex)
+                return None, None
+
+        cache_key = (design_ref, self.design_digest(design_blob))
+
+        status, site_design, _ = self.design_cache.get(
+            cache_key,
+            lambda: self._compile_effective_site(design_ref, design_blob),
+            cacheable=lambda result: result[2])
+
+        return copy.deepcopy(status), site_design
+
+    @staticmethod
+    def design_digest(design_blob):
+        """Return the digest identifying the content of a design.
+
+        :param design_blob: The bytes resolved from a design reference
+        """
+        return hashlib.sha256(design_blob).hexdigest()
+
+    def _compile_effective_site(self, design_ref, design_blob):
+        """Ingest ``design_blob`` and compile the effective site design.
+
+        Return a tuple of the processing status, the SiteDesign instance and
+        whether compilation completed without an unexpected error.
+
+        :param design_ref: Supported URI referencing a design document
+        :param design_blob: The bytes resolved from ``design_ref``
         """
         status = None
         site_design = None
+        completed = False
         val = Validator(self)
         try:
-            status, site_design = self.get_described_site(design_ref)
+            status, site_design = self.get_described_site(
+                design_ref, design_blob=design_blob)
             if status.status == hd_fields.ValidationResult.Success:
                 self.compute_model_inheritance(site_design)
                 self.compute_bootaction_targets(site_design)
                 self.render_route_domains(site_design)
                 status = val.validate_design(site_design, result_status=status)
+            completed = True
         except Exception as ex:
             if status is not None:
                 status.add_status_msg(
@@ -312,7 +594,7 @@ class Orchestrator(object):
             self.logger.error(
                 "Error getting site definition: %s" % str(ex), exc_info=ex)
 
-        return status, site_design
+        return status, site_design, completed
 
     def get_target_nodes(self, task, failures=False, successes=False):
         """Compute list of target nodes for given ``task``.
@@ -393,7 +675,7 @@ class Orchestrator(object):
             return []
 
         if node_filter is None:
-            return target_nodes
+            return list(target_nodes)
 
         if not isinstance(node_filter, dict) and not isinstance(
                 node_filter, objects.NodeFilterSet):
@@ -545,7 +827,7 @@ class Orchestrator(object):
         else:
             return None
 
-    def create_bootaction_context(self, nodename, task):
+    def create_bootaction_context(self, nodename, task, site_design=None):
         """Save a boot action context for ``nodename``
 
         Generate a identity key and persist the boot action context
@@ -554,25 +836,46 @@ class Orchestrator(object):
 
         :param nodename: Name of the node the bootaction context is targeted for
         :param task: The task instigating the ndoe deployment
+        :param site_design: optional effective site design already compiled
+                            for ``task.design_ref``
         """
-        design_status, site_design = self.get_effective_site(task.design_ref)
+        return self.create_bootaction_contexts(
+            [nodename], task, site_design=site_design).get(nodename)
 
-        if site_design.bootactions is None:
-            return None
+    def create_bootaction_contexts(self, nodenames, task, site_design=None):
+        """Save boot action contexts for many nodes at once.
 
-        identity_key = None
+        Generate identity keys and boot action IDs for every node targeted
+        by a boot action and persist them in a single transaction. Return a
+        dictionary of node name to the generated identity key as ``bytes``,
+        nodes not targeted by any boot action are omitted.
 
-        self.logger.debug(
-            "Creating boot action context for node %s" % nodename)
+        :param nodenames: list of names of the nodes being deployed
+        :param task: The task instigating the node deployments
+        :param site_design: optional effective site design already compiled
+                            for ``task.design_ref``
+        """
+        if site_design is None:
+            design_status, site_design = self.get_effective_site(
+                task.design_ref)
 
-        for ba in site_design.bootactions:
+        if site_design.bootactions is None:
+            return dict()
+
+        identity_keys = dict()
+        boot_actions = []
+
+        for nodename in nodenames:
             self.logger.debug(
-                "Boot actions target nodes: %s" % ba.target_nodes)
-            if nodename in ba.target_nodes:
-                if identity_key is None:
-                    identity_key = os.urandom(32)
-                    self.state_manager.post_boot_action_context(
-                        nodename, task.get_id(), identity_key)
+                "Creating boot action context for node %s" % nodename)
+
+            for ba in site_design.bootactions:
+                self.logger.debug(
+                    "Boot actions target nodes: %s" % ba.target_nodes)
+                if nodename not in ba.target_nodes:
+                    continue
+                if nodename not in identity_keys:
+                    identity_keys[nodename] = os.urandom(32)
                 self.logger.debug(
                     "Adding boot action %s for node %s to the database." %
                     (ba.name, nodename))
@@ -583,15 +886,20 @@ class Orchestrator(object):
                     self.logger.debug(
                         "Boot action %s has disabled signaling, marking unreported."
                         % ba.name)
-                action_id = ulid2.generate_binary_ulid()
-                self.state_manager.post_boot_action(
-                    nodename,
-                    task.get_id(),
-                    identity_key,
-                    action_id,
-                    ba.name,
-                    action_status=init_status)
-        return identity_key
+                boot_actions.append(
+                    dict(
+                        node_name=nodename,
+                        action_id=ulid2.generate_binary_ulid(),
+                        action_name=ba.name,
+                        action_status=init_status))
+
+        if not self.state_manager.post_boot_action_contexts(
+                task.get_id(), identity_keys, boot_actions):
+            raise errors.OrchestratorError(
+                "Error saving boot action context for nodes %s" % ', '.join(
+                    identity_keys.keys()))
+
+        return identity_keys
 
     def render_route_domains(self, site_design):
         """Update site_design with static routes for route domains.
@@ -131,7 +131,14 @@ class DrydockPolicy(object):
                                      [{
                                          'path': '/api/v1.0/health/extended',
                                          'method': 'GET'
-                                     }])
+                                     }]),
+        policy.DocumentedRuleDefault(
+            'physical_provisioner:run_retention', 'role:admin',
+            'Delete task history and node data beyond the retention limits',
+            [{
+                'path': '/api/v1.0/retention',
+                'method': 'POST'
+            }]),
     ]
 
     # Validate Design Policy
@@ -14,7 +14,7 @@
 """Definitions for Drydock database tables."""
 
 from sqlalchemy.schema import Table, Column
-from sqlalchemy.types import Boolean, DateTime, String, Integer, Text
+from sqlalchemy.types import BigInteger, Boolean, DateTime, String, Integer, Text
 from sqlalchemy.dialects import postgresql as pg
 
 
@@ -45,13 +45,15 @@ class Tasks(ExtendTable):
         Column('created', DateTime),
         Column('created_by', String(16)),
         Column('updated', DateTime),
+        Column('started', DateTime),
         Column('design_ref', String(128)),
         Column('request_context', pg.JSON),
         Column('node_filter', pg.JSON),
         Column('action', String(32)),
         Column('terminated', DateTime),
         Column('terminated_by', String(16)),
-        Column('terminate', Boolean, default=False)
+        Column('terminate', Boolean, default=False),
+        Column('lease', BigInteger),
     ]
 
 
@@ -81,6 +83,7 @@ class ActiveInstance(ExtendTable):
         Column('dummy_key', Integer, primary_key=True),
         Column('identity', pg.BYTEA(16)),
         Column('last_ping', DateTime),
+        Column('lease', BigInteger),
     ]
 
 
@@ -123,4 +126,17 @@ class BuildData(ExtendTable):
         Column('generator', String(256)),
         Column('data_format', String(32)),
         Column('data_element', Text),
+        Column('content_hash', pg.BYTEA(32)),
+    ]
+
+
+class BuildDataContent(ExtendTable):
+    """Table storing each distinct build data payload once."""
+
+    __tablename__ = 'build_data_content'
+
+    __schema__ = [
+        Column('content_hash', pg.BYTEA(32), primary_key=True),
+        Column('encoding', String(16)),
+        Column('data', pg.BYTEA),
     ]
@@ -53,21 +53,86 @@ class ReferenceResolver(object):
                 % design_ref)
 
     @classmethod
-    def resolve_reference_http(cls, design_uri):
-        """Retrieve design documents from http/https endpoints.
+    def resolve_reference_conditional(cls, design_ref, etag=None):
+        """Resolve a remote reference unless it matches ``etag``.
 
-        Return a byte array of the response content. Support unsecured or
-        basic auth
+        Return a tuple of the content and the ETag of the document. If
+        ``etag`` is given and the document is unchanged the content is None.
+        Error responses raise InvalidDesignReference.
 
-        :param design_uri: Tuple as returned by urllib.parse for the design reference
+        :param design_ref: A URI-formatted reference to a data entity
+        :param etag: optional ETag of a previously retrieved copy
+        """
+        try:
+            design_uri = urllib.parse.urlparse(design_ref)
+        except ValueError:
+            raise errors.InvalidDesignReference(
+                "Cannot resolve design reference %s: unable to parse as valid URI."
+                % design_ref)
+
+        headers = dict()
+        if etag is not None:
+            headers['If-None-Match'] = etag
+
+        if design_uri.scheme in ['http', 'https']:
+            response = cls._get_http(design_uri, headers=headers)
+            url = design_uri.geturl()
+        elif design_uri.scheme in cls.ucp_schemes:
+            url = cls._ucp_url(design_uri)
+            response = KeystoneUtils.get_session().get(url, headers=headers)
+        else:
+            return cls.resolve_reference(design_ref), None
+
+        if response.status_code == 304 and etag is not None:
+            return None, etag
+        if response.status_code >= 400:
+            raise errors.InvalidDesignReference(
+                "Received error code for reference %s: %s" %
+                (url, str(response.status_code)))
+        return response.content, response.headers.get('ETag')
+
+    @classmethod
+    def is_remote(cls, design_ref):
+        """Return whether ``design_ref`` is retrieved over the network.
+
+        :param design_ref: A URI-formatted reference to a data entity
         """
+        scheme = urllib.parse.urlparse(design_ref).scheme
+        return scheme in ['http', 'https'] or scheme in cls.ucp_schemes
+
+    @classmethod
+    def _get_http(cls, design_uri, headers=None):
         if design_uri.username is not None and design_uri.password is not None:
-            response = requests.get(
+            return requests.get(
                 design_uri.geturl(),
                 auth=(design_uri.username, design_uri.password),
+                headers=headers,
                 timeout=30)
         else:
-            response = requests.get(design_uri.geturl(), timeout=30)
+            return requests.get(
+                design_uri.geturl(), headers=headers, timeout=30)
+
+    @classmethod
+    def _ucp_url(cls, design_uri):
+        (new_scheme, foo) = re.subn('^[^+]+\+', '', design_uri.scheme)
+        return urllib.parse.urlunparse(
+            (new_scheme, design_uri.netloc, design_uri.path, design_uri.params,
+             design_uri.query, design_uri.fragment))
+
+    @classmethod
+    def resolve_reference_http(cls, design_uri):
+        """Retrieve design documents from http/https endpoints.
+
+        Return a byte array of the response content. Support unsecured or
+        basic auth
+
+        :param design_uri: Tuple as returned by urllib.parse for the design reference
+        """
+        response = cls._get_http(design_uri)
+        if response.status_code >= 400:
+            raise errors.InvalidDesignReference(
+                "Received error code for reference %s: %s" %
+                (design_uri.geturl(), str(response.status_code)))
 
         return response.content
 
@@ -94,10 +159,7 @@ class ReferenceResolver(object):
         :param design_uri: Tuple as returned by urllib.parse for the design reference
         """
         ks_sess = KeystoneUtils.get_session()
-        (new_scheme, foo) = re.subn('^[^+]+\+', '', design_uri.scheme)
-        url = urllib.parse.urlunparse(
-            (new_scheme, design_uri.netloc, design_uri.path, design_uri.params,
-             design_uri.query, design_uri.fragment))
+        url = cls._ucp_url(design_uri)
         logger = logging.getLogger(__name__)
         logger.debug("Calling Keystone session for url %s" % str(url))
         resp = ks_sess.get(url)
@@ -107,6 +169,8 @@ class ReferenceResolver(object):
                 (url, str(resp.status_code), resp.text))
         return resp.content
 
+    ucp_schemes = ['deckhand+http', 'promenade+http']
+
     scheme_handlers = {
         'http': resolve_reference_http,
         'file': resolve_reference_file,
@@ -0,0 +1,128 @@
+# Copyright 2018 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Renewal of the active orchestrator's leadership lease."""
+
+import logging
+import threading
+import time
+
+
+class LeaderHeartbeat(object):
+    """Renew a leadership lease from a dedicated thread.
+
+    The lease is renewed every ``interval`` seconds independent of how long
+    the orchestrator takes to schedule tasks. ``lost`` is set once the lease
+    is taken over by another instance, or renewals have failed for longer
+    than ``grace_period`` seconds during which another instance may have
+    claimed it.
+
+    :param state_manager: instance of statemgmt.state.DrydockState
+    :param leader_id: uuid.UUID ID of the leader
+    :param lease: lease token returned by ``claim_leadership``
+    :param interval: seconds between renewals
+    :param grace_period: seconds after which leadership may be usurped
+    """
+
+    def __init__(self, state_manager, leader_id, lease, interval,
+                 grace_period):
+        self.state_manager = state_manager
+        self.leader_id = leader_id
+        self.lease = lease
+        self.interval = interval
+        self.grace_period = grace_period
+
+        self.logger = logging.getLogger('drydock.statemgmt')
+
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.beats = 0
+        self.failures = 0
+        self.latency_last = 0.0
+        self.latency_max = 0.0
+        self.latency_total = 0.0
+        self.last_renewed = time.monotonic()
+
+    def start(self):
+        """Start renewing the lease."""
+        self._thread = threading.Thread(
+            target=self._run, name='drydock-leader-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop renewing the lease."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        """Return a dictionary of heartbeat gauges."""
+        with self._lock:
+            return dict(
+                lease=self.lease,
+                beats=self.beats,
+                failures=self.failures,
+                lost=self.lost.is_set(),
+                latencyLast=round(self.latency_last, 4),
+                latencyMax=round(self.latency_max, 4),
+                latencyAvg=round(self.latency_total / self.beats, 4)
+                if self.beats else 0.0,
+                sinceRenewed=round(time.monotonic() - self.last_renewed, 1))
+
+    def beat(self):
+        """Renew the lease once, returning whether leadership is kept."""
+        start = time.monotonic()
+        renewed = self.state_manager.maintain_leadership(
+            self.leader_id, lease=self.lease)
+        latency = time.monotonic() - start
+
+        with self._lock:
+            self.beats = self.beats + 1
+            self.latency_last = latency
+            self.latency_max = max(self.latency_max, latency)
+            self.latency_total = self.latency_total + latency
+
+            if renewed:
+                self.last_renewed = time.monotonic()
+            else:
+                self.failures = self.failures + 1
+
+        if latency > self.interval:
+            self.logger.warning("Leadership heartbeat took %.3f seconds." %
+                                latency)
+
+        if renewed is False:
+            self.logger.warning("Leadership lease %s of %s was taken over." %
+                                (str(self.lease), str(self.leader_id)))
+            self.lost.set()
+        elif (renewed is None
+              and time.monotonic() - self.last_renewed > self.grace_period):
+            self.logger.warning(
+                "Leadership lease %s of %s not renewed within %d seconds." %
+                (str(self.lease), str(self.leader_id), self.grace_period))
+            self.lost.set()
+
+        return not self.lost.is_set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.beat():
+                    return
+            except Exception as ex:
+                self.logger.error(
+                    "Error in leadership heartbeat.", exc_info=ex)
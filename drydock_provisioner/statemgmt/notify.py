@@ -0,0 +1,173 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Delivery of PostgreSQL NOTIFY events to in-process waiters."""
+
+import logging
+import select
+import threading
+
+TASK_CHANNEL = 'drydock_tasks'
+BOOTACTION_CHANNEL = 'drydock_bootactions'
+
+
+def task_event_payload(task):
+    """Build the NOTIFY payload announcing a task change.
+
+    :param task: objects.Task instance that changed
+    """
+    return "%s:%s" % (str(task.task_id), task.status)
+
+
+def parse_task_event(payload):
+    """Split a task event payload into its task ID and status.
+
+    :param payload: string payload received on TASK_CHANNEL
+    """
+    task_id, _, status = payload.partition(':')
+    return task_id, status
+
+
+class _Waiter(object):
+    def __init__(self, channel, predicate):
+        self.channel = channel
+        self.predicate = predicate
+        self.event = threading.Event()
+
+
+class StateChangeMonitor(object):
+    """LISTEN for state change notifications and wake waiting threads.
+
+    A single daemon thread holds a dedicated connection listening on the
+    Drydock channels. Threads block in ``wait`` until a matching
+    notification arrives or the timeout expires, so callers that re-check
+    the database after ``wait`` returns still behave correctly if
+    notifications are lost or the listener cannot connect.
+
+    :param db_engine: SQLAlchemy engine for the Drydock database
+    :param channels: list of channel names to LISTEN on
+    :param reconnect_interval: seconds between attempts to reconnect
+    """
+
+    def __init__(self,
+                 db_engine,
+                 channels=(TASK_CHANNEL, BOOTACTION_CHANNEL),
+                 reconnect_interval=10):
+        self.db_engine = db_engine
+        self.channels = list(channels)
+        self.reconnect_interval = reconnect_interval
+
+        self.logger = logging.getLogger('drydock.statemgmt')
+
+        self._waiters = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._conn = None
+
+        self.received = 0
+        self.connected = False
+
+    def wait(self, channel, timeout, predicate=None):
+        """Block until a notification on ``channel`` or ``timeout`` seconds.
+
+        Returns True if woken by a notification, False on timeout.
+
+        :param channel: the channel to wait for
+        :param timeout: maximum seconds to block
+        :param predicate: optional callable accepting the payload string
+                          and returning whether it should wake this waiter
+        """
+        waiter = _Waiter(channel, predicate)
+        with self._lock:
+            self._waiters.add(waiter)
+            self._start()
+        try:
+            return waiter.event.wait(timeout)
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def stop(self):
+        """Stop the listener thread and close its connection."""
+        self._stop.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _start(self):
+        """Start the listener thread if needed. Caller must hold the lock."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._listen, name='drydock-state-listener', daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        fairy = self.db_engine.raw_connection()
+        fairy.detach()
+        conn = fairy.connection
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for c in self.channels:
+                cur.execute("LISTEN %s;" % c)
+        return conn
+
+    def _disconnect(self):
+        self.connected = False
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception as ex:
+                self.logger.debug(
+                    "Error closing state change listener connection: %s" %
+                    str(ex))
+            self._conn = None
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                if self._conn is None:
+                    self._conn = self._connect()
+                    self.connected = True
+                    self.logger.debug(
+                        "Listening for state changes on %s." % ', '.join(
+                            self.channels))
+                ready, _, _ = select.select([self._conn], [], [], 1.0)
+                if not ready:
+                    continue
+                self._conn.poll()
+                while self._conn.notifies:
+                    n = self._conn.notifies.pop(0)
+                    self._dispatch(n.channel, n.payload)
+            except Exception as ex:
+                self.logger.warning(
+                    "State change listener error, falling back to polling: %s"
+                    % str(ex))
+                self._disconnect()
+                self._stop.wait(self.reconnect_interval)
+        self._disconnect()
+
+    def _dispatch(self, channel, payload):
+        self.received = self.received + 1
+        with self._lock:
+            waiters = [w for w in self._waiters if w.channel == channel]
+        for w in waiters:
+            try:
+                if w.predicate is None or w.predicate(payload):
+                    w.event.set()
+            except Exception as ex:
+                self.logger.debug("Error evaluating notification for %s: %s" %
+                                  (channel, str(ex)))
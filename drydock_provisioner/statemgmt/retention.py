@@ -0,0 +1,347 @@
+# Copyright 2018 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Pruning of old task history and node data."""
+
+import datetime
+import gzip
+import json
+import logging
+import os
+
+from sqlalchemy import sql
+
+import drydock_provisioner.error as errors
+import drydock_provisioner.objects.fields as hd_fields
+
+from drydock_provisioner import config
+
+# Key of the Postgres advisory lock held for the length of a retention run
+RETENTION_LOCK_KEY = 0x64727964
+
+
+class RetentionManager(object):
+    """Delete records beyond the configured age and count limits.
+
+    Rows are removed oldest first in batches of ``batch_size``, each batch
+    in its own short transaction. Deleted rows are optionally appended to
+    gzipped JSON lines files in ``archive_dir`` before the batch commits.
+    Only one run deletes rows at a time across all Drydock instances.
+
+    :param state_manager: instance of statemgmt.state.DrydockState
+    """
+
+    def __init__(self, state_manager):
+        self.state_manager = state_manager
+        self.logger = logging.getLogger('drydock.statemgmt')
+
+    def run(self, dry_run=False):
+        """Apply the retention limits.
+
+        Returns a dictionary of table name to the number of rows deleted,
+        or that would be deleted if ``dry_run`` is true.
+
+        :param dry_run: only count the rows that would be deleted
+        :raises RetentionInProgress: if another run is deleting rows
+        """
+        if dry_run:
+            return self._run(dry_run)
+
+        with self.state_manager.connection() as conn:
+            locked = conn.execute(
+                sql.text("SELECT pg_try_advisory_lock(:key)"),
+                key=RETENTION_LOCK_KEY).scalar()
+            if not locked:
+                raise errors.RetentionInProgress(
+                    "A retention run is already in progress.")
+            try:
+                return self._run(dry_run)
+            finally:
+                conn.execute(
+                    sql.text("SELECT pg_advisory_unlock(:key)"),
+                    key=RETENTION_LOCK_KEY)
+
+    def _run(self, dry_run):
+        conf = config.config_mgr.conf.retention
+        archive = None
+        if conf.archive_dir and not dry_run:
+            archive = RetentionArchive(conf.archive_dir)
+
+        report = dict()
+        try:
+            report.update(
+                self._prune_tasks(conf.task_max_age, conf.task_max_count,
+                                  conf.batch_size, dry_run, archive))
+            report['build_data'] = self._prune(
+                'build_data',
+                'ctid',
+                'collected_date',
+                self._build_data_limits(conf.build_data_max_age,
+                                        conf.build_data_max_count),
+                conf.batch_size,
+                dry_run,
+                archive)
+            # Payloads no longer referenced by any build data record
+            report['build_data_content'] = self._prune(
+                'build_data_content',
+                'content_hash',
+                'content_hash',
+                ("NOT EXISTS (SELECT 1 FROM build_data WHERE "
+                 "build_data.content_hash = build_data_content.content_hash)",
+                 dict()),
+                conf.batch_size,
+                dry_run,
+                archive)
+            report['boot_action_status'] = self._prune(
+                'boot_action_status',
+                'action_id',
+                'action_id',
+                self._bootaction_limits(conf.bootaction_status_max_age,
+                                        conf.bootaction_status_max_count),
+                conf.batch_size,
+                dry_run,
+                archive)
+        finally:
+            if archive is not None:
+                archive.close()
+
+        self.logger.info("Retention %s: %s" % ('dry run'
+                                               if dry_run else 'complete',
+                                               str(report)))
+        return report
+
+    def _prune_tasks(self, max_age, max_count, batch_size, dry_run, archive):
+        """Delete finished top-level tasks together with their subtasks.
+
+        Only top-level tasks count against the limits, and subtasks are
+        only deleted with the whole tree of their top-level task so a
+        running task never loses part of its tree.
+        """
+        condition = ("parent_task_id IS NULL AND status IN ('%s', '%s')" %
+                     (hd_fields.TaskStatus.Complete,
+                      hd_fields.TaskStatus.Terminated))
+        where, params = self._limits('tasks', 'created', max_age, max_count,
+                                     condition)
+        if where is None:
+            return dict(tasks=0, result_message=0)
+
+        # Every task in the trees of the selected top-level tasks
+        tree = ("WITH RECURSIVE tree(task_id) AS ("
+                "(SELECT task_id FROM tasks WHERE %s%s) "
+                "UNION SELECT tasks.task_id FROM tasks "
+                "JOIN tree ON tasks.parent_task_id = tree.task_id) ")
+
+        if dry_run:
+            tree = tree % (where, "")
+            with self.state_manager.connection() as conn:
+                tasks = conn.execute(
+                    sql.text(tree + "SELECT count(*) FROM tree"),  # nosec no strings are user-sourced
+                    **params).scalar()
+                messages = conn.execute(
+                    sql.text(tree + "SELECT count(*) FROM result_message "  # nosec no strings are user-sourced
+                             "WHERE task_id IN (SELECT task_id FROM tree)"),
+                    **params).scalar()
+            return dict(tasks=tasks, result_message=messages)
+
+        tree = tree % (where, " ORDER BY created LIMIT :batch_size")
+        delete_tasks = sql.text(
+            tree + "DELETE FROM tasks WHERE task_id IN "  # nosec no strings are user-sourced
+            "(SELECT task_id FROM tree) RETURNING *")
+        delete_messages = sql.text("DELETE FROM result_message "
+                                   "WHERE task_id = ANY(:task_ids) "
+                                   "RETURNING *")
+
+        counts = dict(tasks=0, result_message=0)
+        while True:
+            with self.state_manager.connection() as conn:
+                with conn.begin():
+                    task_rows = conn.execute(
+                        delete_tasks, batch_size=batch_size,
+                        **params).fetchall()
+                    message_rows = []
+                    if task_rows:
+                        message_rows = conn.execute(
+                            delete_messages,
+                            task_ids=[bytes(r['task_id'])
+                                      for r in task_rows]).fetchall()
+                    if archive is not None:
+                        archive.write('tasks', task_rows)
+                        if message_rows:
+                            archive.write('result_message', message_rows)
+            counts['tasks'] = counts['tasks'] + len(task_rows)
+            counts['result_message'] = (
+                counts['result_message'] + len(message_rows))
+            top_level = [r for r in task_rows if r['parent_task_id'] is None]
+            if len(top_level) < batch_size:
+                break
+
+        return counts
+
+    def _prune(self, table, key, order, limits, batch_size, dry_run,
+               archive):
+        """Delete rows of ``table`` matching ``limits`` in batches.
+
+        :param table: table name
+        :param key: column identifying a row
+        :param order: column to delete in ascending order of
+        :param limits: tuple of SQL condition and bind parameters
+        """
+        where, params = limits
+        if where is None:
+            return 0
+
+        if dry_run:
+            with self.state_manager.connection() as conn:
+                return conn.execute(
+                    sql.text(
+                        "SELECT count(*) FROM %s WHERE %s" %  # nosec no strings are user-sourced
+                        (table, where)),
+                    **params).scalar()
+
+        query = sql.text(
+            "DELETE FROM %s WHERE %s IN ("  # nosec no strings are user-sourced
+            "SELECT %s FROM %s WHERE %s ORDER BY %s LIMIT :batch_size) "
+            "RETURNING *" % (table, key, key, table, where, order))
+
+        deleted = 0
+        while True:
+            with self.state_manager.connection() as conn:
+                with conn.begin():
+                    rows = conn.execute(
+                        query, batch_size=batch_size, **params).fetchall()
+                    if archive is not None:
+                        archive.write(table, rows)
+            deleted = deleted + len(rows)
+            if len(rows) < batch_size:
+                break
+
+        return deleted
+
+    def _limits(self, table, column, max_age, max_count, condition=None):
+        """Build the SQL condition selecting rows beyond the limits.
+
+        Returns a tuple of condition string and bind parameters, the
+        condition is None if no limit is configured.
+        """
+        limits = []
+        params = dict()
+        if max_age:
+            limits.append("%s < :max_age_cutoff" % column)
+            params['max_age_cutoff'] = (
+                datetime.datetime.utcnow() - datetime.timedelta(days=max_age))
+        if max_count:
+            # Everything at or before the oldest row beyond the newest max_count
+            with self.state_manager.connection() as conn:
+                count_cutoff = conn.execute(
+                    sql.text(
+                        "SELECT %s FROM %s %s ORDER BY %s DESC "  # nosec no strings are user-sourced
+                        "OFFSET :max_count LIMIT 1" %
+                        (column, table, "WHERE %s" % condition
+                         if condition else "", column)),
+                    max_count=max_count).scalar()
+            if count_cutoff is not None:
+                limits.append("%s <= :max_count_cutoff" % column)
+                params['max_count_cutoff'] = count_cutoff
+
+        if not limits:
+            return None, params
+
+        where = "(%s)" % " OR ".join(limits)
+        if condition:
+            where = "%s AND %s" % (condition, where)
+        return where, params
+
+    def _build_data_limits(self, max_age, max_count):
+        """Build the condition for build data rows.
+
+        The limits apply to each node and generator separately, and the
+        latest record of each is always kept as the design is compiled
+        from it.
+        """
+        limits = []
+        params = dict()
+        if max_age:
+            limits.append("collected_date < :max_age_cutoff")
+            params['max_age_cutoff'] = (
+                datetime.datetime.utcnow() - datetime.timedelta(days=max_age))
+        if max_count:
+            limits.append("row_num > :max_count")
+            params['max_count'] = max_count
+
+        if not limits:
+            return None, params
+
+        where = ("ctid IN (SELECT ctid FROM (SELECT ctid, collected_date, "  # nosec no strings are user-sourced
+                 "ROW_NUMBER() OVER (PARTITION BY node_name, generator "
+                 "ORDER BY collected_date DESC) AS row_num FROM build_data) "
+                 "ranked WHERE row_num > 1 AND (%s))" % " OR ".join(limits))
+        return where, params
+
+    def _bootaction_limits(self, max_age, max_count):
+        """Build the condition for boot action status rows.
+
+        Boot action IDs are ULIDs which begin with their creation time in
+        milliseconds, so IDs sort by age.
+        """
+        where, params = self._limits('boot_action_status', 'action_id', 0,
+                                     max_count)
+        if max_age:
+            cutoff = datetime.datetime.utcnow() - datetime.timedelta(
+                days=max_age)
+            cutoff = cutoff.replace(tzinfo=datetime.timezone.utc)
+            params['max_age_cutoff'] = (int(cutoff.timestamp() * 1000)
+                                        .to_bytes(6, 'big') + bytes(10))
+            age_limit = "action_id < :max_age_cutoff"
+            where = (age_limit if where is None else
+                     "(%s OR %s)" % (age_limit, where))
+        return where, params
+
+
+class RetentionArchive(object):
+    """Append deleted rows to gzipped JSON lines files, one per table.
+
+    :param archive_dir: directory the archive files are written to
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.stamp = datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        self.files = dict()
+
+    def write(self, table, rows):
+        f = self.files.get(table)
+        if f is None:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            path = os.path.join(self.archive_dir,
+                                '%s-%s.jsonl.gz' % (table, self.stamp))
+            f = gzip.open(path, 'at')
+            self.files[table] = f
+        for r in rows:
+            f.write(json.dumps(dict(r), default=self._serialize))
+            f.write('\n')
+        f.flush()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = dict()
+
+    @staticmethod
+    def _serialize(value):
+        if isinstance(value, (bytes, memoryview)):
+            return bytes(value).hex()
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, list):
+            return [RetentionArchive._serialize(v) for v in value]
+        return str(value)
@@ -13,20 +13,31 @@
 # limitations under the License.
 """Access methods for managing external data access and persistence."""
 
+import contextlib
+import hashlib
 import logging
+import threading
+import time
 import uuid
-from datetime import datetime
+import zlib
 import ulid2
 
 from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy import exc
 from sqlalchemy import sql
 from sqlalchemy import MetaData
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 import drydock_provisioner.objects as objects
 import drydock_provisioner.objects.fields as hd_fields
 import drydock_provisioner.error as errors
 
 from .db import tables
+from .notify import StateChangeMonitor
+from .notify import TASK_CHANNEL
+from .notify import BOOTACTION_CHANNEL
+from .notify import task_event_payload
 
 from drydock_provisioner import config
 from .design.resolver import ReferenceResolver
@@ -36,13 +47,36 @@ class DrydockState(object):
     def __init__(self):
         self.logger = logging.getLogger(
             config.config_mgr.conf.logging.global_logger_name)
+        self.monitor = None
+
+        self._pool_lock = threading.Lock()
+        self._checkouts = 0
+        self._checkout_wait = 0.0
+        self._checkout_wait_max = 0.0
+        self._checkout_timeouts = 0
 
         return
 
     def connect_db(self):
         """Connect the state manager to the persistent DB."""
+        db_conf = config.config_mgr.conf.database
+
+        connect_args = dict()
+        if db_conf.statement_timeout:
+            connect_args['options'] = (
+                '-c statement_timeout=%d' % (db_conf.statement_timeout * 1000))
+
         self.db_engine = create_engine(
-            config.config_mgr.conf.database.database_connect_string)
+            db_conf.database_connect_string,
+            pool_size=db_conf.pool_size,
+            max_overflow=db_conf.pool_max_overflow,
+            pool_timeout=db_conf.pool_timeout,
+            pool_recycle=db_conf.pool_recycle,
+            connect_args=connect_args)
+
+        if db_conf.pool_pre_ping:
+            event.listen(self.db_engine, 'engine_connect', self._ping_connection)
+
         self.db_metadata = MetaData(bind=self.db_engine)
 
         self.tasks_tbl = tables.Tasks(self.db_metadata)
@@ -51,8 +85,114 @@ class DrydockState(object):
         self.boot_action_tbl = tables.BootAction(self.db_metadata)
         self.ba_status_tbl = tables.BootActionStatus(self.db_metadata)
         self.build_data_tbl = tables.BuildData(self.db_metadata)
+        self.build_data_content_tbl = tables.BuildDataContent(
+            self.db_metadata)
+
+        if config.config_mgr.conf.database.listen_notifications:
+            self.monitor = StateChangeMonitor(self.db_engine)
         return
 
+    @staticmethod
+    def _ping_connection(connection, branch):
+        """Test pooled connections when checked out, replacing stale ones."""
+        if branch:
+            return
+
+        save_should_close_with_result = connection.should_close_with_result
+        connection.should_close_with_result = False
+        try:
+            connection.scalar(sql.select([1]))
+        except exc.DBAPIError as err:
+            if err.connection_invalidated:
+                # The pool was invalidated, the retry gets a new connection
+                connection.scalar(sql.select([1]))
+            else:
+                raise
+        finally:
+            connection.should_close_with_result = save_should_close_with_result
+
+    @contextlib.contextmanager
+    def connection(self, conn=None):
+        """Context manager providing a database connection.
+
+        The connection is returned to the pool when the block exits, even
+        on error. If ``conn`` is given it is used as-is and left open, so
+        helpers can share their caller's connection.
+
+        :param conn: optional existing connection to reuse
+        """
+        if conn is not None:
+            yield conn
+            return
+
+        start = time.monotonic()
+        try:
+            conn = self.db_engine.connect()
+        except exc.TimeoutError:
+            with self._pool_lock:
+                self._checkout_timeouts = self._checkout_timeouts + 1
+            raise
+        wait = time.monotonic() - start
+
+        with self._pool_lock:
+            self._checkouts = self._checkouts + 1
+            self._checkout_wait = self._checkout_wait + wait
+            self._checkout_wait_max = max(self._checkout_wait_max, wait)
+
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def pool_stats(self):
+        """Return a dictionary of connection pool metrics."""
+        pool = self.db_engine.pool
+        with self._pool_lock:
+            stats = dict(
+                checkouts=self._checkouts,
+                checkoutTimeouts=self._checkout_timeouts,
+                checkoutWaitAvg=(self._checkout_wait / self._checkouts
+                                 if self._checkouts else 0.0),
+                checkoutWaitMax=self._checkout_wait_max)
+
+        for k, f in [('size', 'size'), ('inUse', 'checkedout'),
+                     ('idle', 'checkedin'), ('overflow', 'overflow')]:
+            if hasattr(pool, f):
+                stats[k] = getattr(pool, f)()
+
+        return stats
+
+    def wait_for_change(self, channel, timeout, predicate=None):
+        """Wait for a state change notification on ``channel``.
+
+        Returns True if a matching notification arrived and False once
+        ``timeout`` seconds pass. Without a listener this simply sleeps, so
+        callers should always re-query state afterwards.
+
+        :param channel: notification channel, e.g. TASK_CHANNEL
+        :param timeout: maximum seconds to wait
+        :param predicate: optional callable filtering on the payload string
+        """
+        if self.monitor is None:
+            time.sleep(timeout)
+            return False
+        return self.monitor.wait(channel, timeout, predicate=predicate)
+
+    def _notify(self, conn, channel, payload):
+        """Emit a NOTIFY on ``channel``. Failures are logged and ignored.
+
+        :param conn: SQLAlchemy connection to send the notification on
+        :param channel: notification channel name
+        :param payload: string payload
+        """
+        try:
+            query = sql.text("SELECT pg_notify(:channel, :payload)"
+                             ).execution_options(autocommit=True)
+            conn.execute(query, channel=channel, payload=payload)
+        except Exception as ex:
+            self.logger.debug(
+                "Error sending notification on %s: %s" % (channel, str(ex)))
+
     def tabularasa(self):
         """Truncate all tables.
 
@@ -65,89 +205,160 @@ class DrydockState(object):
             'boot_action',
             'boot_action_status',
             'build_data',
+            'build_data_content',
         ]
 
-        conn = self.db_engine.connect()
-        for t in table_names:
-            query_text = sql.text(
-                "TRUNCATE TABLE %s" % t).execution_options(autocommit=True)
+        # Tables referenced by foreign keys must be truncated together
+        with self.connection() as conn:
+            query_text = sql.text("TRUNCATE TABLE %s" % ', '.join(
+                table_names)).execution_options(autocommit=True)
             conn.execute(query_text)
-        conn.close()
 
     def get_design_documents(self, design_ref):
         return ReferenceResolver.resolve_reference(design_ref)
 
-    def get_tasks(self):
-        """Get all tasks in the database."""
+    def get_tasks(self,
+                  task_ids=None,
+                  include_messages=True,
+                  status=None,
+                  action=None,
+                  created_after=None,
+                  created_before=None,
+                  parent_task_id=None,
+                  top_level=False,
+                  marker=None,
+                  limit=None):
+        """Get tasks in the database, optionally filtered and paged.
+
+        Tasks are ordered by creation time. For keyset pagination pass the
+        ID of the last task of the previous page as ``marker``.
+
+        :param task_ids: optional list of uuid.UUID task IDs to select
+        :param include_messages: whether to load each task's result messages
+        :param status: optional list of task statuses to select
+        :param action: optional list of task actions to select
+        :param created_after: optional datetime, select tasks created after
+        :param created_before: optional datetime, select tasks created before
+        :param parent_task_id: optional uuid.UUID, select subtasks of this task
+        :param top_level: if true, only select tasks without a parent
+        :param marker: optional uuid.UUID, select tasks ordered after this task
+        :param limit: optional maximum number of tasks to return
+        """
+        tbl = self.tasks_tbl
+        conditions = []
+        if task_ids is not None:
+            conditions.append(tbl.c.task_id.in_([t.bytes for t in task_ids]))
+        if status:
+            conditions.append(tbl.c.status.in_(status))
+        if action:
+            conditions.append(tbl.c.action.in_(action))
+        if created_after is not None:
+            conditions.append(tbl.c.created > created_after)
+        if created_before is not None:
+            conditions.append(tbl.c.created < created_before)
+        if parent_task_id is not None:
+            conditions.append(tbl.c.parent_task_id == parent_task_id.bytes)
+        if top_level:
+            conditions.append(tbl.c.parent_task_id.is_(None))
+        if marker is not None:
+            marker_key = sql.select([tbl.c.created, tbl.c.task_id]).where(
+                tbl.c.task_id == marker.bytes).as_scalar()
+            conditions.append(
+                sql.tuple_(tbl.c.created, tbl.c.task_id) > marker_key)
+
+        if task_ids is not None and not task_ids:
+            return []
+
+        query = sql.select([tbl])
+        if conditions:
+            query = query.where(sql.and_(*conditions))
+        query = query.order_by(tbl.c.created.asc(),
+                               tbl.c.task_id.asc()).limit(limit)
+
         try:
-            conn = self.db_engine.connect()
-            query = sql.select([self.tasks_tbl])
-            rs = conn.execute(query)
+            with self.connection() as conn:
+                rs = conn.execute(query)
 
-            task_list = [objects.Task.from_db(dict(r)) for r in rs]
+                task_list = [objects.Task.from_db(dict(r)) for r in rs]
 
-            self._assemble_tasks(task_list=task_list)
+                if include_messages:
+                    self._assemble_tasks(task_list=task_list, conn=conn)
 
             # add reference to this state manager to each task
             for t in task_list:
                 t.statemgr = self
 
-            conn.close()
-
             return task_list
         except Exception as ex:
             self.logger.error("Error querying task list: %s" % str(ex))
             return []
 
-    def get_complete_subtasks(self, task_id):
+    def get_complete_subtasks(self, task_id, include_messages=True):
         """Query database for subtasks of the provided task that are complete.
 
         Complete is defined as status of Terminated or Complete.
 
         :param task_id: uuid.UUID ID of the parent task for subtasks
+        :param include_messages: whether to load result messages
         """
         query_text = sql.text(
             "SELECT * FROM tasks WHERE "  # nosec no strings are user-sourced
             "parent_task_id = :parent_task_id AND "
             "status IN ('" + hd_fields.TaskStatus.Terminated + "','" +
             hd_fields.TaskStatus.Complete + "')")
-        return self._query_subtasks(task_id, query_text,
-                                    "Error querying complete subtask: %s")
+        return self._query_subtasks(
+            task_id,
+            query_text,
+            "Error querying complete subtask: %s",
+            include_messages=include_messages)
 
-    def get_active_subtasks(self, task_id):
+    def get_active_subtasks(self, task_id, include_messages=True):
         """Query database for subtasks of the provided task that are active.
 
         Active is defined as status of not Terminated or Complete. Returns
         list of objects.Task instances
 
         :param task_id: uuid.UUID ID of the parent task for subtasks
+        :param include_messages: whether to load result messages
         """
         query_text = sql.text(
             "SELECT * FROM tasks WHERE "  # nosec no strings are user-sourced
             "parent_task_id = :parent_task_id AND "
             "status NOT IN ['" + hd_fields.TaskStatus.Terminated + "','" +
             hd_fields.TaskStatus.Complete + "']")
-        return self._query_subtasks(task_id, query_text,
-                                    "Error querying active subtask: %s")
+        return self._query_subtasks(
+            task_id,
+            query_text,
+            "Error querying active subtask: %s",
+            include_messages=include_messages)
 
-    def get_all_subtasks(self, task_id):
+    def get_all_subtasks(self, task_id, include_messages=True):
         """Query database for all subtasks of the provided task.
 
         :param task_id: uuid.UUID ID of the parent task for subtasks
+        :param include_messages: whether to load result messages
         """
         query_text = sql.text(
             "SELECT * FROM tasks WHERE "  # nosec no strings are user-sourced
             "parent_task_id = :parent_task_id")
-        return self._query_subtasks(task_id, query_text,
-                                    "Error querying all subtask: %s")
-
-    def _query_subtasks(self, task_id, query_text, error):
+        return self._query_subtasks(
+            task_id,
+            query_text,
+            "Error querying all subtask: %s",
+            include_messages=include_messages)
+
+    def _query_subtasks(self,
+                        task_id,
+                        query_text,
+                        error,
+                        include_messages=True):
         try:
-            with self.db_engine.connect() as conn:
+            with self.connection() as conn:
                 rs = conn.execute(query_text, parent_task_id=task_id.bytes)
                 task_list = [objects.Task.from_db(dict(r)) for r in rs]
 
-                self._assemble_tasks(task_list=task_list)
+                if include_messages:
+                    self._assemble_tasks(task_list=task_list, conn=conn)
                 for t in task_list:
                     t.statemgr = self
                 return task_list
@@ -163,62 +374,87 @@ class DrydockState(object):
 
         :param allowed_actions: list of string action names
         """
+        task_list = self.get_queued_tasks(
+            allowed_actions=allowed_actions, limit=1)
+
+        if task_list:
+            return task_list[0]
+        else:
+            return None
+
+    def get_queued_tasks(self,
+                         allowed_actions=None,
+                         limit=None,
+                         include_messages=True):
+        """Query the database for queued tasks ordered by creation timestamp.
+
+        If specified, only select tasks for one of the actions in the allowed_actions
+        list.
+
+        :param allowed_actions: list of string action names
+        :param limit: maximum number of tasks to return
+        :param include_messages: whether to load result messages
+        """
         try:
-            conn = self.db_engine.connect()
-            if allowed_actions is None:
-                query = self.tasks_tbl.select().where(
-                    self.tasks_tbl.c.status ==
-                    hd_fields.TaskStatus.Queued).order_by(
-                        self.tasks_tbl.c.created.asc())
-                rs = conn.execute(query)
-            else:
-                query = sql.text("SELECT * FROM tasks WHERE "
-                                 "status = :queued_status AND "
-                                 "action = ANY(:actions) "
-                                 "ORDER BY created ASC")
-                rs = conn.execute(
-                    query,
-                    queued_status=hd_fields.TaskStatus.Queued,
-                    actions=allowed_actions)
+            with self.connection() as conn:
+                if allowed_actions is None:
+                    query = self.tasks_tbl.select().where(
+                        self.tasks_tbl.c.status ==
+                        hd_fields.TaskStatus.Queued).order_by(
+                            self.tasks_tbl.c.created.asc()).limit(limit)
+                    rs = conn.execute(query)
+                else:
+                    query = sql.text("SELECT * FROM tasks WHERE "
+                                     "status = :queued_status AND "
+                                     "action = ANY(:actions) "
+                                     "ORDER BY created ASC "
+                                     "LIMIT :limit")
+                    rs = conn.execute(
+                        query,
+                        queued_status=hd_fields.TaskStatus.Queued,
+                        actions=allowed_actions,
+                        limit=limit)
 
-            r = rs.first()
-            conn.close()
+                task_list = [objects.Task.from_db(dict(r)) for r in rs]
 
-            if r is not None:
-                task = objects.Task.from_db(dict(r))
-                self._assemble_tasks(task_list=[task])
-                task.statemgr = self
-                return task
-            else:
-                return None
+                if include_messages:
+                    self._assemble_tasks(task_list=task_list, conn=conn)
+            for t in task_list:
+                t.statemgr = self
+
+            return task_list
         except Exception as ex:
             self.logger.error(
-                "Error querying for next queued task: %s" % str(ex),
+                "Error querying for queued tasks: %s" % str(ex),
                 exc_info=True)
-            return None
+            return []
 
-    def get_task(self, task_id):
+    def get_task(self, task_id, include_messages=True):
         """Query database for task matching task_id.
 
         :param task_id: uuid.UUID of a task_id to query against
+        :param include_messages: whether to load the task's result messages
+        :return: objects.Task instance or None if the task does not exist
         """
         try:
-            conn = self.db_engine.connect()
-            query = self.tasks_tbl.select().where(
-                self.tasks_tbl.c.task_id == task_id.bytes)
-            rs = conn.execute(query)
+            with self.connection() as conn:
+                query = self.tasks_tbl.select().where(
+                    self.tasks_tbl.c.task_id == task_id.bytes)
+                rs = conn.execute(query)
 
-            r = rs.fetchone()
+                r = rs.fetchone()
+                if r is None:
+                    return None
 
-            task = objects.Task.from_db(dict(r))
+                task = objects.Task.from_db(dict(r))
 
-            self.logger.debug(
-                "Assembling result messages for task %s." % str(task.task_id))
-            self._assemble_tasks(task_list=[task])
+                if include_messages:
+                    self.logger.debug(
+                        "Assembling result messages for task %s." % str(
+                            task.task_id))
+                    self._assemble_tasks(task_list=[task], conn=conn)
             task.statemgr = self
 
-            conn.close()
-
             return task
 
         except Exception as ex:
@@ -233,12 +469,30 @@ class DrydockState(object):
         :param task_id: uuid.UUID ID of the task the msg belongs to
         :param msg: instance of objects.TaskStatusMessage
         """
+        return self.post_result_messages(task_id, [msg])
+
+    def post_result_messages(self, task_id, msg_list, batch_size=1000):
+        """Add result messages attached to task task_id in list order.
+
+        Messages are written with multi-row INSERTs so the assigned
+        ``sequence`` values follow the order of ``msg_list``.
+
+        :param task_id: uuid.UUID ID of the task the messages belong to
+        :param msg_list: list of objects.TaskStatusMessage instances
+        :param batch_size: maximum number of rows per INSERT statement
+        """
+        if not msg_list:
+            return True
+
         try:
-            conn = self.db_engine.connect()
-            query = self.result_message_tbl.insert().values(
-                task_id=task_id.bytes, **(msg.to_db()))
-            conn.execute(query)
-            conn.close()
+            rows = [
+                dict(task_id=task_id.bytes, **(m.to_db())) for m in msg_list
+            ]
+            with self.connection() as conn:
+                for i in range(0, len(rows), batch_size):
+                    query = self.result_message_tbl.insert().values(
+                        rows[i:i + batch_size])
+                    conn.execute(query)
             return True
         except Exception as ex:
             self.logger.error(
@@ -246,32 +500,38 @@ class DrydockState(object):
                 (str(task_id), str(ex)))
             return False
 
-    def _assemble_tasks(self, task_list=None):
+    def _assemble_tasks(self, task_list=None, conn=None):
         """Attach all the appropriate result messages to the tasks in the list.
 
+        Messages for all tasks are loaded with a single query.
+
         :param task_list: a list of objects.Task instances to attach result messages to
+        :param conn: optional connection to run the query on
         """
         if task_list is None:
             return None
 
-        conn = self.db_engine.connect()
-        query = sql.select([
-            self.result_message_tbl
-        ]).where(self.result_message_tbl.c.task_id == sql.bindparam(
-            'task_id')).order_by(self.result_message_tbl.c.sequence.asc())
-        query.compile(self.db_engine)
+        if not task_list:
+            return
 
-        for t in task_list:
-            rs = conn.execute(query, task_id=t.task_id.bytes)
-            error_count = 0
+        query = sql.text(
+            "SELECT * FROM result_message "
+            "WHERE task_id = ANY(:task_ids) "
+            "ORDER BY task_id, sequence ASC")
+
+        with self.connection(conn) as conn:
+            rs = conn.execute(
+                query, task_ids=list(set(t.task_id.bytes for t in task_list)))
+
+            task_msgs = dict()
             for r in rs:
-                msg = objects.TaskStatusMessage.from_db(dict(r))
-                if msg.error:
-                    error_count = error_count + 1
-                t.result.message_list.append(msg)
-            t.result.error_count = error_count
+                task_msgs.setdefault(bytes(r['task_id']), []).append(
+                    objects.TaskStatusMessage.from_db(dict(r)))
 
-        conn.close()
+        for t in task_list:
+            msgs = task_msgs.get(t.task_id.bytes, [])
+            t.result.message_list.extend(msgs)
+            t.result.error_count = len([m for m in msgs if m.error])
 
     def post_task(self, task):
         """Insert a task into the database.
@@ -281,34 +541,113 @@ class DrydockState(object):
         :param task: instance of objects.Task to insert into the database.
         """
         try:
-            conn = self.db_engine.connect()
-            query = self.tasks_tbl.insert().values(
-                **(task.to_db(include_id=True)))
-            conn.execute(query)
-            conn.close()
+            with self.connection() as conn:
+                query = self.tasks_tbl.insert().values(
+                    **(task.to_db(include_id=True)))
+                conn.execute(query)
+                self._notify(conn, TASK_CHANNEL, task_event_payload(task))
             return True
         except Exception as ex:
             self.logger.error("Error inserting task %s: %s" %
                               (str(task.task_id), str(ex)))
             return False
 
+    def get_task_termination(self, task_id):
+        """Query the status and termination fields of a task.
+
+        Returns a dictionary with keys ``status``, ``terminate``,
+        ``terminated`` and ``terminated_by`` or None if the task does not
+        exist or the query failed.
+
+        :param task_id: uuid.UUID of the task
+        """
+        try:
+            query = sql.select([
+                self.tasks_tbl.c.status, self.tasks_tbl.c.terminate,
+                self.tasks_tbl.c.terminated, self.tasks_tbl.c.terminated_by
+            ]).where(self.tasks_tbl.c.task_id == task_id.bytes)
+            with self.connection() as conn:
+                r = conn.execute(query).fetchone()
+            return dict(r) if r is not None else None
+        except Exception as ex:
+            self.logger.error(
+                "Error querying termination of task %s: %s" % (str(task_id),
+                                                               str(ex)))
+            return None
+
     def put_task(self, task):
         """Update a task in the database.
 
+        Termination is resolved in the same statement: a status of
+        Terminating or Terminated already in the database is not overwritten
+        (other than Terminating becoming Terminated) and a termination
+        request recorded by another process is kept. The task is updated
+        with the resulting status and termination fields.
+
+        If ``task.lease`` is set the update is rejected unless it is still
+        the current leadership lease, so a deposed leader cannot overwrite
+        tasks. Updates without a lease are not fenced.
+
         :param task: objects.Task instance to reference for update values
         """
         try:
-            conn = self.db_engine.connect()
+            values = task.to_db(include_id=False)
+
+            if task.status == hd_fields.TaskStatus.Terminated:
+                protected = [hd_fields.TaskStatus.Terminated]
+            else:
+                protected = [
+                    hd_fields.TaskStatus.Terminating,
+                    hd_fields.TaskStatus.Terminated
+                ]
+            values['status'] = sql.case(
+                [(self.tasks_tbl.c.status.in_(protected),
+                  self.tasks_tbl.c.status)],
+                else_=sql.literal(task.status))
+
+            if not task.terminate:
+                for f in ['terminate', 'terminated', 'terminated_by']:
+                    values.pop(f)
+
+            # Fencing: a task executed under a leadership lease can only be
+            # updated while that lease is current. Writers outside the
+            # orchestrator, e.g. termination requests, keep the stored lease.
+            if task.lease is None:
+                values.pop('lease')
+                fence = sql.true()
+            else:
+                current_lease = sql.select([
+                    self.active_instance_tbl.c.lease
+                ]).where(self.active_instance_tbl.c.dummy_key == 1).as_scalar()
+                fence = sql.and_(
+                    sql.or_(self.tasks_tbl.c.lease.is_(None),
+                            self.tasks_tbl.c.lease == task.lease),
+                    current_lease == task.lease)
+
             query = self.tasks_tbl.update().where(
-                self.tasks_tbl.c.task_id == task.task_id.bytes).values(
-                    **(task.to_db(include_id=False)))
-            rs = conn.execute(query)
-            if rs.rowcount == 1:
-                conn.close()
+                sql.and_(self.tasks_tbl.c.task_id == task.task_id.bytes,
+                         fence)).values(
+                    **values).returning(self.tasks_tbl.c.status,
+                                        self.tasks_tbl.c.terminate,
+                                        self.tasks_tbl.c.terminated,
+                                        self.tasks_tbl.c.terminated_by)
+            with self.connection() as conn:
+                r = conn.execute(query).fetchone()
+                if r is None:
+                    self.logger.warning(
+                        "Task %s not updated, it does not exist or lease %s "
+                        "is no longer current." % (str(task.task_id),
+                                                   str(task.lease)))
+                    return False
+
+                task.status = r['status']
+                if r['terminate'] and not task.terminate:
+                    task.terminate = True
+                    task.terminated = r['terminated']
+                    task.terminated_by = r['terminated_by']
+
+                self._notify(conn, TASK_CHANNEL, task_event_payload(task))
                 return True
-            else:
-                conn.close()
-                return False
         except Exception as ex:
             self.logger.error("Error updating task %s: %s" %
                               (str(task.task_id), str(ex)))
@@ -326,13 +665,12 @@ class DrydockState(object):
             "WHERE task_id = :task_id").execution_options(autocommit=True)
 
         try:
-            conn = self.db_engine.connect()
-            rs = conn.execute(
-                query_string,
-                new_subtask=subtask_id.bytes,
-                task_id=task_id.bytes)
-            rc = rs.rowcount
-            conn.close()
+            with self.connection() as conn:
+                rs = conn.execute(
+                    query_string,
+                    new_subtask=subtask_id.bytes,
+                    task_id=task_id.bytes)
+                rc = rs.rowcount
             if rc == 1:
                 return True
             else:
@@ -342,19 +680,27 @@ class DrydockState(object):
                               (str(subtask_id), str(task_id), str(ex)))
             return False
 
-    def maintain_leadership(self, leader_id):
+    def maintain_leadership(self, leader_id, lease=None):
         """The active leader reaffirms its existence.
 
+        Returns True if leadership was renewed, False if ``leader_id`` no
+        longer holds it and None on a database error.
+
         :param leader_id: uuid.UUID ID of the leader
+        :param lease: optional lease token returned by ``claim_leadership``
+                      that must still be current
         """
         try:
-            conn = self.db_engine.connect()
-            query = self.active_instance_tbl.update().where(
-                self.active_instance_tbl.c.identity == leader_id.bytes).values(
-                    last_ping=datetime.utcnow())
-            rs = conn.execute(query)
-            rc = rs.rowcount
-            conn.close()
+            with self.connection() as conn:
+                query = self.active_instance_tbl.update().where(
+                    self.active_instance_tbl.c.identity == leader_id.bytes)
+                if lease is not None:
+                    query = query.where(
+                        self.active_instance_tbl.c.lease == lease)
+                query = query.values(
+                    last_ping=sql.func.timezone('UTC', sql.func.now()))
+                rs = conn.execute(query)
+                rc = rs.rowcount
 
             if rc == 1:
                 return True
@@ -372,29 +718,33 @@ class DrydockState(object):
         current active instance and succeed. If leadership has not been claimed, this call will
         succeed.
 
+        A successful claim returns the lease token of the leadership term. Each change of
+        leader increments the token, so it can be used to fence writes from a deposed leader.
+        A failed claim returns False.
+
         All leadership claims by an instance should use the same leader_id
 
         :param leader_id: a uuid.UUID instance identifying the instance to be considered active
         """
         query_string = sql.text(  # nosec no strings are user-sourced
-            "INSERT INTO active_instance (dummy_key, identity, last_ping) "
-            "VALUES (1, :instance_id, timezone('UTC', now())) "
+            "INSERT INTO active_instance (dummy_key, identity, last_ping, lease) "
+            "VALUES (1, :instance_id, timezone('UTC', now()), 1) "
             "ON CONFLICT (dummy_key) DO UPDATE SET "
-            "identity = :instance_id, last_ping = timezone('UTC', now()) "
+            "identity = :instance_id, last_ping = timezone('UTC', now()), "
+            "lease = COALESCE(active_instance.lease, 0) + 1 "
             "WHERE active_instance.last_ping < (now() - interval '%d seconds')"
             % (config.config_mgr.conf.leader_grace_period
                )).execution_options(autocommit=True)
 
         try:
-            conn = self.db_engine.connect()
-            conn.execute(query_string, instance_id=leader_id.bytes)
-            check_query = self.active_instance_tbl.select().where(
-                self.active_instance_tbl.c.identity == leader_id.bytes)
-            rs = conn.execute(check_query)
-            r = rs.fetchone()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute(query_string, instance_id=leader_id.bytes)
+                check_query = self.active_instance_tbl.select().where(
+                    self.active_instance_tbl.c.identity == leader_id.bytes)
+                rs = conn.execute(check_query)
+                r = rs.fetchone()
             if r is not None:
-                return True
+                return r['lease']
             else:
                 return False
         except Exception as ex:
@@ -407,12 +757,11 @@ class DrydockState(object):
         :param leader_id: a uuid.UUID instance identifying the instance giving up leadership
         """
         try:
-            conn = self.db_engine.connect()
-            query = self.active_instance_tbl.delete().where(
-                self.active_instance_tbl.c.identity == leader_id.bytes)
-            rs = conn.execute(query)
-            rc = rs.rowcount
-            conn.close()
+            with self.connection() as conn:
+                query = self.active_instance_tbl.delete().where(
+                    self.active_instance_tbl.c.identity == leader_id.bytes)
+                rs = conn.execute(query)
+                rc = rs.rowcount
 
             if rc == 1:
                 return True
@@ -434,7 +783,7 @@ class DrydockState(object):
                          header when accessing the boot action API
         """
         try:
-            with self.db_engine.connect() as conn:
+            with self.connection() as conn:
                 query = sql.text(
                     "INSERT INTO boot_action AS ba1 (node_name, task_id, identity_key) "
                     "VALUES (:node, :task_id, :identity) "
@@ -456,6 +805,54 @@ class DrydockState(object):
                 exc_info=ex)
             return False
 
+    def post_boot_action_contexts(self, task_id, identity_keys, boot_actions):
+        """Save boot action contexts and boot actions for many nodes at once.
+
+        All rows are written in one transaction with a multi-row upsert of
+        the contexts and a multi-row insert of the boot actions.
+
+        :param task_id: The uuid.UUID task id instigating the node deployments
+        :param identity_keys: dictionary of node name to the 32 byte identity key
+                              the node must provide to the boot action API
+        :param boot_actions: list of dictionaries with ``node_name``, ``action_id``,
+                             ``action_name`` and ``action_status`` keys
+        """
+        if not identity_keys:
+            return True
+
+        try:
+            ctx_query = pg_insert(self.boot_action_tbl).values([
+                dict(node_name=n, task_id=task_id.bytes, identity_key=k)
+                for n, k in identity_keys.items()
+            ])
+            ctx_query = ctx_query.on_conflict_do_update(
+                index_elements=['node_name'],
+                set_=dict(
+                    task_id=ctx_query.excluded.task_id,
+                    identity_key=ctx_query.excluded.identity_key))
+
+            with self.connection() as conn:
+                with conn.begin():
+                    conn.execute(ctx_query)
+                    if boot_actions:
+                        conn.execute(self.ba_status_tbl.insert().values([
+                            dict(
+                                node_name=ba['node_name'],
+                                action_id=ba['action_id'],
+                                action_name=ba['action_name'],
+                                task_id=task_id.bytes,
+                                identity_key=identity_keys[ba['node_name']],
+                                action_status=ba['action_status'])
+                            for ba in boot_actions
+                        ]))
+            return True
+        except Exception as ex:
+            self.logger.error(
+                "Error posting boot action contexts for nodes %s" % ', '.join(
+                    identity_keys.keys()),
+                exc_info=ex)
+            return False
+
     def get_boot_action_context(self, nodename):
         """Get the boot action context for a node.
 
@@ -464,7 +861,7 @@ class DrydockState(object):
         :param nodename: Name of the node
         """
         try:
-            with self.db_engine.connect() as conn:
+            with self.connection() as conn:
                 query = self.boot_action_tbl.select().where(
                     self.boot_action_tbl.c.node_name == nodename)
                 rs = conn.execute(query)
@@ -499,7 +896,7 @@ class DrydockState(object):
         :param action_status: The status of the action.
         """
         try:
-            with self.db_engine.connect() as conn:
+            with self.connection() as conn:
                 query = self.ba_status_tbl.insert().values(
                     node_name=nodename,
                     action_id=action_id,
@@ -523,11 +920,12 @@ class DrydockState(object):
         :param action_status: The string statu to set for the boot action
         """
         try:
-            with self.db_engine.connect() as conn:
+            with self.connection() as conn:
                 query = self.ba_status_tbl.update().where(
                     self.ba_status_tbl.c.action_id == ulid2.decode_ulid_base32(
                         action_id)).values(action_status=action_status)
                 conn.execute(query)
+                self._notify(conn, BOOTACTION_CHANNEL, action_id)
                 return True
         except Exception as ex:
             self.logger.error(
@@ -543,10 +941,29 @@ class DrydockState(object):
 
         :param nodename: string nodename of the target node
         """
+        actions = self.get_boot_actions_for_nodes([nodename])
+        if actions is None:
+            return None
+        return actions.get(nodename, dict())
+
+    def get_boot_actions_for_nodes(self, nodenames, action_status=None):
+        """Query the boot action statuses of many nodes at once.
+
+        Return a dictionary keyed by node name of dictionaries of boot
+        action dictionaries keyed by the boot action name. Nodes without
+        boot actions are omitted.
+
+        :param nodenames: list of string nodenames
+        :param action_status: optional list of action statuses to select
+        """
         try:
-            with self.db_engine.connect() as conn:
+            with self.connection() as conn:
                 query = self.ba_status_tbl.select().where(
-                    self.ba_status_tbl.c.node_name == nodename)
+                    self.ba_status_tbl.c.node_name.in_(list(nodenames)))
+                if action_status is not None:
+                    query = query.where(
+                        self.ba_status_tbl.c.action_status.in_(
+                            list(action_status)))
                 rs = conn.execute(query)
                 actions = dict()
                 for r in rs:
@@ -554,11 +971,14 @@ class DrydockState(object):
                     ba_dict['action_id'] = bytes(ba_dict['action_id'])
                     ba_dict['identity_key'] = bytes(ba_dict['identity_key'])
                     ba_dict['task_id'] = uuid.UUID(bytes=ba_dict['task_id'])
-                    actions[ba_dict.get('action_name', 'undefined')] = ba_dict
+                    node_actions = actions.setdefault(ba_dict['node_name'],
+                                                      dict())
+                    node_actions[ba_dict.get('action_name',
+                                             'undefined')] = ba_dict
                 return actions
         except Exception as ex:
             self.logger.error(
-                "Error selecting boot actions for node %s" % nodename,
+                "Error selecting boot actions for %d nodes" % len(nodenames),
                 exc_info=ex)
             return None
 
@@ -568,7 +988,7 @@ class DrydockState(object):
         :param action_id: string ULID bootaction id
         """
         try:
-            with self.db_engine.connect() as conn:
+            with self.connection() as conn:
                 query = self.ba_status_tbl.select().where(
                     self.ba_status_tbl.c.action_id == ulid2.decode_ulid_base32(
                         action_id))
@@ -591,16 +1011,112 @@ class DrydockState(object):
 
         :param build_data: objects.BuildData instance to write
         """
+        return self.post_build_data_list([build_data])
+
+    def post_build_data_list(self, build_data_list):
+        """Write build data elements to the database in one transaction.
+
+        Each distinct payload is stored once in build_data_content keyed by
+        its SHA-256 hash and compressed as configured by
+        ``[database] build_data_compression``. All elements are inserted
+        with a single statement.
+
+        :param build_data_list: list of objects.BuildData instances to write
+        """
+        if not build_data_list:
+            return True
+
         try:
-            with self.db_engine.connect() as conn:
-                query = self.build_data_tbl.insert().values(
-                    **build_data.to_db())
-                conn.execute(query)
-                return True
+            contents = dict()
+            rows = []
+            for bd in build_data_list:
+                if bd.data_element is None:
+                    raise errors.BuildDataError(
+                        "Build data from %s for %s has no data_element." %
+                        (bd.generator, bd.node_name))
+                row = bd.to_db()
+                payload = row.pop('data_element').encode('utf-8')
+                content_hash = hashlib.sha256(payload).digest()
+                if content_hash not in contents:
+                    encoding, data = self._encode_build_data(payload)
+                    contents[content_hash] = dict(
+                        content_hash=content_hash,
+                        encoding=encoding,
+                        data=data)
+                row['content_hash'] = content_hash
+                rows.append(row)
+
+            with self.connection() as conn:
+                with conn.begin():
+                    conn.execute(
+                        pg_insert(self.build_data_content_tbl).values(
+                            list(contents.values())).on_conflict_do_nothing(
+                                index_elements=['content_hash']))
+                    conn.execute(self.build_data_tbl.insert().values(rows))
+            return True
         except Exception as ex:
             self.logger.error("Error saving build data.", exc_info=ex)
             return False
 
+    @staticmethod
+    def _encode_build_data(payload):
+        """Compress a build data payload for storage.
+
+        :param payload: bytes of the build data element
+        :returns: tuple of encoding name and stored bytes
+        """
+        if config.config_mgr.conf.database.build_data_compression == 'zlib':
+            return 'zlib', zlib.compress(payload)
+        return 'identity', payload
+
+    @staticmethod
+    def _decode_build_data(encoding, data):
+        """Restore a build data element stored by ``_encode_build_data``.
+
+        :param encoding: encoding name the payload was stored with
+        :param data: stored bytes
+        """
+        if encoding == 'zlib':
+            data = zlib.decompress(data)
+        elif encoding != 'identity':
+            raise errors.BuildDataError(
+                "Unknown build data encoding %s." % encoding)
+        return data.decode('utf-8')
+
+    def _assemble_build_data(self, rows, conn=None):
+        """Create BuildData instances loading their payloads in one query.
+
+        Rows written before payloads were deduplicated carry the payload in
+        ``data_element`` instead of a ``content_hash``. Rows selected without
+        either column produce instances without ``data_element``.
+
+        :param rows: list of build_data result rows
+        :param conn: optional connection to run the query on
+        """
+        hashes = set(
+            bytes(r['content_hash']) for r in rows
+            if 'content_hash' in r.keys() and r['content_hash'] is not None)
+
+        contents = dict()
+        if hashes:
+            query = sql.text("SELECT * FROM build_data_content "
+                             "WHERE content_hash = ANY(:content_hashes)")
+            with self.connection(conn) as conn:
+                rs = conn.execute(query, content_hashes=list(hashes))
+                for c in rs:
+                    contents[bytes(c['content_hash'])] = (
+                        self._decode_build_data(c['encoding'],
+                                                bytes(c['data'])))
+
+        build_data = []
+        for r in rows:
+            d = dict(r)
+            content_hash = d.pop('content_hash', None)
+            if content_hash is not None:
+                d['data_element'] = contents.get(bytes(content_hash))
+            build_data.append(objects.BuildData.from_db(d))
+        return build_data
+
     def get_build_data(self,
                        node_name=None,
                        task_id=None,
@@ -622,57 +1138,85 @@ class DrydockState(object):
                           be. 1 is summary, 2 includes the collected data
         :returns: list of objects.BuildData instances
         """
-        # TODO(sh8121att) possibly optimize queries by changing select column
-        # list based on verbosity
+        if latest and not task_id:
+            return self.get_latest_build_data(
+                node_names=[node_name] if node_name else None,
+                verbosity=verbosity)
+
         try:
-            with self.db_engine.connect() as conn:
-                if node_name and task_id:
-                    query = self.build_data_tbl.select().where(
-                        self.build_data_tbl.c.node_name == node_name
-                        and self.build_data_tbl.c.task_id == task_id.bytes
-                    ).order_by(self.build_data_tbl.c.collected_date.desc())
-                    rs = conn.execute(query)
-                elif node_name:
-                    if latest:
-                        query = sql.text(
-                            'SELECT DISTINCT ON (generator) build_data.* '
-                            'FROM build_data '
-                            'WHERE build_data.node_name = :nodename '
-                            'ORDER BY generator, build_data.collected_date DESC'
-                        )
-                        rs = conn.execute(query, nodename=node_name)
-                    else:
-                        query = self.build_data_tbl.select().where(
-                            self.build_data_tbl.c.node_name == node_name)
-                        rs = conn.execute(query)
-                elif task_id:
-                    query = self.build_data_tbl.select().where(
+            with self.connection() as conn:
+                query = sql.select(self._build_data_columns(verbosity))
+                if node_name:
+                    query = query.where(
+                        self.build_data_tbl.c.node_name == node_name)
+                if task_id:
+                    query = query.where(
                         self.build_data_tbl.c.task_id == task_id.bytes)
-                    rs = conn.execute(query)
-                else:
-                    if latest:
-                        query = sql.text(
-                            'SELECT DISTINCT ON (generator), build_data.* '
-                            'FROM build_data '
-                            'ORDER BY generator, build_data.collected.date DESC'
-                        )
-                        rs = conn.execute(query)
-                    else:
-                        query = self.build_data_tbl.select()
-                        rs = conn.execute(query)
-
-                result_data = rs.fetchall()
-
-            return [objects.BuildData.from_db(dict(r)) for r in result_data]
+                query = query.order_by(
+                    self.build_data_tbl.c.collected_date.desc())
+
+                result_data = conn.execute(query).fetchall()
+
+                return self._assemble_build_data(result_data, conn)
         except Exception as ex:
             self.logger.error("Error selecting build data.", exc_info=ex)
             raise errors.BuildDataError("Error selecting build data.")
 
+    def get_latest_build_data(self,
+                              node_names=None,
+                              generators=None,
+                              verbosity=2):
+        """Retrieve the latest build data for each node and generator.
+
+        Data for any number of nodes is selected with a single query
+        backed by the (node_name, generator, collected_date) index.
+
+        :param node_names: list of node names to filter on, None for all nodes
+        :param generators: list of generators to filter on (e.g. ``['lshw']``),
+                           None for all generators
+        :param verbosity: integer of how verbose the response should
+                          be. 1 is summary, 2 includes the collected data
+        :returns: list of objects.BuildData instances
+        """
+        if node_names is not None and not node_names:
+            return []
+
+        bd = self.build_data_tbl
+        try:
+            with self.connection() as conn:
+                query = sql.select(self._build_data_columns(verbosity)).distinct(
+                    bd.c.node_name, bd.c.generator)
+                if node_names is not None:
+                    query = query.where(bd.c.node_name.in_(node_names))
+                if generators is not None:
+                    query = query.where(bd.c.generator.in_(generators))
+                query = query.order_by(bd.c.node_name, bd.c.generator,
+                                       bd.c.collected_date.desc())
+
+                result_data = conn.execute(query).fetchall()
+
+                return self._assemble_build_data(result_data, conn)
+        except Exception as ex:
+            self.logger.error("Error selecting build data.", exc_info=ex)
+            raise errors.BuildDataError("Error selecting build data.")
+
+    def _build_data_columns(self, verbosity):
+        """Columns to select from build_data for a verbosity level.
+
+        :param verbosity: 1 omits the collected data, 2 includes it
+        """
+        if verbosity > 1:
+            return [self.build_data_tbl]
+        return [
+            c for c in self.build_data_tbl.c
+            if c.name not in ('data_element', 'content_hash')
+        ]
+
     def get_now(self):
         """Query the database for now() from dual.
         """
         try:
-            with self.db_engine.connect() as conn:
+            with self.connection() as conn:
                 query = sql.text("SELECT now()")
                 rs = conn.execute(query)
 
@@ -144,7 +144,12 @@ def mock_get_build_data(drydock_state):
 
     drydock_state.real_get_build_data = drydock_state.get_build_data
     drydock_state.get_build_data = Mock(side_effect=side_effect)
+    drydock_state.real_get_latest_build_data = (
+        drydock_state.get_latest_build_data)
+    drydock_state.get_latest_build_data = Mock(side_effect=side_effect)
 
     yield
     drydock_state.get_build_data = Mock(wraps=None, side_effect=None)
     drydock_state.get_build_data = drydock_state.real_get_build_data
+    drydock_state.get_latest_build_data = (
+        drydock_state.real_get_latest_build_data)
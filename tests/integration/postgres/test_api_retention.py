@@ -0,0 +1,100 @@
+# Copyright 2018 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test retention API with Postgres backend."""
+import pytest
+from falcon import testing
+
+import concurrent.futures
+import json
+import time
+
+from drydock_provisioner import policy
+from drydock_provisioner.control.api import start_api
+
+import falcon
+
+
+class TestRetentionApi():
+    hdr = {
+        'Content-Type': 'application/json',
+        'X-IDENTITY-STATUS': 'Confirmed',
+        'X-USER-NAME': 'Test',
+        'X-ROLES': 'admin'
+    }
+
+    def test_retention_dry_run(self, falcontest, blank_state):
+        """Test that a dry run reports counts for each table."""
+        resp = falcontest.simulate_post(
+            '/api/v1.0/retention',
+            headers=self.hdr,
+            body=json.dumps({
+                'dry_run': True
+            }))
+
+        assert resp.status == falcon.HTTP_200
+        body = json.loads(resp.text)
+        assert body['dry_run'] is True
+        assert body['deleted'] == dict(
+            tasks=0,
+            result_message=0,
+            build_data=0,
+            build_data_content=0,
+            boot_action_status=0)
+
+    def test_retention_bad_body(self, falcontest, blank_state):
+        """Test that a non-boolean dry_run is rejected."""
+        resp = falcontest.simulate_post(
+            '/api/v1.0/retention',
+            headers=self.hdr,
+            body=json.dumps({
+                'dry_run': 'yes'
+            }))
+
+        assert resp.status == falcon.HTTP_400
+
+    def test_retention_started(self, falcontest, blank_state,
+                               deckhand_orchestrator):
+        """Test that a run is started in the background."""
+        resp = falcontest.simulate_post(
+            '/api/v1.0/retention', headers=self.hdr, body='{}')
+
+        assert resp.status == falcon.HTTP_202
+        assert json.loads(resp.text) == dict(dry_run=False, started=True)
+
+        _, run = deckhand_orchestrator.retention_run
+        assert run.result(10)['tasks'] == 0
+
+    def test_retention_in_progress(self, falcontest, blank_state,
+                                   deckhand_orchestrator):
+        """Test that a run is rejected while another one is active."""
+        deckhand_orchestrator.retention_run = (time.monotonic(),
+                                               concurrent.futures.Future())
+
+        resp = falcontest.simulate_post(
+            '/api/v1.0/retention', headers=self.hdr, body='{}')
+
+        assert resp.status == falcon.HTTP_409
+
+    @pytest.fixture()
+    def falcontest(self, drydock_state, deckhand_ingester,
+                   deckhand_orchestrator):
+        """Create a test harness for the the Falcon API framework."""
+        policy.policy_engine = policy.DrydockPolicy()
+        policy.policy_engine.register_policy()
+
+        return testing.TestClient(
+            start_api(
+                state_manager=drydock_state,
+                ingester=deckhand_ingester,
+                orchestrator=deckhand_orchestrator))
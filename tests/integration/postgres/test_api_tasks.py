@@ -16,10 +16,12 @@ import pytest
 from falcon import testing
 
 import json
+import uuid
 
 import drydock_provisioner.objects.fields as hd_fields
 import drydock_provisioner.objects as objects
 
+from drydock_provisioner import config
 from drydock_provisioner import policy
 from drydock_provisioner.control.api import start_api
 from drydock_provisioner.control.base import DrydockRequestContext
@@ -44,6 +46,90 @@ class TestTasksApi():
 
         assert resp.status == falcon.HTTP_200
 
+    def test_read_tasks_paged(self, falcontest, blank_state,
+                              deckhand_orchestrator):
+        """Test that the tasks list can be filtered and paged."""
+        hdr = {
+            'Content-Type': 'application/json',
+            'X-IDENTITY-STATUS': 'Confirmed',
+            'X-USER-NAME': 'Test',
+            'X-ROLES': 'admin'
+        }
+        url = '/api/v1.0/tasks'
+
+        tasks = [
+            deckhand_orchestrator.create_task(
+                action=hd_fields.OrchestratorAction.Noop,
+                design_ref='http://foo.com') for _ in range(5)
+        ]
+        subtask = deckhand_orchestrator.create_task(
+            action=hd_fields.OrchestratorAction.Noop,
+            design_ref='http://foo.com')
+        tasks[0].register_subtask(subtask)
+
+        seen = []
+        marker = None
+        while True:
+            qs = "limit=2&top_level=true&messages=false&fields=task_id,status"
+            if marker:
+                qs = qs + "&marker=%s" % marker
+            resp = falcontest.simulate_get(url, headers=hdr, query_string=qs)
+            assert resp.status == falcon.HTTP_200
+            for t in resp.json:
+                assert set(t.keys()) == set(['task_id', 'status'])
+                seen.append(t['task_id'])
+            marker = resp.headers.get('X-Next-Marker')
+            if not marker:
+                break
+
+        assert seen == [str(t.get_id()) for t in tasks]
+
+    def test_read_tasks_default_page(self, falcontest, blank_state,
+                                     deckhand_orchestrator):
+        """Test that the tasks list is paged without a requested limit."""
+        hdr = {
+            'Content-Type': 'application/json',
+            'X-IDENTITY-STATUS': 'Confirmed',
+            'X-USER-NAME': 'Test',
+            'X-ROLES': 'admin'
+        }
+        url = '/api/v1.0/tasks'
+
+        tasks = [
+            deckhand_orchestrator.create_task(
+                action=hd_fields.OrchestratorAction.Noop,
+                design_ref='http://foo.com') for _ in range(3)
+        ]
+
+        conf = config.config_mgr.conf
+        conf.set_override(name='task_list_page_size', override=2)
+        try:
+            resp = falcontest.simulate_get(url, headers=hdr)
+        finally:
+            conf.clear_override(name='task_list_page_size')
+
+        assert resp.status == falcon.HTTP_200
+        assert [t['task_id'] for t in resp.json
+                ] == [str(t.get_id()) for t in tasks[:2]]
+        assert resp.headers.get('X-Next-Marker') == str(tasks[1].get_id())
+
+    def test_read_tasks_bad_params(self, falcontest, blank_state):
+        """Test that invalid list parameters are rejected."""
+        hdr = {
+            'Content-Type': 'application/json',
+            'X-IDENTITY-STATUS': 'Confirmed',
+            'X-USER-NAME': 'Test',
+            'X-ROLES': 'admin'
+        }
+        url = '/api/v1.0/tasks'
+
+        for qs in [
+                'limit=0', 'created_after=yesterday', 'marker=foo',
+                'marker=%s' % str(uuid.uuid4())
+        ]:
+            resp = falcontest.simulate_get(url, headers=hdr, query_string=qs)
+            assert resp.status == falcon.HTTP_400
+
     def test_read_tasks_builddata(self, falcontest, blank_state,
                                   deckhand_orchestrator):
         """Test that the tasks API includes build data when prompted."""
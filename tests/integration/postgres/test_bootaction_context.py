@@ -19,6 +19,7 @@ import falcon
 
 from falcon import testing
 
+import drydock_provisioner.config as config
 import drydock_provisioner.objects.fields as hd_fields
 
 from drydock_provisioner.control.api import start_api
@@ -39,6 +40,95 @@ class TestBootActionContext(object):
             t = tarfile.open(mode='r:gz', fileobj=fileobj)
             t.close()
 
+    def test_bootaction_context_etag(self, falcontest,
+                                     seed_bootaction_multinode):
+        """Test that an unchanged tarball is not sent again."""
+        n, c = next(iter(seed_bootaction_multinode.items()))
+        url = "/api/v1.0/bootactions/nodes/%s/units" % n
+        auth_hdr = {'X-Bootaction-Key': "%s" % c['identity_key']}
+
+        result = falcontest.simulate_get(url, headers=auth_hdr)
+        assert result.status == falcon.HTTP_200
+        etag = result.headers.get('ETag')
+        assert etag is not None
+
+        auth_hdr['If-None-Match'] = etag
+        result = falcontest.simulate_get(url, headers=auth_hdr)
+        assert result.status == falcon.HTTP_304
+
+    def test_bootaction_context_streamed(self, stream_tarballs, falcontest,
+                                         seed_bootaction_multinode):
+        """Test that tarballs too large to buffer are streamed."""
+        for n, c in seed_bootaction_multinode.items():
+            url = "/api/v1.0/bootactions/nodes/%s/files" % n
+            auth_hdr = {'X-Bootaction-Key': "%s" % c['identity_key']}
+
+            result = falcontest.simulate_get(url, headers=auth_hdr)
+
+            assert result.status == falcon.HTTP_200
+            assert 'Content-Length' not in result.headers
+
+            fileobj = io.BytesIO(result.content)
+            t = tarfile.open(mode='r:gz', fileobj=fileobj)
+            t.close()
+
+    def test_bootaction_bundle_design_change(
+            self, blank_state, deckhand_orchestrator, input_files, tmpdir,
+            mock_get_build_data):
+        """Test that a design changed in place is rendered again."""
+        design_file = tmpdir.join("deckhand_fullsite.yaml")
+        design_file.write(input_files.join("deckhand_fullsite.yaml").read())
+        design_ref = "file://%s" % design_file
+        test_task = deckhand_orchestrator.create_task(
+            action=hd_fields.OrchestratorAction.Noop, design_ref=design_ref)
+
+        design_status, design_data = deckhand_orchestrator.get_effective_site(
+            design_ref)
+        n = design_data.baremetal_nodes[0].name
+        id_key = deckhand_orchestrator.create_bootaction_context(n, test_task)
+        ba_ctx = dict(
+            node_name=n, task_id=test_task.get_id(), identity_key=id_key)
+
+        bundles = deckhand_orchestrator.bootaction_bundles
+        bundle = bundles.get(ba_ctx, 'all')
+        assert bundles.get(ba_ctx, 'all') is bundle
+
+        design_file.write("# changed\n", mode='a')
+
+        assert bundles.get(ba_ctx, 'all') is not bundle
+        assert bundles.stats()['entries'] == 1
+
+    def test_bootaction_context_bulk(self, blank_state, deckhand_orchestrator,
+                                     input_files, mock_get_build_data):
+        """Test that contexts for many nodes are saved together."""
+        input_file = input_files.join("deckhand_fullsite.yaml")
+        design_ref = "file://%s" % input_file
+        test_task = deckhand_orchestrator.create_task(
+            action=hd_fields.OrchestratorAction.Noop, design_ref=design_ref)
+
+        design_status, design_data = deckhand_orchestrator.get_effective_site(
+            design_ref)
+        node_names = [n.name for n in design_data.baremetal_nodes]
+
+        id_keys = deckhand_orchestrator.create_bootaction_contexts(
+            node_names + ['unknown'], test_task, site_design=design_data)
+
+        assert sorted(id_keys.keys()) == sorted(node_names)
+        for n in node_names:
+            ctx = blank_state.get_boot_action_context(n)
+            assert ctx['identity_key'] == id_keys[n]
+            assert ctx['task_id'] == test_task.get_id()
+
+            actions = blank_state.get_boot_actions_for_node(n)
+            expected = [
+                ba.name for ba in design_data.bootactions
+                if n in ba.target_nodes
+            ]
+            assert sorted(a['action_name']
+                          for a in actions.values()) == sorted(expected)
+            assert all(a['identity_key'] == id_keys[n]
+                       for a in actions.values())
+
     @pytest.fixture()
     def seed_bootaction_multinode(self, blank_state, deckhand_orchestrator,
                                   input_files, mock_get_build_data):
@@ -62,6 +152,15 @@ class TestBootActionContext(object):
 
         return ba_ctx
 
+    @pytest.fixture()
+    def stream_tarballs(self, setup):
+        """Stream all tarballs and render them on request."""
+        conf = config.config_mgr.conf
+        conf.set_override(
+            name='tarball_buffer_size', group='bootactions', override=0)
+        yield
+        conf.clear_override(name='tarball_buffer_size', group='bootactions')
+
     @pytest.fixture()
     def falcontest(self, drydock_state, deckhand_ingester,
                    deckhand_orchestrator, mock_get_build_data):
@@ -55,3 +55,27 @@ class TestBootActionSignal(object):
             design_ref=design_ref)
 
         assert len(design_data.bootactions) == 3
+
+    def test_bootaction_status_bulk(self, deckhand_orchestrator, drydock_state,
+                                    input_files, mock_get_build_data):
+        """Test that boot action status is queried for many nodes at once."""
+        input_file = input_files.join("deckhand_fullsite.yaml")
+        design_ref = "file://%s" % str(input_file)
+
+        task = deckhand_orchestrator.create_task(
+            design_ref=design_ref, action=hd_fields.OrchestratorAction.Noop)
+
+        deckhand_orchestrator.create_bootaction_contexts(
+            ['compute01', 'controller01'], task)
+
+        bootactions = drydock_state.get_boot_actions_for_nodes(
+            ['compute01', 'controller01', 'unknown'])
+
+        assert 'unknown' not in bootactions
+        assert bootactions['compute01'] == (
+            drydock_state.get_boot_actions_for_node('compute01'))
+
+        running = drydock_state.get_boot_actions_for_nodes(
+            ['compute01'], action_status=[hd_fields.ActionResult.Incomplete])
+
+        assert len(running['compute01']) == 1
@@ -45,6 +45,40 @@ class TestClass(object):
             orchestrator.stop_orchestrator()
             orch_thread.join(10)
 
+    def test_concurrent_tasks(self, deckhand_ingester, input_files, setup,
+                              blank_state, mock_get_build_data):
+        input_file = input_files.join("deckhand_fullsite.yaml")
+        design_ref = "file://%s" % str(input_file)
+
+        orchestrator = orch.Orchestrator(
+            state_manager=blank_state, ingester=deckhand_ingester)
+
+        orch_tasks = []
+        for _ in range(2):
+            orch_task = orchestrator.create_task(
+                action=hd_fields.OrchestratorAction.Noop,
+                design_ref=design_ref)
+            orch_task.set_status(hd_fields.TaskStatus.Queued)
+            orch_task.save()
+            orch_tasks.append(orch_task)
+
+        orch_thread = threading.Thread(target=orchestrator.watch_for_tasks)
+        orch_thread.start()
+
+        try:
+            # Each Noop task takes 5 seconds, so run serially the second
+            # would not be complete
+            time.sleep(8)
+
+            for t in orch_tasks:
+                t = blank_state.get_task(t.get_id())
+                assert t.get_status() == hd_fields.TaskStatus.Complete
+                assert t.started is not None
+                assert t.to_dict()['queue_wait'] >= 0
+        finally:
+            orchestrator.stop_orchestrator()
+            orch_thread.join(10)
+
     def test_task_termination(self, input_files, deckhand_ingester, setup,
                               blank_state):
         input_file = input_files.join("deckhand_fullsite.yaml")
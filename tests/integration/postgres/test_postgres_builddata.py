@@ -111,3 +111,117 @@ class TestBuildData(object):
         assert len(bd_list) == 1
 
         assert bd_list[0].to_dict() == build_data1.to_dict()
+
+    def test_build_data_bulk_dedup(self, blank_state):
+        """Test that identical payloads in a bulk insert are stored once."""
+        task_id = uuid.uuid4()
+        lshw = '<node>%s</node>' % ('x' * 10000)
+        build_data = [
+            objects.BuildData(
+                node_name='foo',
+                task_id=task_id,
+                generator=g,
+                data_format='text/xml',
+                data_element=lshw) for g in ['lshw', 'lldp']
+        ]
+
+        assert blank_state.post_build_data_list(build_data)
+        assert blank_state.post_build_data_list(build_data)
+
+        with blank_state.connection() as conn:
+            contents = conn.execute(
+                "SELECT encoding, octet_length(data) AS size "
+                "FROM build_data_content").fetchall()
+
+        assert len(contents) == 1
+        assert contents[0]['encoding'] == 'zlib'
+        assert contents[0]['size'] < len(lshw)
+
+        bd_list = blank_state.get_build_data(task_id=task_id)
+
+        assert len(bd_list) == 4
+        assert all(bd.data_element == lshw for bd in bd_list)
+
+    def test_build_data_select_uncompressed(self, blank_state):
+        """Test that rows stored before deduplication can be read."""
+        build_data = objects.BuildData(
+            node_name='foo',
+            task_id=uuid.uuid4(),
+            generator='hello_world',
+            data_format='text/plain',
+            data_element='Hello World!')
+
+        with blank_state.connection() as conn:
+            conn.execute(
+                blank_state.build_data_tbl.insert().values(
+                    **build_data.to_db()))
+
+        bd_list = blank_state.get_build_data(node_name='foo')
+
+        assert len(bd_list) == 1
+        assert bd_list[0].to_dict() == build_data.to_dict()
+
+    def test_build_data_select_node_and_task(self, blank_state):
+        """Test that build data is filtered on both node and task."""
+        task_id = uuid.uuid4()
+        for node_name, tid in [('foo', task_id), ('bar', task_id),
+                               ('foo', uuid.uuid4())]:
+            blank_state.post_build_data(
+                objects.BuildData(
+                    node_name=node_name,
+                    task_id=tid,
+                    generator='lshw',
+                    data_format='text/xml',
+                    data_element='<node>%s</node>' % node_name))
+
+        bd_list = blank_state.get_build_data(node_name='foo', task_id=task_id)
+
+        assert len(bd_list) == 1
+        assert bd_list[0].node_name == 'foo'
+        assert bd_list[0].task_id == task_id
+
+    def test_build_data_latest_bulk(self, blank_state):
+        """Test that the latest data for many nodes is loaded at once."""
+        now = datetime.utcnow()
+        for node_name in ['foo', 'bar', 'baz']:
+            for generator in ['lshw', 'lldp']:
+                for days in [2, 0, 1]:
+                    blank_state.post_build_data(
+                        objects.BuildData(
+                            node_name=node_name,
+                            task_id=uuid.uuid4(),
+                            generator=generator,
+                            data_format='text/xml',
+                            data_element='%s %s %d' % (node_name, generator,
+                                                       days),
+                            collected_date=now - timedelta(days=days)))
+
+        bd_list = blank_state.get_latest_build_data(
+            node_names=['foo', 'bar'], generators=['lshw'])
+
+        assert sorted(bd.data_element for bd in bd_list) == [
+            'bar lshw 0', 'foo lshw 0'
+        ]
+
+        bd_list = blank_state.get_build_data(latest=True)
+
+        assert len(bd_list) == 6
+        assert all(bd.data_element.endswith(' 0') for bd in bd_list)
+
+    def test_build_data_summary(self, blank_state):
+        """Test that verbosity 1 omits the collected data."""
+        build_data = objects.BuildData(
+            node_name='foo',
+            task_id=uuid.uuid4(),
+            generator='hello_world',
+            data_format='text/plain',
+            data_element='Hello World!')
+        blank_state.post_build_data(build_data)
+
+        bd_list = blank_state.get_build_data(node_name='foo', verbosity=1)
+        latest = blank_state.get_latest_build_data(
+            node_names=['foo'], verbosity=1)
+
+        for bd in bd_list + latest:
+            assert bd.data_element is None
+            assert bd.to_dict(verbosity=1) == build_data.to_dict(verbosity=1)
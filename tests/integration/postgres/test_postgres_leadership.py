@@ -15,6 +15,12 @@
 import uuid
 import time
 
+from sqlalchemy import sql
+
+from drydock_provisioner import objects
+from drydock_provisioner.objects import fields as hd_fields
+from drydock_provisioner.statemgmt.leadership import LeaderHeartbeat
+
 
 class TestPostgres(object):
     def test_claim_leadership(self, blank_state):
@@ -46,3 +52,100 @@ class TestPostgres(object):
         crown = ds.claim_leadership(second_leader)
 
         assert crown
+
+    def test_leadership_lease_fencing(self, blank_state):
+        """Test that a deposed leader cannot renew its lease or save tasks."""
+        ds = blank_state
+
+        first_leader = uuid.uuid4()
+        second_leader = uuid.uuid4()
+
+        first_lease = ds.claim_leadership(first_leader)
+        assert first_lease
+        assert ds.claim_leadership(first_leader) == first_lease
+        assert ds.maintain_leadership(first_leader, lease=first_lease)
+
+        task = objects.Task(
+            action=hd_fields.OrchestratorAction.Noop,
+            design_ref='http://foo.com/design',
+            statemgr=ds)
+        ds.post_task(task)
+        task.lease = first_lease
+        task.set_status(hd_fields.TaskStatus.Running)
+        task.save()
+
+        self._expire_leadership(ds)
+        second_lease = ds.claim_leadership(second_leader)
+        assert second_lease == first_lease + 1
+
+        assert ds.maintain_leadership(first_leader, lease=first_lease) is False
+
+        task.set_status(hd_fields.TaskStatus.Complete)
+        assert ds.put_task(task) is False
+        assert ds.get_task(task.task_id).status == hd_fields.TaskStatus.Running
+
+        # Tasks started by the new leader are updated under its lease
+        new_task = objects.Task(
+            action=hd_fields.OrchestratorAction.Noop,
+            design_ref='http://foo.com/design',
+            statemgr=ds)
+        ds.post_task(new_task)
+        new_task.lease = second_lease
+        new_task.set_status(hd_fields.TaskStatus.Running)
+        assert ds.put_task(new_task)
+
+    def test_terminate_task_of_previous_lease(self, blank_state,
+                                              deckhand_orchestrator):
+        """Test that a task left by a deposed leader can be terminated."""
+        ds = blank_state
+
+        first_lease = ds.claim_leadership(uuid.uuid4())
+        task = objects.Task(
+            action=hd_fields.OrchestratorAction.Noop,
+            design_ref='http://foo.com/design',
+            statemgr=ds)
+        ds.post_task(task)
+        task.lease = first_lease
+        task.set_status(hd_fields.TaskStatus.Running)
+        task.save()
+
+        self._expire_leadership(ds)
+        assert ds.claim_leadership(uuid.uuid4()) == first_lease + 1
+
+        stored_task = ds.get_task(task.task_id)
+        assert stored_task.lease == first_lease
+        deckhand_orchestrator.terminate_task(stored_task, terminated_by='test')
+
+        stored_task = ds.get_task(task.task_id)
+        assert stored_task.terminate
+        assert stored_task.terminated_by == 'test'
+        assert stored_task.lease == first_lease
+
+    def test_leadership_heartbeat(self, blank_state):
+        """Test that the heartbeat reports latency and detects takeover."""
+        ds = blank_state
+
+        leader = uuid.uuid4()
+        lease = ds.claim_leadership(leader)
+
+        heartbeat = LeaderHeartbeat(ds, leader, lease, 1, 15)
+        assert heartbeat.beat()
+
+        stats = heartbeat.stats()
+        assert stats['beats'] == 1
+        assert stats['lease'] == lease
+        assert stats['latencyMax'] >= stats['latencyLast'] > 0
+
+        self._expire_leadership(ds)
+        ds.claim_leadership(uuid.uuid4())
+
+        assert heartbeat.beat() is False
+        assert heartbeat.lost.is_set()
+
+    def _expire_leadership(self, ds):
+        """Age the active instance check-in past the grace period."""
+        with ds.connection() as conn:
+            conn.execute(
+                sql.text("UPDATE active_instance SET last_ping = "
+                         "last_ping - interval '1 day'").execution_options(
+                             autocommit=True))
@@ -0,0 +1,82 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test delivery of PostgreSQL state change notifications."""
+
+import threading
+import time
+import uuid
+
+from drydock_provisioner import objects
+
+from drydock_provisioner.control.base import DrydockRequestContext
+from drydock_provisioner.statemgmt.notify import TASK_CHANNEL
+from drydock_provisioner.statemgmt.notify import parse_task_event
+
+
+class TestPostgresNotify(object):
+    def _wait_connected(self, state):
+        deadline = time.monotonic() + 10
+        state.wait_for_change(TASK_CHANNEL, 0)
+        while not state.monitor.connected and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert state.monitor.connected
+
+    def _make_task(self):
+        ctx = DrydockRequestContext()
+        ctx.user = 'sh8121'
+        ctx.external_marker = str(uuid.uuid4())
+
+        return objects.Task(
+            action='deploy_node',
+            design_ref='http://foo.bar/design',
+            context=ctx)
+
+    def test_post_task_wakes_waiter(self, blank_state):
+        """Test that inserting a task wakes a thread waiting on tasks."""
+        self._wait_connected(blank_state)
+
+        task = self._make_task()
+        received = []
+
+        def match(payload):
+            received.append(payload)
+            return parse_task_event(payload)[0] == str(task.task_id)
+
+        result = dict()
+
+        def waiter():
+            result['woke'] = blank_state.wait_for_change(
+                TASK_CHANNEL, 30, predicate=match)
+
+        t = threading.Thread(target=waiter)
+        t.start()
+        while not blank_state.monitor._waiters:
+            time.sleep(0.05)
+
+        start = time.monotonic()
+        blank_state.post_task(task)
+        t.join()
+
+        assert result['woke']
+        assert time.monotonic() - start < 30
+        assert "%s:%s" % (str(task.task_id), task.status) in received
+
+    def test_wait_times_out(self, blank_state):
+        """Test that a waiter is released at the timeout without events."""
+        self._wait_connected(blank_state)
+
+        woke = blank_state.wait_for_change(
+            TASK_CHANNEL, 0.5, predicate=lambda p: False)
+
+        assert not woke
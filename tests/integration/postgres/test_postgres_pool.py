@@ -0,0 +1,47 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test database connection pool management."""
+
+import pytest
+
+
+class TestPostgresPool(object):
+    def test_pool_stats(self, blank_state):
+        """Test that checkouts are counted and connections returned."""
+        before = blank_state.pool_stats()
+
+        blank_state.get_tasks()
+
+        after = blank_state.pool_stats()
+        assert after['checkouts'] > before['checkouts']
+        assert after['inUse'] == before['inUse']
+        assert after['checkoutWaitMax'] >= 0
+
+    def test_connection_returned_on_error(self, blank_state):
+        """Test that a connection is released when the block raises."""
+        in_use = blank_state.pool_stats()['inUse']
+
+        with pytest.raises(RuntimeError):
+            with blank_state.connection():
+                assert blank_state.pool_stats()['inUse'] == in_use + 1
+                raise RuntimeError()
+
+        assert blank_state.pool_stats()['inUse'] == in_use
+
+    def test_connection_reuse(self, blank_state):
+        """Test that a passed connection is reused and left open."""
+        with blank_state.connection() as conn:
+            with blank_state.connection(conn) as inner:
+                assert inner is conn
+            assert not conn.closed
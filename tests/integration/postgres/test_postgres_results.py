@@ -1,7 +1,13 @@
+import logging
 import pytest
+import threading
+import time
 
+from drydock_provisioner import config
 from drydock_provisioner import objects
 
+LOG = logging.getLogger(__name__)
+
 
 class TestPostgres(object):
     def test_result_message_insert(self, populateddb, drydock_state):
@@ -20,6 +26,135 @@ class TestPostgres(object):
 
         assert len(task.result.message_list) == 2
 
+    def test_result_messages_batched(self, blank_state):
+        """Test that messages are attached to the right task when batched."""
+        tasks = [
+            objects.Task(
+                action='prepare_site', design_ref='http://test.com/design')
+            for _ in range(3)
+        ]
+        for i, t in enumerate(tasks):
+            blank_state.post_task(t)
+            for j in range(i):
+                msg = objects.TaskStatusMessage('Message %d' % j, j == 0,
+                                                'node', 'node1')
+                blank_state.post_result_message(t.task_id, msg)
+
+        loaded = blank_state.get_tasks(task_ids=[t.task_id for t in tasks])
+        loaded = {t.task_id: t for t in loaded}
+
+        assert len(loaded) == 3
+        for i, t in enumerate(tasks):
+            msgs = loaded[t.task_id].result.message_list
+            assert [m.message for m in msgs] == [
+                'Message %d' % j for j in range(i)
+            ]
+            assert loaded[t.task_id].result.error_count == min(i, 1)
+
+    def test_task_without_messages(self, populateddb, drydock_state):
+        """Test that result message loading can be skipped."""
+        msg = objects.TaskStatusMessage('Error 1', True, 'node', 'node1')
+        drydock_state.post_result_message(populateddb.task_id, msg)
+
+        task = drydock_state.get_task(
+            populateddb.task_id, include_messages=False)
+
+        assert task.result.message_list == []
+
+    def test_status_msg_buffered(self, populateddb, drydock_state):
+        """Test that task status messages are written in order on save."""
+        populateddb.statemgr = drydock_state
+        for i in range(5):
+            populateddb.add_status_msg(
+                msg='Message %d' % i, error=False, ctx='node1', ctx_type='node')
+
+        task = drydock_state.get_task(populateddb.task_id)
+        assert len(task.result.message_list) == 0
+
+        populateddb.save()
+
+        task = drydock_state.get_task(populateddb.task_id)
+        assert [m.message for m in task.result.message_list
+                ] == ['Message %d' % i for i in range(5)]
+
+    def test_status_msg_flush_size(self, populateddb, drydock_state):
+        """Test that a full buffer is written without waiting for save."""
+        populateddb.statemgr = drydock_state
+        flush_size = config.config_mgr.conf.database.result_message_flush_size
+        for i in range(flush_size):
+            populateddb.add_status_msg(
+                msg='Message %d' % i, error=False, ctx='node1', ctx_type='node')
+
+        task = drydock_state.get_task(populateddb.task_id)
+        assert len(task.result.message_list) == flush_size
+
+    def test_status_msg_flush_interval(self, blank_state):
+        """Test that one shared thread flushes the messages of many tasks."""
+        conf = config.config_mgr.conf
+        conf.set_override(
+            name='result_message_flush_interval',
+            group='database',
+            override=1)
+        try:
+            tasks = []
+            for i in range(50):
+                task = objects.Task(
+                    action='prepare_site',
+                    design_ref='http://test.com/design',
+                    statemgr=blank_state)
+                blank_state.post_task(task)
+                task.add_status_msg(
+                    msg='Message %d' % i,
+                    error=False,
+                    ctx='node1',
+                    ctx_type='node')
+                tasks.append(task)
+
+            flushers = [
+                t for t in threading.enumerate()
+                if t.name == 'drydock-message-flusher'
+            ]
+            assert len(flushers) == 1
+
+            # The thread may already be sleeping a longer interval
+            deadline = time.monotonic() + 10
+            while True:
+                messages = [
+                    [
+                        m.message for m in blank_state.get_task(
+                            t.task_id).result.message_list
+                    ] for t in tasks
+                ]
+                if all(messages) or time.monotonic() > deadline:
+                    break
+                time.sleep(0.5)
+
+            assert messages == [['Message %d' % i] for i in range(50)]
+        finally:
+            conf.clear_override(
+                name='result_message_flush_interval', group='database')
+
+    def test_status_msg_bulk_benchmark(self, populateddb, drydock_state):
+        """Benchmark buffered writes of 10k result messages."""
+        populateddb.statemgr = drydock_state
+
+        start = time.monotonic()
+        for i in range(10000):
+            populateddb.add_status_msg(
+                msg='Message %d' % i,
+                error=(i % 10 == 0),
+                ctx='node1',
+                ctx_type='node')
+        populateddb.save()
+        elapsed = time.monotonic() - start
+
+        LOG.info("Wrote 10000 result messages in %.3f seconds." % elapsed)
+
+        task = drydock_state.get_task(populateddb.task_id)
+        assert len(task.result.message_list) == 10000
+        assert task.result.error_count == 1000
+        assert task.result.message_list[-1].message == 'Message 9999'
+
     @pytest.fixture(scope='function')
     def populateddb(self, blank_state):
         """Add dummy task to test against."""
@@ -0,0 +1,229 @@
+# Copyright 2018 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test pruning of old task history and node data."""
+
+import gzip
+import json
+import os
+import time
+import uuid
+
+from datetime import datetime, timedelta
+
+import pytest
+import ulid2
+
+from sqlalchemy import sql
+
+import drydock_provisioner.error as errors
+
+from drydock_provisioner import config
+from drydock_provisioner import objects
+from drydock_provisioner.objects import fields as hd_fields
+from drydock_provisioner.statemgmt.retention import RETENTION_LOCK_KEY
+from drydock_provisioner.statemgmt.retention import RetentionManager
+
+
+class TestPostgresRetention(object):
+    def test_retention_dry_run(self, history):
+        """Test that a dry run counts rows without deleting them."""
+        report = RetentionManager(history).run(dry_run=True)
+
+        assert report == dict(
+            tasks=4,
+            result_message=7,
+            build_data=2,
+            build_data_content=0,
+            boot_action_status=1)
+        assert len(history.get_tasks()) == 7
+
+    def test_retention_delete(self, history, tmpdir):
+        """Test that old rows are deleted in batches and archived."""
+        config.config_mgr.conf.set_override(
+            name='archive_dir', group='retention', override=str(tmpdir))
+
+        report = RetentionManager(history).run()
+
+        assert report == dict(
+            tasks=4,
+            result_message=7,
+            build_data=2,
+            build_data_content=0,
+            boot_action_status=1)
+
+        # The finished subtask of the running task is kept with its parent
+        tasks = history.get_tasks()
+        assert len(tasks) == 3
+        assert sorted(t.status for t in tasks) == [
+            hd_fields.TaskStatus.Complete, hd_fields.TaskStatus.Complete,
+            hd_fields.TaskStatus.Running
+        ]
+        for t in tasks:
+            if t.parent_task_id is not None:
+                assert history.get_task(t.parent_task_id) is not None
+        # The newest record of node1 and the only, old, record of node2
+        kept = sorted((b.node_name, b.collected_date)
+                      for b in history.get_build_data())
+        assert [n for n, _ in kept] == ['node1', 'node2']
+        assert kept[0][1] > datetime.utcnow() - timedelta(days=1)
+
+        archived = dict()
+        for f in os.listdir(str(tmpdir)):
+            with gzip.open(os.path.join(str(tmpdir), f), 'rt') as af:
+                archived[f.split('-')[0]] = [
+                    json.loads(line) for line in af
+                ]
+
+        assert len(archived['tasks']) == 4
+        assert len(archived['result_message']) == 7
+        assert len(archived['build_data']) == 2
+        assert len(archived['boot_action_status']) == 1
+
+        assert RetentionManager(history).run() == dict(
+            tasks=0,
+            result_message=0,
+            build_data=0,
+            build_data_content=0,
+            boot_action_status=0)
+
+    def test_retention_max_count(self, history):
+        """Test that only the newest tasks beyond the count limit are kept."""
+        config.config_mgr.conf.set_override(
+            name='task_max_age', group='retention', override=0)
+        config.config_mgr.conf.set_override(
+            name='task_max_count', group='retention', override=1)
+
+        report = RetentionManager(history).run(dry_run=True)
+
+        # Of the four finished top-level tasks the newest one is kept,
+        # subtasks do not count against the limit
+        assert report['tasks'] == 4
+
+    def test_retention_build_data_max_count(self, history):
+        """Test that build data limits apply per node and generator."""
+        config.config_mgr.conf.set_override(
+            name='build_data_max_age', group='retention', override=0)
+        config.config_mgr.conf.set_override(
+            name='build_data_max_count', group='retention', override=1)
+        try:
+            report = RetentionManager(history).run()
+        finally:
+            config.config_mgr.conf.clear_override(
+                name='build_data_max_count', group='retention')
+
+        # node1 keeps its newest record, node2 its only one
+        assert report['build_data'] == 2
+        assert sorted(b.node_name for b in history.get_build_data()) == [
+            'node1', 'node2'
+        ]
+
+    def test_retention_in_progress(self, history):
+        """Test that a second run is rejected while one is deleting rows."""
+        with history.connection() as conn:
+            conn.execute(
+                sql.text("SELECT pg_advisory_lock(:key)"),
+                key=RETENTION_LOCK_KEY)
+            try:
+                with pytest.raises(errors.RetentionInProgress):
+                    RetentionManager(history).run()
+
+                # Dry runs delete nothing and are not locked out
+                assert RetentionManager(history).run(dry_run=True)['tasks'] == 4
+            finally:
+                conn.execute(
+                    sql.text("SELECT pg_advisory_unlock(:key)"),
+                    key=RETENTION_LOCK_KEY)
+
+        assert RetentionManager(history).run()['tasks'] == 4
+
+    @pytest.fixture()
+    def history(self, blank_state):
+        """Populate tasks, build data and boot actions of varying age."""
+        conf = config.config_mgr.conf
+        conf.set_override(name='batch_size', group='retention', override=2)
+        conf.set_override(name='task_max_age', group='retention', override=30)
+        conf.set_override(
+            name='build_data_max_age', group='retention', override=30)
+        conf.set_override(
+            name='bootaction_status_max_age', group='retention', override=30)
+
+        now = datetime.utcnow()
+        tasks = []
+        ages = [
+            (hd_fields.TaskStatus.Complete, 60),
+            (hd_fields.TaskStatus.Terminated, 45),
+            (hd_fields.TaskStatus.Complete, 31),
+            (hd_fields.TaskStatus.Running, 60),
+            (hd_fields.TaskStatus.Complete, 1),
+        ]
+        for status, days in ages:
+            task = objects.Task(
+                action=hd_fields.OrchestratorAction.Noop,
+                design_ref='http://foo.com/design')
+            task.status = status
+            task.created = now - timedelta(days=days)
+            blank_state.post_task(task)
+            blank_state.post_result_messages(task.task_id, [
+                objects.TaskStatusMessage('Message %d' % i, False, 'node',
+                                          'node1') for i in range(2)
+            ])
+            tasks.append(task)
+
+        # Finished subtasks of the oldest finished and the running task
+        for parent in [tasks[0], tasks[3]]:
+            subtask = objects.Task(
+                action=hd_fields.OrchestratorAction.Noop,
+                design_ref='http://foo.com/design',
+                parent_task_id=parent.task_id)
+            subtask.status = hd_fields.TaskStatus.Complete
+            subtask.created = parent.created
+            blank_state.post_task(subtask)
+            blank_state.add_subtask(parent.task_id, subtask.task_id)
+            blank_state.post_result_messages(subtask.task_id, [
+                objects.TaskStatusMessage('Message', False, 'node', 'node1')
+            ])
+
+        for days in [90, 40, 0]:
+            blank_state.post_build_data(
+                objects.BuildData(
+                    node_name='node1',
+                    task_id=uuid.uuid4(),
+                    generator='lshw',
+                    data_format='text/plain',
+                    data_element='data',
+                    collected_date=now - timedelta(days=days)))
+
+        # The only record of a node is kept regardless of its age
+        blank_state.post_build_data(
+            objects.BuildData(
+                node_name='node2',
+                task_id=uuid.uuid4(),
+                generator='lshw',
+                data_format='text/plain',
+                data_element='data',
+                collected_date=now - timedelta(days=90)))
+
+        for days in [40, 0]:
+            action_id = ulid2.generate_binary_ulid(
+                timestamp=time.time() - days * 86400)
+            blank_state.post_boot_action('node1', uuid.uuid4(), os.urandom(32),
+                                         action_id, 'helloworld')
+
+        yield blank_state
+
+        for opt in [
+                'batch_size', 'archive_dir', 'task_max_age', 'task_max_count',
+                'build_data_max_age', 'bootaction_status_max_age'
+        ]:
+            conf.clear_override(name=opt, group='retention')
@@ -18,6 +18,7 @@ import pytest
 import uuid
 
 from drydock_provisioner import objects
+from drydock_provisioner.objects import fields as hd_fields
 
 from drydock_provisioner.control.base import DrydockRequestContext
 
@@ -97,6 +98,60 @@ class TestPostgres(object):
 
         assert len(result) == 1
 
+    def test_task_save_keeps_termination(self, populateddb, drydock_state):
+        """Test that saving a stale task does not undo a termination."""
+        populateddb.statemgr = drydock_state
+        populateddb.set_status(hd_fields.TaskStatus.Running)
+        populateddb.save()
+
+        other = drydock_state.get_task(populateddb.task_id)
+        other.set_status(hd_fields.TaskStatus.Terminating)
+        other.terminate_task(terminated_by='sh8121')
+
+        populateddb.result.add_success('node1')
+        populateddb.save()
+
+        assert populateddb.status == hd_fields.TaskStatus.Terminating
+        assert populateddb.terminate
+        assert populateddb.terminated_by == 'sh8121'
+
+        result = drydock_state.get_task(populateddb.task_id)
+        assert result.status == hd_fields.TaskStatus.Terminating
+        assert result.terminate
+        assert result.result.successes == ['node1']
+
+        populateddb.set_status(hd_fields.TaskStatus.Terminated)
+        populateddb.save()
+
+        result = drydock_state.get_task(populateddb.task_id)
+        assert result.status == hd_fields.TaskStatus.Terminated
+
+    def test_task_save_unchanged(self, populateddb, drydock_state):
+        """Test that saving an unchanged task skips the database write."""
+        populateddb.statemgr = drydock_state
+        populateddb.save()
+        updated = drydock_state.get_task(populateddb.task_id).updated
+
+        populateddb.save()
+
+        assert drydock_state.get_task(populateddb.task_id).updated == updated
+
+    def test_task_save_unchanged_sees_termination(self, populateddb,
+                                                  drydock_state):
+        """Test that an unchanged task picks up a termination request."""
+        populateddb.statemgr = drydock_state
+        populateddb.set_status(hd_fields.TaskStatus.Running)
+        populateddb.save()
+
+        other = drydock_state.get_task(populateddb.task_id)
+        other.terminate_task(terminated_by='sh8121')
+
+        populateddb.save()
+
+        assert populateddb.check_terminate()
+        assert populateddb.terminated_by == 'sh8121'
+        assert populateddb.status == hd_fields.TaskStatus.Running
+
     @pytest.fixture(scope='function')
     def populateddb(self, blank_state):
         """Add dummy task to test against."""
@@ -255,9 +255,16 @@ def mock_get_task(drydock_state):
         LOG.debug('returning None')
         return None
 
+    def get_tasks_side_effect(task_ids=None, **kwargs):
+        tasks = [side_effect(t) for t in task_ids]
+        return [t for t in tasks if t is not None]
+
     drydock_state.real_get_task = drydock_state.get_task
     drydock_state.get_task = Mock(side_effect=side_effect)
+    drydock_state.real_get_tasks = drydock_state.get_tasks
+    drydock_state.get_tasks = Mock(side_effect=get_tasks_side_effect)
 
     yield
     drydock_state.get_task = Mock(wraps=None, side_effect=None)
     drydock_state.get_task = drydock_state.real_get_task
+    drydock_state.get_tasks = drydock_state.real_get_tasks
@@ -0,0 +1,98 @@
+# Copyright 2018 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test caching of remote boot action assets."""
+import time
+
+import pytest
+import responses
+
+import drydock_provisioner.error as errors
+
+from drydock_provisioner.cache import AssetCache
+from drydock_provisioner.statemgmt.design.resolver import ReferenceResolver
+
+
+class TestAssetCache(object):
+    def test_asset_cache_hit(self):
+        calls = []
+
+        def fetcher(url, etag):
+            calls.append(etag)
+            return b'content', '"v1"'
+
+        cache = AssetCache(fetcher, max_bytes=1024, ttl=60)
+
+        for _ in range(3):
+            assert cache.get('http://foo.com/asset') == b'content'
+
+        assert calls == [None]
+        stats = cache.stats()
+        assert stats['hits'] == 2
+        assert stats['hitRate'] == round(2 / 3, 4)
+
+    def test_asset_cache_revalidate(self):
+        calls = []
+
+        def fetcher(url, etag):
+            calls.append(etag)
+            if etag == '"v1"':
+                return None, etag
+            return b'content', '"v1"'
+
+        cache = AssetCache(fetcher, max_bytes=1024, ttl=0.01)
+
+        assert cache.get('http://foo.com/asset') == b'content'
+        time.sleep(0.02)
+        assert cache.get('http://foo.com/asset') == b'content'
+
+        assert calls == [None, '"v1"']
+        assert cache.stats()['unchanged'] == 1
+
+    def test_asset_cache_disabled(self):
+        calls = []
+
+        def fetcher(url, etag):
+            calls.append(etag)
+            return b'content', None
+
+        cache = AssetCache(fetcher, max_bytes=0, ttl=60)
+
+        cache.get('http://foo.com/asset')
+        cache.get('http://foo.com/asset')
+
+        assert len(calls) == 2
+
+    @responses.activate
+    def test_resolve_conditional(self):
+        url = 'http://foo.com/asset'
+        responses.add(
+            responses.GET, url, body=b'content', headers={'ETag': '"v1"'})
+        responses.add(responses.GET, url, status=304)
+
+        content, etag = ReferenceResolver.resolve_reference_conditional(url)
+        assert content == b'content'
+        assert etag == '"v1"'
+
+        content, etag = ReferenceResolver.resolve_reference_conditional(
+            url, etag=etag)
+        assert content is None
+        assert responses.calls[1].request.headers['If-None-Match'] == '"v1"'
+
+    @responses.activate
+    def test_resolve_conditional_error(self):
+        url = 'http://foo.com/asset'
+        responses.add(responses.GET, url, status=404)
+
+        with pytest.raises(errors.InvalidDesignReference):
+            ReferenceResolver.resolve_reference_conditional(url)
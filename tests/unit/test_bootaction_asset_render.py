@@ -13,6 +13,8 @@
 # limitations under the License.
 """Test that boot action assets are rendered correctly."""
 
+import concurrent.futures
+
 import ulid2
 
 from drydock_provisioner.statemgmt.state import DrydockState
@@ -56,6 +58,36 @@ class TestBootactionRenderAction(object):
         assert 'deckhand_fullsite.yaml' in assets[2].rendered_bytes.decode(
             'utf-8')
 
+    def test_bootaction_render_concurrent(self, input_files,
+                                          deckhand_ingester, setup):
+        """Test that concurrent renders from one design do not interfere."""
+        input_file = input_files.join("deckhand_fullsite.yaml")
+
+        design_state = DrydockState()
+        design_ref = "file://%s" % str(input_file)
+
+        design_status, design_data = deckhand_ingester.ingest_data(
+            design_state=design_state, design_ref=design_ref)
+
+        ba = design_data.get_bootaction('helloworld')
+        nodes = ['compute01', 'compute02', 'controller01']
+
+        def render(i):
+            nodename = nodes[i % len(nodes)]
+            assets = ba.render_assets(nodename, design_data,
+                                      ulid2.generate_binary_ulid(),
+                                      design_ref)
+            return nodename, assets
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(render, range(600)))
+
+        for nodename, assets in results:
+            hello = assets[0].rendered_bytes.decode('utf-8')
+            assert hello.endswith("-from %s'" % nodename)
+
+        assert all(not hasattr(a, 'rendered_bytes') for a in ba.asset_list)
+
     def test_bootaction_network_context(self, input_files,
                                         deckhand_orchestrator, setup):
         """Test that a boot action creates proper network context."""
@@ -14,7 +14,11 @@
 """Test that rack models are properly parsed."""
 import base64
 
+import pytest
+
+import drydock_provisioner.error as errors
 import drydock_provisioner.objects as objects
+import drydock_provisioner.objects.bootaction as bootaction
 
 
 class TestClass(object):
@@ -41,3 +45,24 @@ class TestClass(object):
         test_value = ba.execute_pipeline(orig, ['utf8_decode'])
 
         assert test_value == expected_value
+
+    def test_bootaction_pipeline_template_cache(self, setup):
+        objects.register_all()
+
+        ba = objects.BootActionAsset()
+
+        tpl = 'Hello {{ node.hostname }}'
+        for n in ['node1', 'node2']:
+            test_value = ba.execute_pipeline(
+                tpl, ['template'], tpl_ctx=dict(node=dict(hostname=n)))
+            assert test_value == 'Hello %s' % n
+
+        assert bootaction.get_template(tpl) is bootaction.get_template(tpl)
+
+    def test_bootaction_pipeline_unknown_segment(self):
+        objects.register_all()
+
+        ba = objects.BootActionAsset()
+
+        with pytest.raises(errors.UnknownPipelineSegment):
+            ba.execute_pipeline('data', ['rot13'])
@@ -18,6 +18,8 @@ import tarfile
 import io
 
 import drydock_provisioner.objects as objects
+from drydock_provisioner.objects.bootaction import RenderedAsset
+from drydock_provisioner.orchestrator.bootaction_bundles import stream_tarball
 from drydock_provisioner.statemgmt.state import DrydockState
 from drydock_provisioner.control.bootaction import BootactionUtils
 
@@ -54,3 +56,30 @@ class TestClass(object):
         tarasset = tarball.getmember('/var/tmp/hello.sh')
 
         assert tarasset.mode == 0o555
+
+    def test_bootaction_tarball_stream(self, setup):
+        """Test that a streamed tarball is a valid gzipped tar file."""
+        long_path = '/var/tmp/%s/module.ko' % ('x' * 120)
+        assets = [
+            RenderedAsset('file', long_path, 0o644, bytes(range(256)) * 4099),
+            RenderedAsset('unit', '/lib/systemd/system/a.service', None,
+                          b'[Unit]\n'),
+        ]
+
+        for level in [0, 6]:
+            chunks = list(
+                stream_tarball(assets, compresslevel=level,
+                               chunk_size=65536))
+
+            assert len(chunks) > 1
+
+            tarball = tarfile.open(
+                mode='r:gz', fileobj=io.BytesIO(b''.join(chunks)))
+
+            member = tarball.getmember(long_path)
+            assert member.mode == 0o644
+            assert tarball.extractfile(member).read() == (
+                assets[0].rendered_bytes)
+            member = tarball.getmember('/lib/systemd/system/a.service')
+            assert member.mode == 0o600
+            assert tarball.extractfile(member).read() == b'[Unit]\n'
@@ -0,0 +1,134 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test caching of compiled effective site designs."""
+import threading
+import time
+
+from drydock_provisioner.cache import LruCache
+from drydock_provisioner.orchestrator.orchestrator import Orchestrator
+
+
+class TestLruCache(object):
+    def test_cache_hit(self):
+        cache = LruCache(max_entries=2)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return 'value'
+
+        assert cache.get('a', loader) == 'value'
+        assert cache.get('a', loader) == 'value'
+        assert len(calls) == 1
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_cache_lru_eviction(self):
+        cache = LruCache(max_entries=2)
+
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        cache.get('a', lambda: 1)
+        cache.get('c', lambda: 3)
+
+        assert len(cache) == 2
+        assert cache.get('a', lambda: 'reloaded') == 1
+        assert cache.get('b', lambda: 'reloaded') == 'reloaded'
+        assert cache.stats()['evictions'] >= 1
+
+    def test_cache_max_bytes(self):
+        cache = LruCache(max_entries=8, max_bytes=10, sizeof=len)
+
+        cache.get('a', lambda: 'aaaa')
+        cache.get('b', lambda: 'bbbb')
+        cache.get('c', lambda: 'cccc')
+        cache.get('d', lambda: 'd' * 11)
+
+        assert len(cache) == 2
+        assert cache.stats()['bytes'] == 8
+        assert cache.get('a', lambda: 'reloaded') == 'reloaded'
+
+    def test_cache_ttl(self):
+        cache = LruCache(max_entries=2, ttl=0.01)
+
+        cache.get('a', lambda: 1)
+        time.sleep(0.02)
+
+        assert cache.get('a', lambda: 2) == 2
+
+    def test_cache_uncacheable(self):
+        cache = LruCache(max_entries=2)
+
+        cache.get('a', lambda: 1, cacheable=lambda v: False)
+
+        assert len(cache) == 0
+
+    def test_cache_single_flight(self):
+        cache = LruCache(max_entries=2)
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'value'
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(cache.get('a', loader)))
+        leader.start()
+        started.wait(5)
+
+        waiters = [
+            threading.Thread(
+                target=lambda: results.append(cache.get('a', loader)))
+            for _ in range(4)
+        ]
+        for t in waiters:
+            t.start()
+
+        release.set()
+        for t in [leader] + waiters:
+            t.join(5)
+
+        assert len(calls) == 1
+        assert results == ['value'] * 5
+
+
+class TestDesignCache(object):
+    def test_effective_site_cached(self, input_files, yaml_ingester,
+                                   drydock_state, mock_get_build_data):
+        input_file = input_files.join("fullsite.yaml")
+        design_ref = "file://%s" % str(input_file)
+
+        orchestrator = Orchestrator(
+            state_manager=drydock_state, ingester=yaml_ingester)
+
+        status1, design1 = orchestrator.get_effective_site(design_ref)
+        status2, design2 = orchestrator.get_effective_site(design_ref)
+
+        stats = orchestrator.design_cache.stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+
+        # The compiled design is shared, each caller gets its own status
+        assert design1 is design2
+        assert status1 is not status2
+        assert status1.status == status2.status
+
+        status1.add_status_msg(
+            msg='Caller message', error=False, ctx='NA', ctx_type='NA')
+        assert len(status2.message_list) == len(status1.message_list) - 1
@@ -170,3 +170,30 @@ def test_client_validate_design_post():
     validation_resp = dd_client.validate_design('href-placeholder')
 
     assert validation_resp['status'] == validation['status']
+
+@responses.activate
+def test_client_get_tasks_paged():
+    host = 'foo.bar.baz'
+    url = "http://%s/api/v1.0/tasks" % (host)
+
+    responses.add(
+        responses.GET,
+        url,
+        json=[{'task_id': 'a'}, {'task_id': 'b'}],
+        headers={'X-Next-Marker': 'b'},
+        status=200)
+    responses.add(
+        responses.GET, url, json=[{'task_id': 'c'}], status=200)
+
+    dd_ses = dc_session.DrydockSession(host)
+    dd_client = dc_client.DrydockClient(dd_ses)
+
+    tasks = dd_client.get_tasks(
+        page_size=2, status=['running', 'queued'], top_level=True)
+
+    assert [t['task_id'] for t in tasks] == ['a', 'b', 'c']
+    assert len(responses.calls) == 2
+    assert 'marker' not in responses.calls[0].request.url
+    assert 'status=running%2Cqueued' in responses.calls[0].request.url
+    assert 'top_level=true' in responses.calls[0].request.url
+    assert 'marker=b' in responses.calls[1].request.url
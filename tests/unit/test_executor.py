@@ -0,0 +1,90 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the shared worker pools."""
+import threading
+
+import drydock_provisioner.config as config
+import drydock_provisioner.executor as executor
+
+from drydock_provisioner.executor import WorkerPool
+
+
+class TestWorkerPool(object):
+    def test_pool_gauges(self):
+        pool = WorkerPool('test', 2)
+        release = threading.Event()
+        started = threading.Semaphore(0)
+
+        def work():
+            started.release()
+            release.wait(5)
+            return True
+
+        futures = [pool.submit(work) for _ in range(5)]
+        started.acquire()
+        started.acquire()
+
+        stats = pool.stats()
+        assert stats['active'] == 2
+        assert stats['queued'] == 3
+
+        release.set()
+        assert all(f.result(5) for f in futures)
+
+        stats = pool.stats()
+        assert stats['active'] == 0
+        assert stats['queued'] == 0
+        assert stats['completed'] == 5
+
+    def test_bounded_queue(self):
+        pool = WorkerPool('test', 1, max_queue=1)
+        release = threading.Event()
+
+        pool.submit(release.wait, 5)
+        pool.submit(release.wait, 5)
+
+        submitted = threading.Event()
+
+        def submit():
+            pool.submit(release.wait, 5)
+            submitted.set()
+
+        t = threading.Thread(target=submit)
+        t.start()
+
+        # The third submission blocks until a slot frees up
+        assert not submitted.wait(0.2)
+        release.set()
+        assert submitted.wait(5)
+        t.join(5)
+
+    def test_action_pool_limits(self, setup):
+        config.config_mgr.conf.set_override(
+            'worker_limits', {
+                'test_driver': '4',
+                'test_driver.deploy_node': '200'
+            },
+            group='executor')
+
+        try:
+            deploy_pool = executor.get_pool('test_driver', 'deploy_node')
+            other_pool = executor.get_pool('test_driver', 'identify_node')
+        finally:
+            config.config_mgr.conf.clear_override(
+                'worker_limits', group='executor')
+
+        assert deploy_pool.max_workers == 200
+        assert other_pool.max_workers == 4
+        assert other_pool is executor.get_pool('test_driver')
+        assert 'test_driver.deploy_node' in executor.pool_stats()
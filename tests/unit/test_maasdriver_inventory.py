@@ -0,0 +1,97 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the shared MaaS inventory snapshot."""
+import concurrent.futures
+import time
+
+import drydock_provisioner.drivers.node.maasdriver.models.tag as maas_tag
+import drydock_provisioner.drivers.node.maasdriver.models.vlan as maas_vlan
+
+from drydock_provisioner.drivers.node.maasdriver.inventory import MaasInventory
+
+
+class FakeResponse(object):
+    def __init__(self, json_data):
+        self.status_code = 200
+        self.ok = True
+        self.json_data = json_data
+
+    def json(self):
+        return self.json_data
+
+
+class FakeMaas(object):
+    """MaaS API client counting requests per endpoint."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, endpoint, **kwargs):
+        self.requests.append(endpoint)
+        time.sleep(0.01)
+        if endpoint == 'machines/':
+            return FakeResponse([{'system_id': 'abc', 'hostname': 'node1'}])
+        elif endpoint == 'tags/':
+            return FakeResponse([{'name': 'tag1'}])
+        return FakeResponse([])
+
+
+class TestMaasInventory(object):
+    def test_shared_snapshot(self):
+        fake_maas = FakeMaas()
+        inventory = MaasInventory(fake_maas, max_age=60)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as e:
+            futures = [e.submit(inventory.machines) for _ in range(50)]
+            results = [f.result() for f in futures]
+
+        assert fake_maas.requests.count('machines/') == 1
+        assert all(r is results[0] for r in results)
+        assert results[0].singleton({'hostname': 'node1'}) is not None
+
+    def test_snapshot_expiry(self):
+        fake_maas = FakeMaas()
+        inventory = MaasInventory(fake_maas, max_age=0)
+
+        inventory.tags()
+        inventory.tags()
+
+        assert fake_maas.requests.count('tags/') == 2
+
+    def test_invalidate_on_write(self):
+        fake_maas = FakeMaas()
+        inventory = MaasInventory(fake_maas)
+
+        inventory.machines()
+        first = inventory.tags()
+        inventory.invalidate(maas_tag.Tags)
+        second = inventory.tags()
+        inventory.machines()
+
+        assert first is not second
+        assert fake_maas.requests.count('tags/') == 2
+        assert fake_maas.requests.count('machines/') == 1
+
+    def test_invalidate_vlans_of_fabric(self):
+        fake_maas = FakeMaas()
+        inventory = MaasInventory(fake_maas)
+
+        first = inventory.vlans(1)
+        other = inventory.vlans(2)
+        inventory.invalidate(maas_vlan.Vlans, fabric_id=1)
+
+        assert inventory.vlans(1) is not first
+        assert inventory.vlans(2) is other
+        assert fake_maas.requests.count('fabrics/1/vlans/') == 2
+        assert fake_maas.requests.count('fabrics/2/vlans/') == 1
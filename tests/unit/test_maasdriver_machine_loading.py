@@ -0,0 +1,188 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test loading and querying of MaaS machine collections.
+
+Uses a local fake MaaS API client to count the requests needed to
+list a large number of machines.
+"""
+import re
+
+import drydock_provisioner.error as errors
+import drydock_provisioner.drivers.node.maasdriver.models.machine as maas_machine
+
+
+class FakeResponse(object):
+    def __init__(self, status_code=200, json_data=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.json_data = json_data
+        self.text = ''
+
+    def json(self):
+        return self.json_data
+
+
+class FakeMaas(object):
+    """Minimal MaaS API client serving a fixed list of machines."""
+
+    def __init__(self, machine_count):
+        self.machines = [{
+            'system_id': 'node%d' % i,
+            'hostname': 'node%d' % i,
+            'status_name': 'Ready',
+        } for i in range(machine_count)]
+        self.requests = []
+        self.bulk_power_params = True
+
+    def get(self, endpoint, **kwargs):
+        self.requests.append(endpoint)
+        if (endpoint == 'machines/' and kwargs.get('op') == 'power_parameters'
+                and not self.bulk_power_params):
+            raise errors.DriverError("MAAS Error: 400 - Unknown operation")
+        elif endpoint == 'machines/' and kwargs.get(
+                'op') == 'power_parameters':
+            return FakeResponse(json_data={
+                m['system_id']: {
+                    'power_address': '10.0.%d.%d' % (i // 250, i % 250)
+                }
+                for i, m in enumerate(self.machines)
+            })
+        elif endpoint == 'machines/':
+            return FakeResponse(json_data=self.machines)
+        elif re.match('machines/[^/]+/$', endpoint):
+            i = int(endpoint.split('/')[1][4:])
+            return FakeResponse(json_data={
+                'power_address': '10.0.%d.%d' % (i // 250, i % 250)
+            })
+        elif re.match('nodes/[^/]+/interfaces/$', endpoint):
+            return FakeResponse(json_data=[{
+                'id': 1,
+                'name': 'eth0',
+                'type': 'physical',
+                'mac_address': '00:00:00:00:00:01',
+                'links': [],
+            }])
+        elif re.match('nodes/[^/]+/(blockdevices|volume-groups)/$',
+                      endpoint):
+            return FakeResponse(json_data=[])
+        return FakeResponse(status_code=404)
+
+
+class TestMachineLoading(object):
+    def test_lazy_machine_list(self):
+        fake_maas = FakeMaas(1000)
+
+        machine_list = maas_machine.Machines(fake_maas)
+        machine_list.refresh()
+
+        assert machine_list.len() == 1000
+        assert len(fake_maas.requests) == 1
+
+        node = machine_list.singleton({'hostname': 'node10'})
+
+        assert node.interfaces.singleton({'name': 'eth0'}) is not None
+        assert len(fake_maas.requests) == 2
+
+        node.interfaces
+        assert len(fake_maas.requests) == 2
+
+    def test_prefetch_machine_list(self):
+        fake_maas = FakeMaas(1000)
+
+        machine_list = maas_machine.Machines(fake_maas, prefetch=True)
+        machine_list.refresh()
+
+        assert len(fake_maas.requests) == 3001
+
+        node = machine_list.singleton({'hostname': 'node10'})
+        node.interfaces
+        node.block_devices
+        node.volume_groups
+
+        assert len(fake_maas.requests) == 3001
+
+
+class FakeNode(object):
+    """Minimal stand-in for a BaremetalNode using IPMI."""
+
+    def __init__(self, name, oob_ip):
+        self.name = name
+        self.oob_type = 'ipmi'
+        self.oob_parameters = {'network': 'oob'}
+        self.oob_ip = oob_ip
+
+    def get_network_address(self, network):
+        return self.oob_ip
+
+    def get_id(self):
+        return self.name
+
+
+class TestMachineIdentify(object):
+    def test_identify_by_power_address(self):
+        fake_maas = FakeMaas(1000)
+
+        machine_list = maas_machine.Machines(fake_maas)
+        machine_list.refresh()
+
+        for i in range(100):
+            node = FakeNode('node%d' % i, '10.0.0.%d' % i)
+            machine = machine_list.identify_baremetal_node(
+                node, update_name=False)
+            assert machine.resource_id == 'node%d' % i
+
+        # One list request and one bulk power parameter request
+        assert len(fake_maas.requests) == 2
+
+    def test_identify_unknown_node(self):
+        fake_maas = FakeMaas(10)
+
+        machine_list = maas_machine.Machines(fake_maas)
+        machine_list.refresh()
+
+        node = FakeNode('missing', '192.168.1.1')
+
+        assert machine_list.identify_baremetal_node(node) is None
+
+    def test_query_indexed_fields(self):
+        fake_maas = FakeMaas(10)
+
+        machine_list = maas_machine.Machines(fake_maas)
+        machine_list.refresh()
+
+        assert machine_list.singleton({'hostname': 'node3'}) is not None
+        assert machine_list.singleton({
+            'resource_id': 'node3',
+            'status_name': 'Ready'
+        }) is not None
+        assert machine_list.singleton({
+            'resource_id': 'node3',
+            'status_name': 'Deployed'
+        }) is None
+        assert len(machine_list.query({'status_name': 'Ready'})) == 10
+
+    def test_power_params_fallback(self):
+        fake_maas = FakeMaas(10)
+        fake_maas.bulk_power_params = False
+
+        machine_list = maas_machine.Machines(fake_maas)
+        machine_list.refresh()
+
+        node = FakeNode('node3', '10.0.0.3')
+        machine = machine_list.identify_baremetal_node(
+            node, update_name=False)
+
+        assert machine.resource_id == 'node3'
+        # List, failed bulk request and one request per machine
+        assert len(fake_maas.requests) == 12
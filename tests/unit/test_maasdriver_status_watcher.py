@@ -0,0 +1,69 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the MaaS machine status watcher."""
+import concurrent.futures
+
+from drydock_provisioner.drivers.node.maasdriver.watcher import MachineStatusWatcher
+
+
+class FakeResponse(object):
+    def __init__(self, json_data):
+        self.status_code = 200
+        self.json_data = json_data
+
+    def json(self):
+        return self.json_data
+
+
+class FakeMaas(object):
+    """MaaS API client where each machine is deployed after 3 polls."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, endpoint, params=None, **kwargs):
+        self.requests.append(params)
+        polls = len(self.requests)
+        return FakeResponse([{
+            'system_id': i,
+            'status_name': 'Deployed' if polls >= 3 else 'Deploying'
+        } for i in params['id']])
+
+
+class TestMachineStatusWatcher(object):
+    def test_bulk_status_polling(self):
+        fake_maas = FakeMaas()
+        watcher = MachineStatusWatcher(fake_maas, 0.05)
+
+        def wait(system_id):
+            return watcher.wait_for(
+                system_id, lambda s: s.startswith('Deployed'), 10)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as e:
+            results = list(e.map(wait, ['node%d' % i for i in range(20)]))
+
+        assert results == ['Deployed'] * 20
+        # Each poll queries all the watched machines in one request
+        assert len(fake_maas.requests) < 10
+        assert max(len(p['id']) for p in fake_maas.requests) > 1
+        assert watcher.watches == {}
+
+    def test_status_timeout(self):
+        fake_maas = FakeMaas()
+        watcher = MachineStatusWatcher(fake_maas, 0.05)
+
+        status = watcher.wait_for('node1', lambda s: s == 'Ready', 0.2)
+
+        assert status == 'Deployed' or status == 'Deploying'
+        assert watcher.watches == {}
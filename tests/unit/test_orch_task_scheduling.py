@@ -0,0 +1,69 @@
+# Copyright 2017 AT&T Intellectual Property.  All other rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test node-aware scheduling of orchestrator tasks."""
+import concurrent.futures
+from unittest import mock
+
+from drydock_provisioner.orchestrator.orchestrator import Orchestrator
+
+
+class TestTaskNodeConflicts(object):
+    def test_disjoint_nodes(self):
+        assert not Orchestrator._nodes_conflict(
+            set(['node1', 'node2']), set(['node3']))
+
+    def test_shared_nodes(self):
+        assert Orchestrator._nodes_conflict(
+            set(['node1', 'node2']), set(['node2']))
+
+    def test_site_wide_task(self):
+        assert Orchestrator._nodes_conflict(None, set(['node1']))
+        assert Orchestrator._nodes_conflict(set(['node1']), None)
+        assert Orchestrator._nodes_conflict(None, None)
+
+    def test_nodeless_task(self):
+        assert not Orchestrator._nodes_conflict(set(), set(['node1']))
+        assert not Orchestrator._nodes_conflict(None, set())
+
+
+class TestQueuedTaskNodes(object):
+    def test_task_nodes_computed_once(self, setup):
+        """Test that a deferred task's nodes are not recomputed per poll."""
+        state_manager = mock.MagicMock()
+        orchestrator = Orchestrator(
+            state_manager=state_manager, ingester=mock.MagicMock())
+
+        running = concurrent.futures.Future()
+        orchestrator.running_tasks['running'] = (running, set(['node1']))
+
+        queued = mock.MagicMock()
+        queued.get_id.return_value = 'queued'
+        queued.action = 'deploy_nodes'
+        queued.check_terminate.return_value = False
+        state_manager.get_queued_tasks.return_value = [queued]
+
+        actions = {'deploy_nodes': mock.MagicMock()}
+        with mock.patch.object(
+                orchestrator, 'get_task_nodes',
+                return_value=set(['node1'])) as get_task_nodes:
+            for _ in range(3):
+                orchestrator._start_queued_tasks(actions, mock.MagicMock())
+
+            assert get_task_nodes.call_count == 1
+            assert not actions['deploy_nodes'].called
+
+            state_manager.get_queued_tasks.return_value = []
+            orchestrator._start_queued_tasks(actions, mock.MagicMock())
+
+        assert 'queued' not in orchestrator.queued_task_nodes
@@ -15,8 +15,11 @@
 
 import base64
 
+import pytest
 import responses
 
+import drydock_provisioner.error as errors
+
 from drydock_provisioner.statemgmt.design.resolver import ReferenceResolver
 
 
@@ -41,6 +44,15 @@ class TestClass(object):
         assert len(responses.calls) == 1
         assert responses.calls[0].request.url == url
 
+    @responses.activate
+    def test_resolve_http_url_error(self):
+        """Test that the resolver raises for an error response."""
+        url = 'http://foo.com/test.yaml'
+        responses.add(responses.GET, url, status=404)
+
+        with pytest.raises(errors.InvalidDesignReference):
+            ReferenceResolver.resolve_reference(url)
+
     @responses.activate
     def test_resolve_http_basicauth_url(self):
         """Test the resolver will resolve http URLs w/ basic auth."""